@@ -1,10 +1,25 @@
-from hashlib import sha256
-from os import urandom
-from typing import Dict, Tuple
-from Curve import Curve
-from Mod import Mod
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import new as new_hash, sha256, sha384, sha512
+from itertools import islice
+from sys import getsizeof
+from mmap import ACCESS_READ, ALLOCATIONGRANULARITY, mmap
+from os import PathLike, cpu_count, fstat, getpid, urandom
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from BinaryCurve import BinaryCurve
+from Curve import Curve, FixedBaseTable, ModularPoint, O, Point
+from Mod import Mod, prime_field
+from Tables import cached_table, calibrate
 
 Signature = Tuple[int, int]
+Nonce = Tuple[int, int, int]  # (k, r, inv(k) mod N)
+VerifyItem = Tuple[str, Signature, Point]  # (message, signature, public key)
+# A file name, an open binary file, a bytes-like object or an iterable of byte strings.
+Stream = Union[str, PathLike, BinaryIO, bytes, bytearray, memoryview, Iterable[bytes]]
+Hash = Union[str, Callable, None]  # A hashlib name or constructor, None picks one matching the size of N.
+STREAM_BLOCK = 1 << 20  # Bytes hashed at a time from files, a multiple of mmap.ALLOCATIONGRANULARITY.
 
 secp256k1 = {  # Certicom secp256-k1
     'P': 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F,  # 256 bit field prime.
@@ -14,6 +29,13 @@ secp256k1 = {  # Certicom secp256-k1
     'Gy': 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,  # 256 bit base point y coord.
     # N is the smallest positive integer such that N * G = O
     'N': 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,  # 256 bit order of base point.
+    # GLV endomorphism (x, y) -> (Beta * x, y), which equals multiplication by Lambda.
+    'Beta': 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE,  # Cube root of 1 mod P.
+    'Lambda': 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72,  # Cube root of 1 mod N.
+    'Basis': (  # Short vectors (a, b) with a + b * Lambda = 0 mod N, used to split scalars.
+        (0x3086D221A7D46BCDE86C90E49284EB15, -0xE4437ED6010E88286F547FA90ABFE4C3),
+        (0x114CA50F7A8E2F3F657C1108D9D44CFD8, 0x3086D221A7D46BCDE86C90E49284EB15),
+    ),
 }
 
 nist256p = {
@@ -44,20 +66,103 @@ nist521p = {
 }
 
 
+# Binary curves y**2 + x*y = x**3 + A*x**2 + B over GF(2**m). P is the reduction polynomial, bit i being the
+# coefficient of x**i, and 'Field' tells ECDSA to use BinaryCurve. The k1 curves are Koblitz curves.
+sect233k1 = {
+    'Field': 'binary',
+    'P': (1 << 233) | (1 << 74) | 1,
+    'A': 0,
+    'B': 1,
+    'Gx': 0x017232ba853a7e731af129f22ff4149563a419c26bf50a4c9d6eefad6126,
+    'Gy': 0x01db537dece819b7f70f555a67c427a8cd9bf18aeb9b56e0c11056fae6a3,
+    'N': 0x8000000000000000000000000000069d5bb915bcd46efb1ad5f173abdf,
+    'H': 4,
+}
+
+sect233r1 = {
+    'Field': 'binary',
+    'P': (1 << 233) | (1 << 74) | 1,
+    'A': 1,
+    'B': 0x0066647ede6c332c7f8c0923bb58213b333b20e9ce4281fe115f7d8f90ad,
+    'Gx': 0x00fac9dfcbac8313bb2139f1bb755fef65bc391f8b36f8f8eb7371fd558b,
+    'Gy': 0x01006a08a41903350678e58528bebf8a0beff867a7ca36716f7e01f81052,
+    'N': 0x01000000000000000000000000000013e974e72f8a6922031d2603cfe0d7,
+    'H': 2,
+}
+
+sect283k1 = {
+    'Field': 'binary',
+    'P': (1 << 283) | (1 << 12) | (1 << 7) | (1 << 5) | 1,
+    'A': 0,
+    'B': 1,
+    'Gx': 0x0503213f78ca44883f1a3b8162f188e553cd265f23c1567a16876913b0c2ac2458492836,
+    'Gy': 0x01ccda380f1c9e318d90f95d07e5426fe87e45c0e8184698e45962364e34116177dd2259,
+    'N': 0x01ffffffffffffffffffffffffffffffffffe9ae2ed07577265dff7f94451e061e163c61,
+    'H': 4,
+}
+
+sect283r1 = {
+    'Field': 'binary',
+    'P': (1 << 283) | (1 << 12) | (1 << 7) | (1 << 5) | 1,
+    'A': 1,
+    'B': 0x027b680ac8b8596da5a4af8a19a0303fca97fd7645309fa2a581485af6263e313b79a2f5,
+    'Gx': 0x05f939258db7dd90e1934f8c70b0dfec2eed25b8557eac9c80e2e198f8cdbecd86b12053,
+    'Gy': 0x03676854fe24141cb98fe6d4b20d02b4516ff702350eddb0826779c813f0df45be8112f4,
+    'N': 0x03ffffffffffffffffffffffffffffffffffef90399660fc938a90165b042a7cefadb307,
+    'H': 2,
+}
+
+# Fixed-base tables for G, shared by all ECDSA instances using the same paramters and window.
+_g_tables: Dict[Tuple, FixedBaseTable] = {}
+
+
+def g_table(paramters: Dict, curve: Union[Curve, BinaryCurve], window: int, directory: Optional[str] = None) -> FixedBaseTable:
+    """
+    Returns the fixed-base table of G for the given paramters, building it on first use.
+    With a directory, the table is memory-mapped from a file there, which is written by the first process to need it.
+    """
+    key = (paramters['P'], paramters['A'], paramters['B'], paramters['Gx'], paramters['Gy'], window)
+    if key not in _g_tables:
+        g, bits = (paramters['Gx'], paramters['Gy']), paramters['N'].bit_length()
+        if directory is None:
+            _g_tables[key] = curve.precompute(g, window, bits)
+        else:
+            _g_tables[key] = cached_table(curve, g, window, bits, directory)
+    return _g_tables[key]
+
+
 class ECDSA:
     ALPHANUM = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
     BASE = len(ALPHANUM)  # 58
 
-    def __init__(self, paramters: Dict, password: str):
+    def __init__(self, paramters: Dict, password: str, window: int = 4, tables: Optional[str] = None):
         """
         Initializes the algorithm with the specified paramters.
+        Multiplications by G use a table of 2**window points per window bits of N, shared across instances.
+        If tables is a directory, the table is kept there on disk and memory-mapped instead of being rebuilt
+        by every process.
         """
         self.D = paramters
-        self.curve = Curve(self.D['A'], self.D['B'], self.D['P'])
-        self.G = (Mod(self.D['Gx'], self.D['P']), Mod(self.D['Gy'], self.D['P']))
+        binary = self.D.get('Field') == 'binary'
+        if tables is not None:
+            calibrate(tables, (self.D['N'],) if binary else (self.D['P'], self.D['N']))
+        if binary:  # GF(2**m) calibrates its own multiplication and inversion, see GF2.py.
+            self.curve = BinaryCurve(self.D['A'], self.D['B'], self.D['P'])
+        else:
+            self.curve = Curve(self.D['A'], self.D['B'], self.D['P'])
+        if 'Beta' in self.D:  # Curves with known endomorphism paramters get GLV multiplication.
+            self.curve.set_endomorphism(self.D['Beta'], self.D['Lambda'], self.D['N'], self.D['Basis'])
+        # Points are validated once here, so the curve arithmetic below can skip its on-curve checks.
+        self.G = self.curve.modulate((self.D['Gx'], self.D['Gy']))
         self.N = self.D['N']
+        # Calibrates the reduction and inversion modulo N now rather than inside the first signature.
+        prime_field(self.N)
+        self.tables = tables
+        self.g_table = g_table(self.D, self.curve, window, tables)
         self.kpriv = self.intsha256(password)
-        self.kpub = self.curve.multiply(self.G, self.kpriv)
+        self.kpub = self.curve.multiply_fixed(self.g_table, self.kpriv)
+        self.pool: Optional[NoncePool] = None
+        self.key_cache: Optional[KeyTableCache] = None
 
     @staticmethod
     def intsha256(text: str) -> int:
@@ -99,31 +204,335 @@ class ECDSA:
                 break
         return self.ALPHANUM[0] * n_pad + result
 
-    def sign(self, message: str, k: int = None) -> Signature:
+    def nonce(self, k: int = None) -> Optional[Nonce]:
+        """
+        Returns the message independent part of a signature, (k, r, inv(k)), for the given or a random k.
+        Returns None if k is unusable and another one has to be picked.
+        """
         if k is None:
             k: int = self.random_number(255)  # TODO: HMAC Generation from hash of message in some RFC algorithm class.
-        if k > self.N:  # Random number generation is constructed in such a way that this is impossible.
-            return self.sign(message)  # But we can't always assume that RNG won't change.
-        r: Mod = Mod(self.curve.multiply(self.G, k)[0].value, self.N)  # Reduction modulo N is important.
+        if k >= self.N or k < 1:  # Random number generation is constructed in such a way that this is impossible.
+            return None  # But we can't always assume that RNG won't change.
+        r: Mod = Mod(self.curve.multiply_fixed(self.g_table, k)[0].value, self.N)  # Reduction modulo N is important.
         if r == 0:  # A computationally impossible but theoretically possible case. WARNING: Mod to int comparison.
-            return self.sign(message)
-        t1: Mod = self.intsha256(message) + self.kpriv * r
-        s: Mod = Mod(k, self.N).inverse() * t1.value
+            return None
+        return k, r.value, Mod(k, self.N).inverse().value
+
+    def start_pool(self, depth: int = 64) -> 'NoncePool':
+        """
+        Starts precomputing nonces in the background, which sign then uses whenever k is not given.
+        """
+        self.stop_pool()
+        self.pool = NoncePool(self, depth)
+        return self.pool
+
+    def stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def cache_keys(self, size: int = 128, window: int = 4) -> 'KeyTableCache':
+        """
+        Makes verify keep fixed-base tables for the size most recently used public keys, see KeyTableCache.
+        """
+        self.key_cache = KeyTableCache(self.curve, size, window, self.N.bit_length())
+        return self.key_cache
+
+    def hash_function(self, hash: Hash = None) -> Callable:
+        """
+        Returns a hashlib constructor: the given one, the one named by hash, or by default the
+        SHA-2 function whose output is closest to covering the bits of N.
+        """
+        if callable(hash):
+            return hash
+        if hash is not None:
+            return lambda: new_hash(hash)
+        bits = self.N.bit_length()
+        return sha256 if bits <= 256 else sha384 if bits <= 384 else sha512
+
+    def hash_stream(self, source: Stream, hash: Hash = None) -> int:
+        """
+        Hashes a message without holding it in memory, see Stream for the accepted sources, and truncates
+        the digest to the bit length of N as in FIPS 186. A str is a file name here, not a message.
+        Files are memory-mapped and hashed one STREAM_BLOCK at a time, so memory use does not depend on their size.
+        """
+        h = self.hash_function(hash)()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            h.update(source)
+        elif isinstance(source, (str, PathLike)):
+            with open(source, 'rb') as f:
+                self.hash_file(h, f)
+        elif hasattr(source, 'read'):
+            self.hash_file(h, source)
+        else:
+            for chunk in source:
+                h.update(chunk)
+        e = int.from_bytes(h.digest(), 'big')
+        return e >> max(0, 8 * h.digest_size - self.N.bit_length())
+
+    @staticmethod
+    def hash_file(h, f: BinaryIO):
+        """
+        Feeds the rest of f to h, through a memory map for regular files and with reads otherwise.
+        """
+        try:
+            start = f.tell()
+            size = fstat(f.fileno()).st_size
+        except (AttributeError, OSError, ValueError):  # Pipes, sockets and in-memory files can't be mapped.
+            size = start = 0
+        if size > start:
+            # One block is mapped at a time, a mapping of the whole file would grow the resident set to its size.
+            offset = start - start % ALLOCATIONGRANULARITY
+            while offset < size:
+                length = min(STREAM_BLOCK, size - offset)
+                with mmap(f.fileno(), length, access=ACCESS_READ, offset=offset) as data:
+                    h.update(memoryview(data)[start - offset:] if start > offset else data)
+                offset += length
+            f.seek(size)
+        for chunk in iter(lambda: f.read(STREAM_BLOCK), b''):  # Anything left, or everything if not mapped.
+            h.update(chunk)
+
+    def sign(self, message: str, k: int = None) -> Signature:
+        return self.sign_digest(self.intsha256(message), k)
+
+    def sign_stream(self, source: Stream, k: int = None, hash: Hash = None) -> Signature:
+        """
+        Signs a message of any size from a file, file name, bytes or iterable of byte strings, see hash_stream.
+        """
+        return self.sign_digest(self.hash_stream(source, hash), k)
+
+    def sign_digest(self, e: int, k: int = None) -> Signature:
+        """
+        Signs the integer e derived from the hash of a message.
+        """
+        nonce = self.pool.take() if k is None and self.pool is not None else self.nonce(k)
+        if nonce is None:
+            return self.sign_digest(e)
+        k, r, kinv = nonce
+        r: Mod = Mod(r, self.N)
+        t1: Mod = e + self.kpriv * r
+        s: Mod = Mod(kinv, self.N) * t1.value
         if s == 0:  # Again, computationally impossible but theoretically possible. WARNING: Mod to int comparison.
-            return self.sign(message)
+            return self.sign_digest(e)
         assert isinstance(r, Mod) and isinstance(s, Mod), "Signature final values have to be Mods."
         return r.value, s.value
 
-    def verify(self, message: str, signature: Signature) -> bool:
+    def verify(self, message: str, signature: Signature, kpub: Optional[Point] = None) -> bool:
+        """
+        Verifies the signature against kpub, which defaults to this instance's public key.
+        """
+        return self.verify_digest(self.intsha256(message), signature, kpub)
+
+    def verify_stream(self, source: Stream, signature: Signature, kpub: Optional[Point] = None,
+                      hash: Hash = None) -> bool:
+        """
+        Verifies a signature made by sign_stream with the same hash function.
+        """
+        return self.verify_digest(self.hash_stream(source, hash), signature, kpub)
+
+    def verify_digest(self, e: int, signature: Signature, kpub: Optional[Point] = None) -> bool:
+        """
+        Verifies the signature of the integer e derived from the hash of a message against kpub.
+        """
+        if kpub is None:
+            kpub = self.kpub
+        else:
+            try:
+                kpub = self.curve.modulate(kpub)
+            except ValueError:
+                return False
+        if kpub == O:
+            return False
         r, s = signature
         if r > self.N - 1 or r < 1:
             return False
         if s > self.N - 1 or s < 1:
             return False
         inv: Mod = Mod(s, self.N).inverse()  # Conversion to Mod happens here. r is still int.
-        u1: Mod = inv * self.intsha256(message)
+        u1: Mod = inv * e
         u2: Mod = inv * r
-        x: Mod = self.curve.add(self.curve.multiply(self.G, u1.value), self.curve.multiply(self.kpub, u2.value))[0]
+        table = self.key_cache.get(kpub) if self.key_cache is not None else None
+        if table is not None:
+            rv: Point = self.curve.multi_multiply_fixed([(self.g_table, u1.value), (table, u2.value)])
+        else:
+            rv: Point = self.curve.multi_multiply([(self.G, u1.value), (kpub, u2.value)], check=False)
+        if rv == O:
+            return False
+        x: Mod = Mod(rv[0].value, self.N)  # Reduction modulo N, just like in sign.
         if x.value == r:
             return True
         return False
+
+    def verify_many(self, items: Iterable[VerifyItem], workers: Optional[int] = None,
+                    chunksize: int = 64) -> Iterator[bool]:
+        """
+        Verifies (message, signature, public key) triples, yielding one result per triple in input order.
+        Chunks of chunksize triples are spread across a pool of workers processes (one per core by default),
+        with a bounded number of chunks in flight so that arbitrarily long iterables can be streamed.
+        workers=1 verifies in this process instead.
+        """
+        items = iter(items)
+        chunks = iter(lambda: list(islice(items, chunksize)), [])
+        workers = workers or cpu_count() or 1
+        if workers == 1:
+            for chunk in chunks:
+                yield from (self.verify(*item) for item in chunk)
+            return
+        with ProcessPoolExecutor(workers, initializer=_init_verify_worker,
+                                 initargs=(self.D, self.g_table.window, self.tables)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_verify_chunk, chunk))
+                if len(pending) > 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+
+class KeyTableCache:
+    def __init__(self, curve: Union[Curve, BinaryCurve], size: int, window: int, bits: int):
+        """
+        A least recently used cache of the fixed-base tables of up to size public keys, which turns
+        verification against a hot key into two fixed-base multiplications without any doublings.
+        Each table holds 2**window points per window bits of the scalars.
+        Building a table costs several plain verifications, so a key only gets one on its second lookup:
+        keys used once, like most in a batch from many signers, never pay for a table they won't reuse.
+        The last size keys seen only once are remembered for this, by their coordinates alone.
+        """
+        self.curve = curve
+        self.size = size
+        self.window = window
+        self.bits = bits
+        self.tables: OrderedDict = OrderedDict()  # (x, y) -> (table, bytes of memory)
+        self.seen: OrderedDict = OrderedDict()  # (x, y) -> None, keys looked up once without a table.
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, kpub: ModularPoint) -> Optional[FixedBaseTable]:
+        """
+        Returns the table of kpub, building it if kpub was seen before, or None on a first lookup.
+        """
+        key = (int(kpub[0]), int(kpub[1]))
+        if key in self.tables:
+            self.hits += 1
+            self.tables.move_to_end(key)
+            return self.tables[key][0]
+        self.misses += 1
+        if key not in self.seen:
+            self.seen[key] = None
+            if len(self.seen) > self.size:
+                self.seen.popitem(last=False)
+            return None
+        del self.seen[key]
+        table = self.curve.precompute(kpub, self.window, self.bits)
+        self.tables[key] = table, self.table_memory(table)
+        if len(self.tables) > self.size:
+            self.tables.popitem(last=False)
+            self.evictions += 1
+        return table
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __contains__(self, kpub: ModularPoint) -> bool:
+        return (int(kpub[0]), int(kpub[1])) in self.tables
+
+    @staticmethod
+    def table_memory(table: FixedBaseTable) -> int:
+        """Bytes held by the lists, tuples and ints of a table."""
+        rv = getsizeof(table.points)
+        for row in table.points:
+            rv += getsizeof(row)
+            for p in row:
+                rv += getsizeof(p) + sum(getsizeof(c) for c in p)
+        return rv
+
+    def memory(self) -> int:
+        return sum(memory for _, memory in self.tables.values())
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.tables),
+            'max_size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'seen_once': len(self.seen),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_bytes': self.memory(),
+        }
+
+    def clear(self):
+        self.tables.clear()
+        self.seen.clear()
+
+
+class NoncePool:
+    def __init__(self, alg: ECDSA, depth: int = 64):
+        """
+        Keeps up to depth (k, r, inv(k)) triples of alg precomputed by a background thread,
+        so that signing only has to do the message dependent arithmetic.
+        Every triple is handed out at most once, also across fork: a child process starts from an empty pool.
+        """
+        self.alg = alg
+        self.depth = depth
+        self.start()
+
+    def start(self):
+        self.pid = getpid()
+        self.queue: Queue = Queue(self.depth)
+        self.stopped = Event()
+        self.thread = Thread(target=self.fill, name='NoncePool', daemon=True)
+        self.thread.start()
+
+    def check_fork(self):
+        """
+        Restarts the pool with a new queue and thread if this is a child process forked since it started.
+        The triples queued in the parent are discarded, since the parent hands out the same ones.
+        """
+        if self.pid != getpid():
+            self.start()
+
+    def fill(self):
+        while not self.stopped.is_set():
+            nonce = self.alg.nonce()
+            while nonce is not None and not self.stopped.is_set():
+                try:
+                    self.queue.put(nonce, timeout=0.1)
+                    break
+                except Full:
+                    continue
+
+    def take(self) -> Optional[Nonce]:
+        """
+        Removes a precomputed triple from the pool, computing one on the spot if the pool ran dry.
+        """
+        self.check_fork()
+        try:
+            return self.queue.get_nowait()
+        except Empty:
+            return self.alg.nonce()
+
+    def __len__(self):
+        self.check_fork()
+        return self.queue.qsize()
+
+    def close(self):
+        self.stopped.set()
+        if self.pid == getpid():  # The filling thread of a parent process does not exist in a forked child.
+            self.thread.join()
+
+
+# The verifier of each verify_many worker process. Its own key pair is never used.
+_worker_verifier: Optional[ECDSA] = None
+
+
+def _init_verify_worker(paramters: Dict, window: int, tables: Optional[str]):
+    global _worker_verifier
+    _worker_verifier = ECDSA(paramters, '', window, tables)
+
+
+def _verify_chunk(chunk: List[VerifyItem]) -> List[bool]:
+    return [_worker_verifier.verify(*item) for item in chunk]
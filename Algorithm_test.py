@@ -1,7 +1,10 @@
 from input import *
 from ecdsa import SigningKey, VerifyingKey, SECP256k1, ellipticcurve
-from hashlib import sha256
-from Algorithm import secp256k1, ECDSA
+from hashlib import sha256, sha512
+from io import BytesIO
+from mmap import ALLOCATIONGRANULARITY
+import Algorithm
+from Algorithm import nist256p, nist521p, secp256k1, ECDSA
 from Curve import Point
 
 
@@ -56,5 +59,170 @@ def validate_signature(sk, msg, k, sig):
     return signatures_match
 
 
+def test_nonce_pool_fork():
+    """A forked child must not hand out the nonces its parent had queued, or both would sign with the same k."""
+    import os
+    from time import sleep
+    if not hasattr(os, 'fork'):
+        return
+    alg = ECDSA(secp256k1, 'fork')
+    pool = alg.start_pool(depth=8)
+    while len(pool) < 8:
+        sleep(0.01)
+    queued = {k for k, r, kinv in list(pool.queue.queue)}
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            reused = any(alg.pool.take()[0] in queued for _ in range(8))
+            os.write(write, b'reused' if reused else b'fresh')
+        finally:
+            os._exit(0)
+    os.close(write)
+    result = os.read(read, 16)
+    os.waitpid(pid, 0)
+    os.close(read)
+    alg.stop_pool()
+    assert result == b'fresh'
+
+
+def test_hash_stream(tmp_path, monkeypatch):
+    """Every kind of source hashes like hashlib, from wherever a file object has been left."""
+    monkeypatch.setattr(Algorithm, 'STREAM_BLOCK', ALLOCATIONGRANULARITY)  # Several mapped blocks per file.
+    alg = ECDSA(secp256k1, 'stream')
+    data = bytes(range(256)) * (3 * ALLOCATIONGRANULARITY // 256) + b'tail'
+    name = tmp_path / 'message'
+    name.write_bytes(data)
+    assert alg.hash_stream(data) == alg.hash_stream(bytearray(data)) == alg.hash_stream(memoryview(data))
+    assert alg.hash_stream(str(name)) == alg.hash_stream(name) == int(sha256(data).hexdigest(), 16)
+    for start in (0, 1, ALLOCATIONGRANULARITY - 1, ALLOCATIONGRANULARITY, ALLOCATIONGRANULARITY + 5, len(data) - 1, len(data)):
+        expected = int(sha256(data[start:]).hexdigest(), 16)
+        with open(name, 'rb') as f:
+            f.seek(start)
+            assert alg.hash_stream(f) == expected, start
+            assert f.read() == b''
+        source = BytesIO(data)
+        source.seek(start)
+        assert alg.hash_stream(source) == expected, start
+    chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+    assert alg.hash_stream(iter(chunks)) == alg.hash_stream(data)
+    empty = tmp_path / 'empty'
+    empty.write_bytes(b'')
+    expected = int(sha256(b'').hexdigest(), 16)
+    assert alg.hash_stream(b'') == alg.hash_stream(empty) == alg.hash_stream([]) == expected
+    assert alg.hash_stream(BytesIO()) == expected
+
+
+def test_hash_stream_truncation():
+    """Digests longer than N keep their leftmost bits, shorter ones are used whole."""
+    data = b'a message to truncate'
+    alg = ECDSA(secp256k1, 'truncate')
+    assert alg.hash_stream(data, 'sha512') == alg.hash_stream(data, sha512) == int(sha512(data).hexdigest(), 16) >> 256
+    assert alg.hash_stream(data, 'sha512').bit_length() <= alg.N.bit_length()
+    big = ECDSA(nist521p, 'truncate')
+    assert big.hash_stream(data) == int(sha512(data).hexdigest(), 16)
+    assert big.hash_stream(data, 'sha256') == int(sha256(data).hexdigest(), 16)
+
+
+def test_sign_stream(tmp_path):
+    """Streamed signatures match sign on the same message and verify with both paths."""
+    message = 'a message signed from a stream'
+    name = tmp_path / 'message'
+    name.write_bytes(message.encode())
+    for params in (secp256k1, nist256p):
+        alg = ECDSA(params, 'stream')
+        k = 1 + alg.random_number(255) % (alg.N - 1)
+        signature = alg.sign(message, k)
+        assert alg.sign_stream(message.encode(), k) == alg.sign_stream(name, k) == signature
+        assert alg.verify_stream(name, signature) and alg.verify_stream([message.encode()], signature, alg.kpub)
+        assert not alg.verify_stream(b'another message', signature)
+        long = alg.sign_stream(name, k, 'sha512')
+        assert alg.verify_digest(int(sha512(message.encode()).hexdigest(), 16) >> 256, long)
+        assert alg.verify_stream(name, long, hash='sha512') and not alg.verify_stream(name, long)
+        empty = alg.sign_stream(b'')
+        assert alg.verify_stream(iter([]), empty) and alg.verify('', empty)
+
+
+def test_key_table_cache():
+    """Tables are built on a key's second lookup and evicted least recently used first, within size."""
+    signers = [ECDSA(secp256k1, str(i)) for i in range(4)]
+    a, b, c, d = (signer.kpub for signer in signers)
+    alg = ECDSA(secp256k1, 'verifier')
+    cache = alg.cache_keys(size=2, window=4)
+    assert cache.get(a) is None and a not in cache
+    table = cache.get(a)
+    assert table is not None and a in cache and cache.get(a) is table
+    assert cache.get(b) is None and cache.get(b) is not None
+    cache.get(a)  # a is now the most recently used, b goes first.
+    assert cache.get(c) is None and list(cache.tables) == [(int(b[0]), int(b[1])), (int(a[0]), int(a[1]))]
+    cache.get(c)
+    assert c in cache and a in cache and b not in cache
+    memory = cache.table_memory(table)
+    stats = cache.stats()
+    assert stats == {'size': 2, 'max_size': 2, 'hits': 2, 'misses': 6, 'evictions': 1, 'seen_once': 0,
+                     'hit_rate': 0.25, 'memory_bytes': 2 * memory}
+    for _ in range(3):
+        for kpub in (a, b, c, d):
+            cache.get(kpub)
+    assert len(cache) == 2 and len(cache.seen) <= 2 and cache.memory() == sum(m for _, m in cache.tables.values())
+    assert cache.memory() <= 2 * memory
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['memory_bytes'] == 0 and cache.get(a) is None
+
+
+def test_verify_cached_keys():
+    signers = [ECDSA(secp256k1, str(i)) for i in range(3)]
+    signatures = [(signer.sign(f'message {i}'), signer.kpub) for i, signer in enumerate(signers)]
+    alg = ECDSA(secp256k1, 'verifier')
+    cache = alg.cache_keys(size=3)
+    for _ in range(3):
+        for i, (signature, kpub) in enumerate(signatures):
+            assert alg.verify(f'message {i}', signature, kpub)
+            assert not alg.verify(f'message {i + 1}', signature, kpub)
+    assert cache.stats()['hits'] == 12 and len(cache) == 3
+
+
+def test_verify_many():
+    """Results come back in input order and match verify, bad keys and signatures included, with and without workers."""
+    signers = [ECDSA(secp256k1, str(i)) for i in range(3)]
+    items = []
+    for i in range(40):
+        signer = signers[i % 3]
+        message = f'message {i}'
+        items.append((message, signer.sign(message), signer.kpub))
+    items[5] = ('message 5', items[5][1], signers[0].kpub)  # Signed by another key.
+    items[11] = ('tampered', items[11][1], items[11][2])
+    items[17] = ('message 17', items[17][1], False)  # The point at infinity.
+    items[23] = ('message 23', items[23][1], (1, 1))  # Not on the curve.
+    items[29] = ('message 29', items[29][1], (secp256k1['P'], 0))  # Out of range.
+    items[31] = ('message 31', (0, items[31][1][1]), items[31][2])
+    alg = ECDSA(secp256k1, 'verifier')
+    expected = [alg.verify(*item) for item in items]
+    assert expected.count(False) == 6
+    for workers in (1, 2):
+        assert list(alg.verify_many(items, workers=workers, chunksize=4)) == expected
+        assert list(alg.verify_many(iter(items), workers=workers, chunksize=7)) == expected
+    assert list(alg.verify_many([], workers=2)) == []
+
+
+def test_verify_many_streams():
+    """Only a bounded number of chunks is read ahead of the results, so endless generators work."""
+    signer = ECDSA(secp256k1, 'signer')
+    item = ('message', signer.sign('message'), signer.kpub)
+    for workers in (1, 2):
+        taken = 0
+
+        def endless():
+            nonlocal taken
+            while True:
+                taken += 1
+                yield item
+
+        results = signer.verify_many(endless(), workers=workers, chunksize=3)
+        assert [next(results) for _ in range(4)] == [True] * 4
+        assert taken <= (2 * workers + 2) * 3, (workers, taken)
+        results.close()
+
+
 if __name__ == "__main__":
     test_ecdsa()
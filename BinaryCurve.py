@@ -0,0 +1,348 @@
+from typing import Dict, List, Optional, Tuple, Union
+from Curve import O, FixedBaseTable, wnaf
+from GF2 import GF2, gf2_field
+
+BinaryPoint = Union[Tuple[GF2, GF2], bool]  # Affine (x, y), or O.
+LDPoint = Tuple[int, int, int]  # López-Dahab (X, Y, Z) standing for the affine point (X / Z, Y / Z**2).
+LD_O: LDPoint = (1, 0, 0)  # Point at infinity, any point with Z = 0 will do.
+TauElement = Tuple[int, int]  # r0 + r1 * tau in Z[tau], tau**2 = mu * tau - 2.
+
+
+def tau_mul(a: TauElement, b: TauElement, mu: int) -> TauElement:
+    return a[0] * b[0] - 2 * a[1] * b[1], a[0] * b[1] + a[1] * b[0] + mu * a[1] * b[1]
+
+
+def tau_norm(a: TauElement, mu: int) -> int:
+    return a[0] * a[0] + mu * a[0] * a[1] + 2 * a[1] * a[1]
+
+
+def tau_power(k: int, mu: int) -> TauElement:
+    """
+    tau**k = U_k * tau - 2 * U_(k - 1), with the Lucas sequence U_0 = 0, U_1 = 1, U_(i + 1) = mu * U_i - 2 * U_(i - 1).
+    """
+    u0, u1 = 0, 1
+    for _ in range(k - 1):
+        u0, u1 = u1, mu * u1 - 2 * u0
+    return (-2 * u0, u1) if k else (1, 0)
+
+
+def tau_mods(a: TauElement, b: TauElement, mu: int) -> TauElement:
+    """
+    a - q * b for the q in Z[tau] nearest to a / b = a * conj(b) / N(b), a remainder of about b's size.
+    """
+    norm = tau_norm(b, mu)
+    c0, c1 = tau_mul(a, (b[0] + mu * b[1], -b[1]), mu)
+    q = ((2 * c0 + norm) // (2 * norm), (2 * c1 + norm) // (2 * norm))
+    qb = tau_mul(q, b, mu)
+    return a[0] - qb[0], a[1] - qb[1]
+
+
+def tnaf(r: TauElement, mu: int, w: int, tw: int, alphas: List[TauElement]) -> List[int]:
+    """
+    Width-w tau-adic NAF of r, least significant digit first: r = sum(d_i * tau**i) where a digit u
+    stands for alphas[abs(u) >> 1] = u mods tau**w, negated for u < 0. As with wnaf, every nonzero digit
+    is odd and followed by at least w - 1 zeros. tw is the image of tau in Z / 2**w.
+    """
+    r0, r1 = r
+    digits = []
+    mask, half = (1 << w) - 1, 1 << (w - 1)
+    while r0 or r1:
+        if r0 & 1:
+            u = (r0 + r1 * tw) & mask
+            if u >= half:
+                u -= 1 << w
+            b0, b1 = alphas[abs(u) >> 1]
+            if u > 0:
+                r0, r1 = r0 - b0, r1 - b1
+            else:
+                r0, r1 = r0 + b0, r1 + b1
+        else:
+            u = 0
+        digits.append(u)
+        r0, r1 = r1 + mu * (r0 >> 1), -(r0 >> 1)  # Exact division by tau, r0 being even.
+    return digits
+
+
+class BinaryCurve:
+    def __init__(self, a: int, b: int, poly: int, window: int = 5):
+        """
+        Initializes the curve y**2 + x*y = x**3 + a*x**2 + b over GF(2**m), the field given by its reduction
+        polynomial poly (see GF2.py). Points are added in López-Dahab coordinates, where neither additions
+        nor doublings need inversions. On Koblitz curves (b = 1, a = 0 or 1) the Frobenius map
+        (x, y) -> (x**2, y**2) acts as the element tau of Z[tau], and variable-base multiplications use
+        the tau-adic NAF of the scalar: three squarings per digit instead of a doubling.
+        The window is the default (tau-adic) NAF width for multiplications on this curve.
+        """
+        self.field = gf2_field(poly)
+        self.P = poly
+        self.m = self.field.m
+        self.A = self.field(a)
+        self.B = self.field(b)
+        self.window = window
+        self.mul, self.sqr = self.field.mul, self.field.sqr
+        self.koblitz = self.B == 1 and self.A.value in (0, 1)
+        if self.koblitz:
+            self.mu = 1 if self.A.value else -1
+            t0, t1 = tau_power(self.m, self.mu)
+            self.frobenius_period: TauElement = (t0 - 1, t1)  # tau**m - 1 kills every point of the curve.
+            self._tnaf_tables: Dict[int, Tuple[int, List[TauElement]]] = {}
+
+    def find(self, p: BinaryPoint) -> bool:
+        if p == O:
+            return True
+        x, y = p
+        return y * y + x * y == x * x * x + self.A * x * x + self.B
+
+    def modulate(self, p: BinaryPoint) -> BinaryPoint:
+        """
+        Makes sure that the point p is in GF(2**m) and lies on the curve.
+        """
+        rv = O if p == O else (self.field(int(p[0])), self.field(int(p[1])))
+        if not self.find(rv):
+            raise ValueError(f"The point ({p[0]}, {p[1]}) was not found on the binary curve.")
+        return rv
+
+    def order(self) -> int:
+        """
+        The number of points of a Koblitz curve, the norm of tau**m - 1.
+        """
+        assert self.koblitz, "Only Koblitz curves have their points counted."
+        return tau_norm(self.frobenius_period, self.mu)
+
+    def to_ld(self, p: BinaryPoint) -> LDPoint:
+        if p == O:
+            return LD_O
+        return int(p[0]), int(p[1]), 1
+
+    def to_affine(self, p: LDPoint) -> BinaryPoint:
+        """
+        Converts a López-Dahab point back to affine coordinates. This costs one inversion.
+        """
+        x, y, z = p
+        if z == 0:
+            return O
+        zinv = self.field.inverse(z)
+        return GF2(self.mul(x, zinv), self.field), GF2(self.mul(y, self.sqr(zinv)), self.field)
+
+    def normalize(self, points: List[LDPoint]) -> List[LDPoint]:
+        """
+        Scales López-Dahab points to Z = 1, leaving points at infinity alone, with a single inversion.
+        """
+        zinvs = iter(self.field.inverse_many([q[2] for q in points if q[2]]))
+        rv = []
+        for x, y, z in points:
+            if z == 0:
+                rv.append(LD_O)
+                continue
+            zinv = next(zinvs)
+            rv.append((self.mul(x, zinv), self.mul(y, self.sqr(zinv)), 1))
+        return rv
+
+    def ld_negate(self, p: LDPoint) -> LDPoint:
+        """-(x, y) = (x, x + y)."""
+        x, y, z = p
+        return x, self.mul(x, z) ^ y if z != 1 else x ^ y, z
+
+    def frobenius(self, p: LDPoint) -> LDPoint:
+        x, y, z = p
+        return self.sqr(x), self.sqr(y), self.sqr(z)
+
+    def ld_double(self, p: LDPoint) -> LDPoint:
+        """
+        Doubling in López-Dahab coordinates, 4 multiplications (one by b) and 5 squarings:
+        Z3 = X1**2 * Z1**2, X3 = X1**4 + b * Z1**4, Y3 = b * Z1**4 * Z3 + X3 * (a * Z3 + Y1**2 + b * Z1**4).
+        """
+        x1, y1, z1 = p
+        if z1 == 0 or x1 == 0:  # x = 0 is the point of order 2.
+            return LD_O
+        mul, sqr, a, b = self.mul, self.sqr, self.A.value, self.B.value
+        x1s, z1s = sqr(x1), sqr(z1)
+        z3 = mul(x1s, z1s)
+        bz4 = sqr(z1s) if b == 1 else mul(b, sqr(z1s))
+        x3 = sqr(x1s) ^ bz4
+        az3 = z3 if a == 1 else 0 if a == 0 else mul(a, z3)
+        return x3, mul(bz4, z3) ^ mul(x3, az3 ^ sqr(y1) ^ bz4), z3
+
+    def ld_add_affine(self, p1: LDPoint, p2: LDPoint) -> LDPoint:
+        """
+        Mixed addition of a López-Dahab point and one with Z = 1, 8 multiplications and 5 squarings for a in {0, 1}.
+        """
+        x1, y1, z1 = p1
+        x2, y2, _ = p2
+        if z1 == 0:
+            return p2
+        mul, sqr = self.mul, self.sqr
+        z1s = sqr(z1)
+        a = mul(y2, z1s) ^ y1
+        b = mul(x2, z1) ^ x1
+        if b == 0:
+            return self.ld_double(p2) if a == 0 else LD_O
+        c = mul(z1, b)
+        z3 = sqr(c)
+        e = mul(a, c)
+        x3 = sqr(a) ^ mul(sqr(b), c) ^ e ^ self.a_times(z3)
+        # y3 = (e + z3) * (x3 + x2 * z3) + (x2 + y2) * z3**2
+        return x3, mul(e ^ z3, x3 ^ mul(x2, z3)) ^ mul(x2 ^ y2, sqr(z3)), z3
+
+    def ld_add(self, p1: LDPoint, p2: LDPoint) -> LDPoint:
+        """
+        Addition of two López-Dahab points, 13 multiplications and 5 squarings for a in {0, 1}. With
+        A = Y1 * Z2**2 + Y2 * Z1**2, B = X1 * Z2 + X2 * Z1, C = B * Z1 * Z2 and E = A * C, the slope is A / C and
+        Z3 = C**2, X3 = A**2 + E + B**2 * C + a * Z3, Y3 = (E + Z3) * X3 + V * Z2 * (E * X2 + Y2 * V * Z2), V = (B * Z1)**2.
+        """
+        if p1[2] == 0:
+            return p2
+        if p2[2] == 0:
+            return p1
+        if p2[2] == 1:
+            return self.ld_add_affine(p1, p2)
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        mul, sqr = self.mul, self.sqr
+        a = mul(y1, sqr(z2)) ^ mul(y2, sqr(z1))
+        b = mul(x1, z2) ^ mul(x2, z1)
+        if b == 0:
+            return self.ld_double(p1) if a == 0 else LD_O
+        w = mul(b, z1)
+        c = mul(w, z2)
+        z3 = sqr(c)
+        e = mul(a, c)
+        x3 = sqr(a) ^ e ^ mul(sqr(b), c) ^ self.a_times(z3)
+        vz2 = mul(sqr(w), z2)
+        return x3, mul(e ^ z3, x3) ^ mul(vz2, mul(e, x2) ^ mul(y2, vz2)), z3
+
+    def a_times(self, v: int) -> int:
+        a = self.A.value
+        return 0 if a == 0 else v if a == 1 else self.mul(a, v)
+
+    def add(self, p1: BinaryPoint, p2: BinaryPoint, check: bool = True) -> BinaryPoint:
+        if check:
+            p1, p2 = self.modulate(p1), self.modulate(p2)
+        return self.to_affine(self.ld_add(self.to_ld(p1), self.to_ld(p2)))
+
+    def multiply(self, p: BinaryPoint, k: int, check: bool = True, window: Optional[int] = None) -> BinaryPoint:
+        """
+        Width-w NAF multiplication, tau-adic on Koblitz curves. See multi_multiply.
+        """
+        return self.multi_multiply([(p, k)], window, check)
+
+    def odd_multiples(self, p: LDPoint, window: int) -> List[LDPoint]:
+        """
+        Returns [p, 3p, 5p, ..., (2**(window - 1) - 1)p] normalized to Z = 1, for window-w NAF digits.
+        """
+        rv = [p]
+        double = self.ld_double(p)
+        for _ in range((1 << (window - 2)) - 1):
+            rv.append(self.ld_add(rv[-1], double))
+        return self.normalize(rv)
+
+    def tnaf_table(self, window: int) -> Tuple[int, List[TauElement]]:
+        """
+        The image tw of tau in Z / 2**window and the digit values alpha_u = u mods tau**window for odd
+        0 < u < 2**(window - 1), shared by all the multiplications on this curve with this window.
+        """
+        if window not in self._tnaf_tables:
+            mu = self.mu
+            u0, u1 = 0, 1
+            for _ in range(window - 1):
+                u0, u1 = u1, mu * u1 - 2 * u0
+            tw = 2 * u0 * pow(u1, -1, 1 << window) % (1 << window)
+            tau_w = tau_power(window, mu)
+            alphas = [tau_mods((u, 0), tau_w, mu) for u in range(1, 1 << (window - 1), 2)]
+            self._tnaf_tables[window] = tw, alphas
+        return self._tnaf_tables[window]
+
+    def tau_multiples(self, p: LDPoint, window: int) -> List[LDPoint]:
+        """
+        Returns [alpha_1 * p, alpha_3 * p, ...] normalized to Z = 1, the points that tau-adic NAF digits refer to.
+        The alphas are short, so each of them takes a few Frobenius maps and additions.
+        """
+        _, alphas = self.tnaf_table(window)
+        tw2, alphas2 = self.tnaf_table(2)
+        minus = self.ld_negate(p)
+        rv = []
+        for alpha in alphas:
+            q = LD_O
+            for d in reversed(tnaf(alpha, self.mu, 2, tw2, alphas2)):
+                q = self.frobenius(q)
+                if d:
+                    q = self.ld_add_affine(q, p if d > 0 else minus)
+            rv.append(q)
+        return self.normalize(rv)
+
+    def multi_multiply(self, terms: List[Tuple[BinaryPoint, int]], window: Optional[int] = None,
+                       check: bool = True) -> BinaryPoint:
+        """
+        Computes k1 * p1 + k2 * p2 + ... with Straus' interleaving as in Curve.multi_multiply. On Koblitz curves
+        the scalars are first reduced modulo tau**m - 1, which maps every point to itself, and the chain of
+        doublings becomes a chain of Frobenius maps over their tau-adic NAFs, which are about m digits long.
+        """
+        window = window or self.window
+        tables = []
+        digits = []
+        for p, k in terms:
+            if check:
+                p = self.modulate(p)
+            if p == O or k == 0:
+                continue
+            if k < 0:
+                p, k = (p[0], p[0] + p[1]), -k
+            if self.koblitz:
+                tw, alphas = self.tnaf_table(window)
+                tables.append(self.tau_multiples(self.to_ld(p), window))
+                digits.append(tnaf(tau_mods((k, 0), self.frobenius_period, self.mu), self.mu, window, tw, alphas))
+            else:
+                tables.append(self.odd_multiples(self.to_ld(p), window))
+                digits.append(wnaf(k, window))
+        step = self.frobenius if self.koblitz else self.ld_double
+        length = max(map(len, digits), default=0)
+        q = LD_O
+        for column in zip(*[reversed(naf + [0] * (length - len(naf))) for naf in digits]):
+            q = step(q)
+            for table, d in zip(tables, column):
+                if d > 0:
+                    q = self.ld_add_affine(q, table[d >> 1])
+                elif d < 0:
+                    q = self.ld_add_affine(q, self.ld_negate(table[-d >> 1]))
+        return self.to_affine(q)
+
+    def precompute(self, p: BinaryPoint, window: int = 4, bits: Optional[int] = None) -> FixedBaseTable:
+        """
+        Builds the table for fixed-base multiplication of p by scalars below 2**bits (m bits by default),
+        laid out as in Curve.precompute, so that Tables.py can save and map it.
+        """
+        p = self.modulate(p)
+        bits = bits or self.m
+        points = []
+        row_base = self.to_ld(p)
+        for _ in range((bits + window - 1) // window):
+            points.append(LD_O)
+            points.append(row_base)
+            for _ in range(2, 1 << window):
+                points.append(self.ld_add(points[-1], row_base))
+            for _ in range(window):
+                row_base = self.ld_double(row_base)
+        points = self.normalize(points)
+        size = 1 << window
+        return FixedBaseTable(p, window, bits, [points[i:i + size] for i in range(0, len(points), size)])
+
+    def multiply_fixed(self, table: FixedBaseTable, k: int) -> BinaryPoint:
+        return self.multi_multiply_fixed([(table, k)])
+
+    def multi_multiply_fixed(self, terms: List[Tuple[FixedBaseTable, int]]) -> BinaryPoint:
+        """
+        Computes k1 * p1 + k2 * p2 + ... from fixed-base tables with one mixed addition per nonzero window,
+        falling back to multiply for scalars that are too large for their table.
+        """
+        q = LD_O
+        for table, k in terms:
+            if k <= 0 or k >> table.bits:
+                if k:
+                    q = self.ld_add(q, self.to_ld(self.multiply(table.base, k, check=False)))
+                continue
+            mask = (1 << table.window) - 1
+            for row in table.points:
+                if k & mask:
+                    q = self.ld_add_affine(q, row[k & mask])
+                k >>= table.window
+        return self.to_affine(q)
@@ -0,0 +1,84 @@
+from random import Random
+from Algorithm import ECDSA, sect233k1, sect233r1, sect283k1, sect283r1
+from BinaryCurve import BinaryCurve
+from Curve import O
+
+CURVES = (sect233k1, sect283r1)
+
+
+def affine_add(curve, p1, p2):
+    """The chord-and-tangent rule on y**2 + x*y = x**3 + a*x**2 + b, the reference for the López-Dahab formulas."""
+    if p1 == O:
+        return p2
+    if p2 == O:
+        return p1
+    (x1, y1), (x2, y2) = p1, p2
+    if x1 == x2:
+        if y1 != y2 or x1 == 0:
+            return O
+        lam = x1 + y1 / x1
+        x3 = lam * lam + lam + curve.A
+        return x3, x1 * x1 + (lam + 1) * x3
+    lam = (y1 + y2) / (x1 + x2)
+    x3 = lam * lam + lam + x1 + x2 + curve.A
+    return x3, lam * (x1 + x3) + x3 + y1
+
+
+def affine_multiply(curve, p, k):
+    if k < 0:
+        p, k = (p[0], p[0] + p[1]), -k
+    q = O
+    for bit in bin(k)[2:]:
+        q = affine_add(curve, q, q)
+        if bit == '1':
+            q = affine_add(curve, q, p)
+    return q
+
+
+def binary_curve(paramters):
+    curve = BinaryCurve(paramters['A'], paramters['B'], paramters['P'])
+    return curve, curve.modulate((paramters['Gx'], paramters['Gy']))
+
+
+def test_small_multiples():
+    """Additions, doublings and negation against the affine formulas."""
+    for paramters in CURVES:
+        curve, g = binary_curve(paramters)
+        q = O
+        for k in range(1, 12):
+            q = affine_add(curve, q, g)
+            assert curve.find(q)
+            assert curve.multiply(g, k) == q, k
+            assert curve.multiply(g, -k) == (q[0], q[0] + q[1]), k
+            assert curve.add(q, g) == affine_add(curve, q, g)
+            assert curve.add(q, q) == affine_add(curve, q, q)
+        assert curve.add(q, (q[0], q[0] + q[1])) == O
+
+
+def test_multiply():
+    """tau-adic NAF (Koblitz) and wNAF multiplication, multi_multiply and multiply_fixed against double-and-add."""
+    rng = Random(24)
+    for paramters in CURVES:
+        curve, g = binary_curve(paramters)
+        n = paramters['N']
+        table = curve.precompute(g, 4, n.bit_length())
+        h = curve.multiply(g, rng.randrange(1, n))
+        assert curve.multiply(g, n) == O
+        if curve.koblitz:
+            assert curve.order() == n * paramters['H']
+        for k in [n - 1, n + 1, -5] + [rng.randrange(n) for _ in range(4)]:
+            expected = affine_multiply(curve, g, k)
+            for window in (2, 4, 6):
+                assert curve.multiply(g, k, window=window) == expected, (k, window)
+            assert curve.multiply_fixed(table, k) == expected, k
+            k2 = rng.randrange(n)
+            assert curve.multi_multiply([(g, k), (h, k2)]) == affine_add(curve, expected, affine_multiply(curve, h, k2))
+
+
+def test_binary_ecdsa():
+    for paramters in (sect233k1, sect233r1, sect283k1, sect283r1):
+        alg = ECDSA(paramters, 'binary')
+        signature = alg.sign('message')
+        assert alg.verify('message', signature)
+        assert not alg.verify('other message', signature)
+        assert alg.kpub == affine_multiply(alg.curve, alg.G, alg.kpriv)
@@ -1,22 +1,116 @@
-from typing import Tuple, Union, Optional
-from Mod import Mod
+from array import array
+from math import gcd, isqrt
+from random import randrange
+from typing import Dict, Iterator, List, Tuple, Union, Optional
+from weakref import WeakSet
+from Mod import Mod, prime_field
 
 Coordinate = Union[float, Mod]
 IntableCoordinate = Union[float, int, Mod]
 Point = Union[Tuple[Coordinate, Coordinate], bool]
 ModularPoint = Union[Tuple[Mod, Mod], bool]
+JacobianPoint = Tuple[int, int, int]  # (X, Y, Z) standing for the affine point (X / Z**2, Y / Z**3).
 O: Point = False  # Point at infinity.
+JACOBIAN_O: JacobianPoint = (1, 1, 0)  # Point at infinity, any point with Z = 0 will do.
+# Fields at least this large are enumerated with NumPy when it is available. Including the import of NumPy,
+# a fresh process lists the points of P = 100003 in 0.22 s with it and 0.15 s without, breaks even around
+# P = 2**18, and is 20% faster from P = 2**19 on.
+NUMPY_MIN_P = 1 << 19
+NUMPY_MAX_P = 1 << 26  # Keeps the int32 table of square roots NumPy builds within 256 MiB.
+LEGENDRE_MAX_P = 1 << 20  # Fields up to this size have their points counted directly.
+VECTOR_MIN_POINTS = 4096  # multiply_many uses NumPy limb vectors from this many points, see ModArray.py.
+
+
+_numpy = False  # Not imported yet.
+
+
+def optional_numpy():
+    """
+    Returns the numpy module, or None when it is not installed. NumPy is optional, it only speeds up
+    iter_points on larger fields, and is imported on first use to keep it out of the start-up time.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def factorize(n: int) -> Dict[int, int]:
+    """
+    Trial division, returning {prime: exponent}. Meant for the group orders of small and mid-size curves.
+    """
+    rv = {}
+    q = 2
+    while q * q <= n:
+        while n % q == 0:
+            rv[q] = rv.get(q, 0) + 1
+            n //= q
+        q += 1 if q == 2 else 2
+    if n > 1:
+        rv[n] = rv.get(n, 0) + 1
+    return rv
+
+
+def wnaf(k: int, w: int) -> List[int]:
+    """
+    Width-w non-adjacent form of k >= 0, least significant digit first.
+    Every nonzero digit is odd, below 2**(w - 1) in absolute value, and followed by at least w - 1 zeros.
+    """
+    if w < 2:
+        raise ValueError(f"The wNAF window has to be at least 2, not {w}.")
+    digits = []
+    while k > 0:
+        if k & 1:
+            d = k & ((1 << w) - 1)
+            if d >= 1 << (w - 1):
+                d -= 1 << w
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+class FixedBaseTable:
+    def __init__(self, base: ModularPoint, window: int, bits: int, points: List[List[JacobianPoint]]):
+        """
+        Holds the multiples j * 2**(window * i) * base for 0 < j < 2**window in row i, in Jacobian
+        coordinates with Z = 1, so that any scalar below 2**bits is a sum of one entry per row.
+        """
+        self.base = base
+        self.window = window
+        self.bits = bits
+        self.points = points
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, i: int) -> List[JacobianPoint]:
+        return self.points[i]
 
 
 class Curve:
-    def __init__(self, a: IntableCoordinate, b: IntableCoordinate, p: Optional[int]):
+    instances = WeakSet()  # Every live curve, so that per-instance methods can be instrumented.
+
+    def __init__(self, a: IntableCoordinate, b: IntableCoordinate, p: Optional[int], window: int = 5):
         """
         Initializes the curve, y**2 = x**3 + a*x + b taking into
         account whether it is over a finite or an infinite field.
+        The window is the default wNAF width for multiplications on this curve.
         """
+        if window < 2:
+            raise ValueError(f"The wNAF window has to be at least 2, not {window}.")
+        Curve.instances.add(self)
         self.A = a
         self.B = b
         self.P = p
+        self.window = window
+        self.endomorphism = None  # (beta, lambda, n, basis) for GLV decomposition, see set_endomorphism.
         assert p is None or (isinstance(a, (int, Mod)) and isinstance(b, (int, Mod))),\
             "Finite field curves can only have integer values of a and b."
         if self.P:
@@ -24,6 +118,15 @@ class Curve:
             self.P = int(p)
             self.A = Mod(self.A, self.P)
             self.B = Mod(self.B, self.P)
+            self.field = prime_field(self.P)  # Plain int arithmetic for the hot loops below.
+            self.reduce = self.field.reduce  # Shift-and-add reduction for special-form primes, % otherwise.
+            # Doubling formulas have shortcuts for a = 0 (secp256k1) and a = -3 (NIST curves).
+            if self.A == 0:
+                self.jacobian_double = self._jacobian_double_a0
+            elif self.A == -3:
+                self.jacobian_double = self._jacobian_double_a3
+            else:
+                self.jacobian_double = self._jacobian_double_generic
         else:
             self.A = float(self.A)
             self.B = float(self.B)
@@ -54,22 +157,143 @@ class Curve:
         """
         WARNING: ONLY USE THIS FOR SMALL CURVES.
         Loops over all possible x coordinates in the field, and finds out y values if they exist.
-        Returns a set of all possible coordinates on the curve.
+        Returns a list of all possible coordinates on the curve, see iter_points.
+        """
+        return list(self.iter_points())
+
+    def square_roots(self) -> array:
+        """
+        Returns a table with the smaller square root of every quadratic residue mod P, and -1 elsewhere.
+        This takes P machine words of memory and a single pass of squarings.
+        """
+        roots = array('q', [-1]) * self.P
+        for y in range(self.P // 2, -1, -1):  # Smaller roots overwrite larger ones.
+            roots[y * y % self.P] = y
+        return roots
+
+    def iter_points(self, chunk: int = 1 << 16) -> Iterator[ModularPoint]:
+        """
+        Lazily yields every affine point of a finite field curve, ordered by x and then by y.
+        The y values are looked up in a table of square roots that is built once, instead of running a
+        Legendre symbol and Tonelli-Shanks for every x. Larger fields are processed chunk x values at a
+        time with NumPy when it is installed.
         """
         if self.P is None:
             raise ValueError('This function can only be used on a finite field curve.')
-        rv = []
-        for x in range(self.P):
-            try:
-                y1, y2 = self.find_y(x)
-                x = Mod(x, self.P)
-                rv.append((x, y1))
-                if y1 != 0:
-                    rv.append((x, y2))
-            except AssertionError:
-                continue
+        p, a, b = self.P, self.A.value, self.B.value
+        numpy = optional_numpy() if NUMPY_MIN_P <= p < NUMPY_MAX_P else None
+        if numpy is not None:
+            roots = numpy.full(p, -1, dtype=numpy.int32)
+            for stop in range(p // 2 + 1, 0, -chunk):  # Smaller roots overwrite larger ones.
+                ys = numpy.arange(max(stop - chunk, 0), stop, dtype=numpy.int64)
+                roots[(ys * ys % p)[::-1]] = ys[::-1]
+            for start in range(0, p, chunk):
+                xs = numpy.arange(start, min(start + chunk, p), dtype=numpy.int64)
+                rhs = ((xs * xs % p) * xs % p + a * xs % p + b) % p
+                found = roots[rhs]
+                for x, y in zip(xs[found >= 0].tolist(), found[found >= 0].tolist()):
+                    yield Mod.reduced(x, p), Mod.reduced(y, p)
+                    if y and 2 * y != p:
+                        yield Mod.reduced(x, p), Mod.reduced(p - y, p)
+            return
+        roots = self.square_roots()
+        for x in range(p):
+            y = roots[(x * x * x + a * x + b) % p]
+            if y >= 0:
+                yield Mod.reduced(x, p), Mod.reduced(y, p)
+                if y and 2 * y != p:  # Only y = 0 (and y = 1 when P = 2) is its own negative.
+                    yield Mod.reduced(x, p), Mod.reduced(p - y, p)
+
+    def count_points(self) -> int:
+        """
+        Counts #E(Fp), the point at infinity included, as P + 1 + the sum of the Legendre symbols of
+        x**3 + a*x + b over all x, reading the symbols off a table of squares. Takes O(P) time and memory.
+        """
+        p, a, b = self.P, self.A.value, self.B.value
+        if p == 2:  # Every element is its own single square root.
+            return sum(1 for _ in self.iter_points()) + 1
+        square = bytearray(p)
+        for y in range(1, p // 2 + 1):
+            square[y * y % p] = 1
+        rv = p + 1
+        for x in range(p):
+            rhs = (x * x * x + a * x + b) % p
+            if rhs:
+                rv += 1 if square[rhs] else -1
         return rv
 
+    def random_point(self) -> ModularPoint:
+        """
+        Returns a uniformly random affine point of a finite field curve.
+        """
+        while True:
+            x = randrange(self.P)
+            y = self.field.sqrt((x * x * x + self.A.value * x + self.B.value) % self.P)
+            if y is not None:
+                return Mod.reduced(x, self.P), Mod.reduced(y if randrange(2) else -y % self.P, self.P)
+
+    def point_order(self, p: Point, multiple: Optional[int] = None) -> int:
+        """
+        Returns the order of p, given any multiple of it (the group order by default).
+        Strips the prime factors of the multiple for as long as the result still sends p to O.
+        """
+        if p == O:
+            return 1
+        m = multiple or self.order()
+        for q, e in factorize(m).items():
+            for _ in range(e):
+                if self.multiply(p, m // q, check=False) != O:
+                    break
+                m //= q
+        return m
+
+    def multiples_in(self, p: Point, lo: int, hi: int) -> List[int]:
+        """
+        Baby-step giant-step: returns every m in [lo, hi] with m * p = O, in O(sqrt(hi - lo)) group operations.
+        """
+        w = isqrt(hi - lo) + 1
+        baby = {}  # j * p -> j, for 0 <= j < w.
+        q = O
+        for j in range(w):
+            baby.setdefault(q if q == O else (q[0].value, q[1].value), []).append(j)
+            q = self.add(q, p, check=False)
+        step = q  # w * p
+        rv = []
+        r = self.multiply(p, lo, check=False) if lo > 0 else O  # (lo + i * w) * p
+        for i in range(w + 1):
+            # (lo + i * w + j) * p = O when (lo + i * w) * p = -(j * p).
+            key = r if r == O else (r[0].value, -r[1].value % self.P)
+            for j in baby.get(key, []):
+                m = lo + i * w + j
+                if lo <= m <= hi:
+                    rv.append(m)
+            r = self.add(r, step, check=False)
+        return sorted(set(rv))
+
+    def order(self, attempts: int = 100) -> int:
+        """
+        Returns #E(Fp), the point at infinity included.
+        Fields up to LEGENDRE_MAX_P are counted directly. Larger ones use Mestre's approach: find the orders
+        of random points with baby-step giant-step inside the Hasse interval |#E - P - 1| <= 2 sqrt(P),
+        until their least common multiple has a single multiple in that interval.
+        """
+        if self.P is None:
+            raise ValueError('This function can only be used on a finite field curve.')
+        if self.P <= LEGENDRE_MAX_P:
+            return self.count_points()
+        lo = self.P + 1 - isqrt(4 * self.P)
+        hi = self.P + 1 + isqrt(4 * self.P)
+        lcm = 1
+        for _ in range(attempts):
+            p = self.random_point()
+            multiples = self.multiples_in(p, lo, hi)
+            order = self.point_order(p, multiples[0])
+            lcm = lcm * order // gcd(lcm, order)
+            candidates = range(-(-lo // lcm) * lcm, hi + 1, lcm)
+            if len(candidates) == 1:
+                return candidates[0]
+        raise ValueError('The group order could not be pinned down, the group may be far from cyclic.')
+
     def modulate(self, p: Point) -> ModularPoint:
         """
         Makes sure that the point p is modulo P and lies on the finite field curve E(Fp)(x, y)
@@ -82,13 +306,172 @@ class Curve:
             raise ValueError(f"The point ({p[0]}, {p[1]}) was not found on the finite field curve.")
         return rv
 
-    def add(self, p1: Point, p2: Point) -> Point:
+    def to_jacobian(self, p: Point) -> JacobianPoint:
+        """
+        Converts an affine point on the finite field curve to Jacobian coordinates with Z = 1.
+        """
+        if p == O:
+            return JACOBIAN_O
+        return int(p[0]) % self.P, int(p[1]) % self.P, 1
+
+    def to_affine(self, p: JacobianPoint) -> ModularPoint:
+        """
+        Converts a Jacobian point back to affine coordinates. This costs one modular inversion.
+        """
+        x, y, z = p
+        if z == 0:
+            return O
+        zinv = self.field.inverse(z)
+        zinv2 = zinv * zinv % self.P
+        return Mod.reduced(x * zinv2 % self.P, self.P), Mod.reduced(y * zinv2 * zinv % self.P, self.P)
+
+    def normalize(self, points: List[JacobianPoint]) -> List[JacobianPoint]:
+        """
+        Scales Jacobian points to Z = 1, leaving points at infinity alone.
+        All the points share a single modular inversion through Montgomery's trick.
+        """
+        m = self.P
+        zinvs = iter(self.field.inverse_many([q[2] for q in points if q[2]]))
+        rv = []
+        for x, y, z in points:
+            if z == 0:
+                rv.append(JACOBIAN_O)
+                continue
+            zinv = next(zinvs)
+            zinv2 = zinv * zinv % m
+            rv.append((x * zinv2 % m, y * zinv2 * zinv % m, 1))
+        return rv
+
+    def normalize_many(self, points: List[JacobianPoint]) -> List[ModularPoint]:
+        """
+        Converts many Jacobian points back to affine coordinates, paying for a single modular inversion.
+        """
+        return [O if z == 0 else (Mod.reduced(x, self.P), Mod.reduced(y, self.P)) for x, y, z in self.normalize(points)]
+
+    def _jacobian_double_generic(self, p: JacobianPoint) -> JacobianPoint:
+        """
+        Inversion-free doubling for any a (dbl-2007-bl in the Explicit-Formulas Database).
+        """
+        x, y, z = p
+        if z == 0 or y == 0:
+            return JACOBIAN_O
+        red = self.reduce
+        xx = red(x * x)
+        yy = red(y * y)
+        zz = red(z * z)
+        s = red(4 * x * yy)
+        t = red(3 * xx + self.A.value * zz * zz)
+        x3 = red(t * t - 2 * s)
+        y3 = red(t * (s - x3) - 8 * yy * yy)
+        z3 = red(2 * y * z)
+        return x3, y3, z3
+
+    def _jacobian_double_a0(self, p: JacobianPoint) -> JacobianPoint:
+        """
+        Inversion-free doubling for a = 0, where the a * Z**4 term vanishes (dbl-2009-l).
+        """
+        x, y, z = p
+        if z == 0 or y == 0:
+            return JACOBIAN_O
+        red = self.reduce
+        yy = red(y * y)
+        s = red(4 * x * yy)
+        t = red(3 * x * x)
+        x3 = red(t * t - 2 * s)
+        y3 = red(t * (s - x3) - 8 * yy * yy)
+        z3 = red(2 * y * z)
+        return x3, y3, z3
+
+    def _jacobian_double_a3(self, p: JacobianPoint) -> JacobianPoint:
+        """
+        Inversion-free doubling for a = -3, where 3 * X**2 - 3 * Z**4 = 3 * (X - Z**2) * (X + Z**2) (dbl-2001-b).
+        """
+        x, y, z = p
+        if z == 0 or y == 0:
+            return JACOBIAN_O
+        red = self.reduce
+        zz = red(z * z)
+        yy = red(y * y)
+        s = red(4 * x * yy)
+        t = red(3 * (x - zz) * (x + zz))
+        x3 = red(t * t - 2 * s)
+        y3 = red(t * (s - x3) - 8 * yy * yy)
+        z3 = red(2 * y * z)
+        return x3, y3, z3
+
+    def jacobian_negate(self, p: JacobianPoint) -> JacobianPoint:
+        """
+        Negates a Jacobian point, which only flips the sign of Y.
+        """
+        return p[0], -p[1] % self.P, p[2]
+
+    def jacobian_add(self, p1: JacobianPoint, p2: JacobianPoint) -> JacobianPoint:
+        """
+        Inversion-free addition of two Jacobian points (add-2007-bl without the squaring tricks).
+        """
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        if z1 == 0:
+            return p2
+        if z2 == 0:
+            return p1
+        red = self.reduce
+        z1z1 = red(z1 * z1)
+        z2z2 = red(z2 * z2)
+        u1 = red(x1 * z2z2)
+        u2 = red(x2 * z1z1)
+        s1 = red(y1 * z2 * z2z2)
+        s2 = red(y2 * z1 * z1z1)
+        h = red(u2 - u1)
+        r = red(s2 - s1)
+        if h == 0:
+            return self.jacobian_double(p1) if r == 0 else JACOBIAN_O
+        hh = red(h * h)
+        hhh = red(h * hh)
+        v = red(u1 * hh)
+        x3 = red(r * r - hhh - 2 * v)
+        y3 = red(r * (v - x3) - s1 * hhh)
+        z3 = red(z1 * z2 * h)
+        return x3, y3, z3
+
+    def jacobian_add_affine(self, p1: JacobianPoint, p2: JacobianPoint) -> JacobianPoint:
+        """
+        Mixed addition, where p2 is known to have Z = 1 (madd-2007-bl without the squaring tricks).
+        """
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        if z1 == 0:
+            return p2
+        if z2 == 0:
+            return p1
+        red = self.reduce
+        z1z1 = red(z1 * z1)
+        u2 = red(x2 * z1z1)
+        s2 = red(y2 * z1 * z1z1)
+        h = red(u2 - x1)
+        r = red(s2 - y1)
+        if h == 0:
+            return self.jacobian_double(p1) if r == 0 else JACOBIAN_O
+        hh = red(h * h)
+        hhh = red(h * hh)
+        v = red(x1 * hh)
+        x3 = red(r * r - hhh - 2 * v)
+        y3 = red(r * (v - x3) - y1 * hhh)
+        z3 = red(z1 * h)
+        return x3, y3, z3
+
+    def add(self, p1: Point, p2: Point, check: bool = True) -> Point:
         """
         Algorithm on P.285 for adding points on elliptic curves.
+        Finite field curves go through Jacobian coordinates, paying for a single inversion at the end.
+        Pass check=False for points that were already validated with modulate to skip the on-curve checks.
         """
         if self.P:
-            p1 = self.modulate(p1)
-            p2 = self.modulate(p2)
+            if check:
+                p1 = self.modulate(p1)
+                p2 = self.modulate(p2)
+            p3 = self.to_affine(self.jacobian_add_affine(self.to_jacobian(p1), self.to_jacobian(p2)))
+            return self.modulate(p3) if check else p3
         if p1 == O:
             return p2
         if p2 == O:
@@ -98,20 +481,120 @@ class Curve:
         if x1 == x2 and y1 == -y2:
             return O
         if x1 == x2 and y1 == y2:
-            l: Union[float, Mod] = (3 * x1 ** 2 + self.A) / (2 * y1)
+            l: float = (3 * x1 ** 2 + self.A) / (2 * y1)
         else:
-            l: Union[float, Mod] = (y2 - y1) / (x2 - x1)
+            l: float = (y2 - y1) / (x2 - x1)
         x3 = l ** 2 - x1 - x2
         y3 = l * (x1 - x3) - y1
-        p3 = (x3, y3)
-        return self.modulate(p3) if self.P else p3
+        return x3, y3
+
+    def multiply(self, p: Point, k: int, check: bool = True, window: Optional[int] = None) -> Point:
+        """
+        Width-w NAF multiplication, with w defaulting to the curve's window.
+        Needs about one addition per w + 1 bits of k instead of one per two bits, on top of a table of
+        2**(w - 2) odd multiples of p. Real curves use multiply_binary.
+        Pass check=False for a point that was already validated with modulate to skip the on-curve check.
+        A negative k multiplies -p by -k, on every path, multiply_binary included.
+        """
+        if self.P is None:
+            return self.multiply_binary(p, k)
+        return self.multi_multiply([(p, k)], window, check)
+
+    def multiply_many(self, points: List[Point], scalars: List[int], check: bool = True,
+                      vectorize: Optional[bool] = None) -> List[Point]:
+        """
+        Multiplies every point by its own scalar. With vectorize, all the points go through the same fixed-window
+        formulas at once as ModArray limb vectors, which needs NumPy. By default that happens for at least
+        VECTOR_MIN_POINTS points on curves without an endomorphism, where it beats one multiply per point.
+        """
+        assert len(points) == len(scalars), "One scalar per point is needed."
+        if check:
+            points = [self.modulate(p) for p in points]
+        if vectorize is None:
+            vectorize = self.P is not None and self.endomorphism is None and len(points) >= VECTOR_MIN_POINTS \
+                and self.P % 2 == 1 and optional_numpy() is not None
+        if not vectorize:
+            return [self.multiply(p, k, check=False) for p, k in zip(points, scalars)]
+        from ModArray import PointArray  # Imports NumPy.
+        lanes = PointArray.from_points([self.to_jacobian(p) for p in points], self.A.value, self.P)
+        return self.normalize_many(lanes.multiply(scalars).to_points())
+
+    def ladder(self, x: int, k: int, bits: Optional[int] = None) -> Tuple[int, int]:
+        """
+        x-only Montgomery ladder with the Brier-Joye formulas: returns (X, Z) with X / Z the x coordinate of k * P,
+        given only x = x(P), and Z = 0 if k * P = O. y is never computed.
+        Every one of the bits steps (k's length by default) is one differential addition, one doubling and a
+        swap done with masks instead of branches, so the sequence of operations does not depend on k.
+        Python ints are not constant time, the fixed sequence only removes the branches on the bits of k.
+        """
+        if self.P is None:
+            raise ValueError('This function can only be used on a finite field curve.')
+        red, a, b = self.reduce, self.A.value, self.B.value
+        a = a - self.P if 2 * a > self.P else a  # -3 rather than P - 3, a cheap multiplication.
+        b4 = 4 * b % self.P
+        x = x % self.P
+        x0, z0, x1, z1 = 1, 0, x, 1  # R0 = O and R1 = P, with R1 - R0 = P all along.
+        swap = 0
+        for i in range((bits or k.bit_length()) - 1, -1, -1):
+            bit = (k >> i) & 1
+            mask = -(swap ^ bit)
+            t = mask & (x0 ^ x1); x0 ^= t; x1 ^= t
+            t = mask & (z0 ^ z1); z0 ^= t; z1 ^= t
+            swap = bit
+            # R1 = R0 + R1: x3 = (2 (x0 + x1)(x0 x1 + a) + 4 b) / (x0 - x1)**2 - x(P).
+            u, v = red(x0 * z1), red(x1 * z0)
+            zz = red(z0 * z1)
+            d = red((u - v) * (u - v))
+            x1, z1 = red(2 * (u + v) * red(red(x0 * x1) + a * zz) + b4 * red(zz * zz) - x * d), d
+            # R0 = 2 R0: x2 = ((x**2 - a)**2 - 8 b x) / (4 (x**3 + a x + b)).
+            xx, zz = red(x0 * x0), red(z0 * z0)
+            t = red(xx - a * zz)
+            xz = red(x0 * z0)
+            x0, z0 = red(t * t - 2 * b4 * red(xz * zz)), red(4 * z0 * red(x0 * red(xx + a * zz) + b * red(z0 * zz)))
+        mask = -swap
+        t = mask & (x0 ^ x1); x0 ^= t
+        t = mask & (z0 ^ z1); z0 ^= t
+        return x0, z0
+
+    def ladder_many(self, xs: List[int], k: int, bits: Optional[int] = None,
+                    vectorize: Optional[bool] = None) -> List[Optional[int]]:
+        """
+        Returns the x coordinate of k * P for every x = x(P) in xs, None where k * P = O, sharing a single inversion.
+        As every ladder follows the bits of the same k, the vectorized path (see multiply_many) runs them as
+        ModArray lanes in lockstep.
+        """
+        if vectorize is None:
+            vectorize = len(xs) >= VECTOR_MIN_POINTS and self.P % 2 == 1 and optional_numpy() is not None
+        if vectorize:
+            from ModArray import ModArray, ladder  # Imports NumPy.
+            bits = bits or k.bit_length()
+            x, z = ladder(ModArray.from_ints(xs, self.P), k, bits, self.A.value, self.B.value)
+            points = list(zip(x.to_ints(), z.to_ints()))
+        else:
+            points = [self.ladder(x, k, bits) for x in xs]
+        zinvs = iter(self.field.inverse_many([z for _, z in points if z]))
+        return [self.reduce(x * next(zinvs)) if z else None for x, z in points]
 
-    def multiply(self, p: Point, k: int) -> Point:
+    def multiply_binary(self, p: Point, k: int, check: bool = True) -> Point:
         """
-        Double-and-add algorithm as described on wikipedia.
+        Double-and-add algorithm as described on wikipedia, kept as the reference implementation.
+        Finite field curves run the loop left-to-right in Jacobian coordinates, with mixed additions of p,
+        and convert back to affine coordinates only once at the end.
         """
+        if k < 0:
+            p, k = O if p == O else (p[0], -p[1]), -k
         if self.P:
-            p = self.modulate(p)
+            if check:
+                p = self.modulate(p)
+            if p == O or k == 0:
+                return O
+            pj = self.to_jacobian(p)
+            q = pj
+            for bit in bin(k)[3:]:
+                q = self.jacobian_double(q)
+                if bit == '1':
+                    q = self.jacobian_add_affine(q, pj)
+            return self.to_affine(q)
         n = p
         q = O
         while k > 0:
@@ -120,3 +603,137 @@ class Curve:
             n = self.add(n, n)
             k >>= 1
         return q
+
+    def precompute(self, p: Point, window: int = 4, bits: Optional[int] = None) -> FixedBaseTable:
+        """
+        Builds the table for fixed-base multiplication of p by scalars below 2**bits (P's size by default).
+        A larger window means fewer additions per multiplication and a table that is exponentially larger.
+        """
+        if self.P is None:
+            raise ValueError('This function can only be used on a finite field curve.')
+        p = self.modulate(p)
+        bits = bits or self.P.bit_length()
+        points = []
+        row_base = self.to_jacobian(p)
+        for _ in range((bits + window - 1) // window):
+            points.append(JACOBIAN_O)
+            points.append(row_base)
+            for _ in range(2, 1 << window):
+                points.append(self.jacobian_add(points[-1], row_base))
+            for _ in range(window):
+                row_base = self.jacobian_double(row_base)
+        points = self.normalize(points)
+        size = 1 << window
+        rows = [points[i:i + size] for i in range(0, len(points), size)]
+        return FixedBaseTable(p, window, bits, rows)
+
+    def multiply_fixed(self, table: FixedBaseTable, k: int) -> Point:
+        """
+        Fixed-base windowed multiplication: one mixed addition per window of k and no doublings.
+        Falls back to multiply for negative scalars and for scalars that are too large for the table.
+        """
+        return self.multi_multiply_fixed([(table, k)])
+
+    def multi_multiply_fixed(self, terms: List[Tuple[FixedBaseTable, int]]) -> Point:
+        """
+        Computes k1 * p1 + k2 * p2 + ... for points with fixed-base tables, summing every table entry into a
+        single Jacobian point, so that the whole sum pays for one conversion back to affine coordinates.
+        """
+        q = JACOBIAN_O
+        for table, k in terms:
+            if k <= 0 or k >> table.bits:
+                if k:
+                    q = self.jacobian_add(q, self.to_jacobian(self.multiply(table.base, k, check=False)))
+                continue
+            mask = (1 << table.window) - 1
+            for row in table.points:
+                if k & mask:
+                    q = self.jacobian_add_affine(q, row[k & mask])
+                k >>= table.window
+        return self.to_affine(q)
+
+    def odd_multiples(self, p: JacobianPoint, window: int) -> List[JacobianPoint]:
+        """
+        Returns [p, 3p, 5p, ..., (2**(window - 1) - 1)p], the points that window-w NAF digits refer to.
+        They are normalized to Z = 1 so that they can be used in mixed additions.
+        """
+        rv = [p]
+        double = self.jacobian_double(p)
+        for _ in range((1 << (window - 2)) - 1):
+            rv.append(self.jacobian_add(rv[-1], double))
+        return self.normalize(rv)
+
+    def multi_multiply(self, terms: List[Tuple[Point, int]], window: Optional[int] = None,
+                       check: bool = True) -> Point:
+        """
+        Computes k1 * p1 + k2 * p2 + ... with Straus' interleaving: the wNAF digits of all the scalars are
+        processed together, so the whole sum pays for a single chain of doublings.
+        """
+        if self.P is None:
+            raise ValueError('This function can only be used on a finite field curve.')
+        window = window or self.window
+        if window < 2:
+            raise ValueError(f"The wNAF window has to be at least 2, not {window}.")
+        tables = []
+        digits = []
+
+        def add_term(table: List[JacobianPoint], k: int):
+            if k < 0:
+                table, k = [self.jacobian_negate(q) for q in table], -k
+            if k:
+                tables.append(table)
+                digits.append(wnaf(k, window))
+
+        for p, k in terms:
+            if check:
+                p = self.modulate(p)
+            if p == O or k == 0:
+                continue
+            table = self.odd_multiples(self.to_jacobian(p), window)
+            if self.endomorphism:
+                # k * p = k1 * p + k2 * phi(p), and phi maps the odd multiples of p to those of phi(p).
+                k1, k2 = self.glv_split(k)
+                add_term(table, k1)
+                add_term([self.glv_map(q) for q in table], k2)
+            else:
+                add_term(table, k)
+        # Pad the digit lists to the same length and walk them together from the most significant end.
+        length = max(map(len, digits), default=0)
+        q = JACOBIAN_O
+        for column in zip(*[reversed(naf + [0] * (length - len(naf))) for naf in digits]):
+            q = self.jacobian_double(q)
+            for table, d in zip(tables, column):
+                if d > 0:
+                    q = self.jacobian_add_affine(q, table[d >> 1])
+                elif d < 0:
+                    q = self.jacobian_add_affine(q, self.jacobian_negate(table[-d >> 1]))
+        return self.to_affine(q)
+
+    def set_endomorphism(self, beta: int, lam: int, n: int, basis: Tuple[Tuple[int, int], Tuple[int, int]]):
+        """
+        Enables GLV decomposition on a curve with an endomorphism phi(x, y) = (beta * x, y) that acts as
+        multiplication by lam on points of prime order n, like a = 0 curves with P = 1 mod 3.
+        basis holds two short vectors (a1, b1), (a2, b2) with a + b * lam = 0 mod n.
+        Only use this on curves where all the points that get multiplied have order n (cofactor 1).
+        """
+        (a1, b1), (a2, b2) = basis
+        assert (a1 + b1 * lam) % n == 0 and (a2 + b2 * lam) % n == 0, "The basis does not match lambda."
+        assert pow(beta, 3, self.P) == 1 and pow(lam, 3, n) == 1, "Beta and lambda have to be cube roots of 1."
+        self.endomorphism = (beta % self.P, lam % n, n, basis)
+
+    def glv_map(self, p: JacobianPoint) -> JacobianPoint:
+        """
+        Applies the endomorphism (x, y) -> (beta * x, y), which costs a single field multiplication.
+        """
+        return self.reduce(p[0] * self.endomorphism[0]), p[1], p[2]
+
+    def glv_split(self, k: int) -> Tuple[int, int]:
+        """
+        Splits k into k1 + k2 * lam = k (mod n) with k1 and k2 around half the size of n, by rounding k
+        to the nearest point of the lattice spanned by the basis.
+        """
+        _, _, n, ((a1, b1), (a2, b2)) = self.endomorphism
+        k %= n
+        c1 = (b2 * k + (n >> 1)) // n
+        c2 = (-b1 * k + (n >> 1)) // n
+        return k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
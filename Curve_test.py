@@ -1,3 +1,6 @@
+from random import Random
+from Algorithm import nist256p, secp256k1
+from DiscreteLog import bsgs, rho
 from input import *
 
 
@@ -23,6 +26,14 @@ def main_p_do_operation(operation, curve: Curve, inputs: List[str]) -> bool:
     if operation.lower() == 'pts':  # Lists all points
         print(f"The possible points in this curve for this field are:\n{curve.list_points()}")
         ret = True
+    if operation.lower() == 'dlg':  # Finds k with k * P = Q, with Pollard rho and baby-step giant-step.
+        p = read_point(inputs, curve)
+        q = read_point(inputs, curve)
+        n = curve.point_order(p)
+        for name, report in (('rho', rho(curve, p, q, n)), ('bsgs', bsgs(curve, p, q, n))):
+            print(f"{name}: k = {report['k']} after {report['iterations']} iterations "
+                  f"({report['expected_iterations']} expected) in {report['seconds']} s.")
+        ret = True
     return ret
 
 
@@ -45,7 +56,7 @@ def main_i_curve_parameters() -> Curve:
 
 def main_p_main_loop(curve: Curve) -> bool:
     try:
-        print("Insert an operation (add, mul, pts, fiy, exit): ")
+        print("Insert an operation (add, mul, pts, fiy, dlg, exit): ")
         operation = parse_input()
         opcode = operation.pop(0)
         if opcode == 'exit':
@@ -67,5 +78,65 @@ def main() -> int:
     return 0
 
 
+def test_multiply_matches_multiply_binary():
+    """wNAF multiply against the double-and-add reference, windows, GLV and negative scalars included."""
+    rng = Random(5)
+    for paramters in (secp256k1, nist256p):
+        curve = Curve(paramters['A'], paramters['B'], paramters['P'])
+        if 'Beta' in paramters:
+            curve.set_endomorphism(paramters['Beta'], paramters['Lambda'], paramters['N'], paramters['Basis'])
+        g = curve.modulate((paramters['Gx'], paramters['Gy']))
+        scalars = [0, 1, 2, 3, paramters['N'] - 1, paramters['N'], paramters['N'] + 1]
+        scalars += [rng.randrange(paramters['N']) for _ in range(8)]
+        for k in scalars + [-k for k in scalars]:
+            expected = curve.multiply_binary(g, k, check=False)
+            for window in (2, 3, 4, 5, 6):
+                assert curve.multiply(g, k, check=False, window=window) == expected, (k, window)
+
+
+def test_multiply_small_curve():
+    curve = Curve(2, 3, 97)
+    for p in curve.list_points()[:10]:
+        for k in range(-20, 21):
+            assert curve.multiply(p, k) == curve.multiply_binary(p, k), (p, k)
+
+
+def test_multiply_window_below_2():
+    curve = Curve(2, 3, 97)
+    p = curve.list_points()[0]
+    for window in (1, -1):
+        try:
+            curve.multiply(p, 5, window=window)
+        except ValueError as e:
+            assert 'window' in str(e)
+        else:
+            raise AssertionError(f"window={window} was accepted.")
+
+
+def test_multiply_fixed_negative():
+    rng = Random(3)
+    curve = Curve(nist256p['A'], nist256p['B'], nist256p['P'])
+    g = curve.modulate((nist256p['Gx'], nist256p['Gy']))
+    table = curve.precompute(g, 4, nist256p['N'].bit_length())
+    for k in [1, 2, nist256p['N'] - 1, nist256p['N'] + 1, 1 << 300] + [rng.randrange(nist256p['N']) for _ in range(5)]:
+        assert curve.multiply_fixed(table, -k) == curve.multiply(g, -k, check=False), k
+        assert curve.multiply_fixed(table, k) == curve.multiply(g, k, check=False), k
+    assert curve.multi_multiply_fixed([(table, 5), (table, -5)]) is False
+
+
+def test_iter_points_numpy_matches_table():
+    import Curve as curve_module
+    if curve_module.optional_numpy() is None:
+        return
+    curve = Curve(3, 7, 65537)
+    minimum = curve_module.NUMPY_MIN_P
+    try:
+        curve_module.NUMPY_MIN_P = 2
+        with_numpy = list(curve.iter_points(chunk=1000))
+    finally:
+        curve_module.NUMPY_MIN_P = minimum
+    assert with_numpy == list(curve.iter_points())
+    assert len(with_numpy) + 1 == curve.count_points()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,360 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from math import gcd, isqrt, log2, pi, sqrt
+from os import cpu_count, getpid
+from random import Random
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from Curve import O, Curve, ModularPoint, Point
+
+AffinePoint = Optional[Tuple[int, int]]  # (x, y) as ints, None being the point at infinity.
+Distinguished = Tuple[int, int, int, int]  # (x, y, c, d) with (x, y) = c * P + d * Q.
+WALK_STEPS = 32  # r, the number of precomputed steps of the r-adding walk.
+WALK_LANES = 64  # Walks each process advances in lockstep, sharing one inversion per step.
+WALK_LIMIT = 20  # Walks longer than this many times the expected distance between distinguished points restart.
+CYCLE_CHECK = 64  # Walks look for fruitless cycles of up to this many steps.
+TASK_STEPS = 256  # Most steps per lane in each task handed to a worker process.
+RHO_LIMIT = 32  # rho gives up after this many times the expected iterations, as when q is not a multiple of p.
+
+
+def affine_add(p1: AffinePoint, p2: AffinePoint, a: int, m: int) -> AffinePoint:
+    """
+    The chord-and-tangent rule on y**2 = x**3 + a*x + b with plain ints, one inversion.
+    """
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    (x1, y1), (x2, y2) = p1, p2
+    if x1 == x2:
+        if (y1 + y2) % m == 0:
+            return None
+        lam = (3 * x1 * x1 + a) * pow(2 * y1, -1, m) % m
+    else:
+        lam = (y2 - y1) * pow(x2 - x1, -1, m) % m
+    x3 = (lam * lam - x1 - x2) % m
+    return x3, (lam * (x1 - x3) - y1) % m
+
+
+def _as_ints(p: ModularPoint) -> AffinePoint:
+    return None if p == O else (p[0].value, p[1].value)
+
+
+def _validate(curve: Curve, p: Point, q: Point, n: Optional[int]) -> Tuple[ModularPoint, ModularPoint, int]:
+    p, q = curve.modulate(p), curve.modulate(q)
+    if p == O:
+        raise ValueError("P is the point at infinity.")
+    n = n or curve.point_order(p)
+    if curve.multiply(q, n, check=False) != O:
+        raise ValueError("Q is not a multiple of P.")
+    return p, q, n
+
+
+def bsgs(curve: Curve, p: Point, q: Point, n: Optional[int] = None) -> Dict:
+    """
+    Baby-step giant-step, the baseline for the discrete logarithm: finds k with k * p = q, 0 <= k < n, where n is
+    the order of p (computed when not given), storing ceil(sqrt(n)) baby steps j * p and taking giant steps of -w * p.
+    Returns {'k': k, or None when q is not in the group of p, 'n', 'iterations' (group operations),
+    'expected_iterations' (1.5 * sqrt(n) on average), 'seconds'}.
+    """
+    start = perf_counter()
+    p, q, n = _validate(curve, p, q, n)
+    a, m = curve.A.value, curve.P
+    w = isqrt(n - 1) + 1
+    baby = {}
+    r = None
+    for j in range(w):
+        baby.setdefault(r, j)
+        r = affine_add(r, _as_ints(p), a, m)
+    giant = _as_ints(curve.multiply(p, -w, check=False))
+    iterations = w
+    k = None
+    r = _as_ints(q)
+    for i in range(w):
+        if r in baby:
+            k = (i * w + baby[r]) % n
+            break
+        r = affine_add(r, giant, a, m)
+        iterations += 1
+    return {
+        'k': k,
+        'n': n,
+        'iterations': iterations,
+        'expected_iterations': round(1.5 * sqrt(n)),
+        'seconds': round(perf_counter() - start, 6),
+    }
+
+
+class RAddingWalk:
+    def __init__(self, curve: Curve, p: ModularPoint, q: ModularPoint, n: int, steps: List[Tuple[int, int]],
+                 distinguished_bits: int, negation: bool, lanes: int = WALK_LANES, seed: Optional[int] = None):
+        """
+        Pollard rho walks on the group of p: from a random c * p + d * q, each step adds R_j = a_j * p + b_j * q
+        for (a_j, b_j) in steps and j = x mod r, tracking the coefficients (c, d). A point whose x // r has
+        distinguished_bits low zero bits is distinguished: it is reported and the walk starts over from it plus a
+        random point S, one addition rather than a scalar multiplication. Starting over from a distinguished point
+        it already reported would only repeat the same path, which happens in small groups, so the walk then
+        starts from a new random point instead.
+        Two walks that ever meet continue together and report the same distinguished point, which gives away
+        log(q) unless their coefficients agree.
+
+        With negation, points are replaced by whichever of +-X has the smaller y, so the walk runs on classes
+        {X, -X} and needs sqrt(2) times fewer steps. The price is fruitless cycles: X -> -(X + R_j) -> X when the
+        index of -(X + R_j) is j again, which the walk avoids by looking ahead to index j + 1 (Bernstein, Lange and
+        Schwabe, "On the correct use of the negation map"), and longer ones, which it detects and leaves
+        deterministically by doubling the smallest point of the cycle.
+
+        lanes walks advance together so that every step pays for a single inversion for all of them.
+        """
+        self.curve = curve
+        self.a, self.m, self.n = curve.A.value, curve.P, n
+        self.p, self.q = p, q
+        self.r = len(steps)
+        self.steps = []  # (x, y, a_j, b_j)
+        for a_j, b_j in steps:
+            x, y = _as_ints(curve.multi_multiply([(p, a_j), (q, b_j)], check=False))
+            self.steps.append((x, y, a_j, b_j))
+        self.mask = (1 << distinguished_bits) - 1
+        self.limit = WALK_LIMIT << distinguished_bits
+        self.negation = negation
+        self.rng = Random(seed)
+        self.restart_step = self.start()[:4]  # S
+        self.reported = set()  # The distinguished points already restarted from.
+        self.lanes = [self.start() for _ in range(lanes)]  # [x, y, c, d, length, x of the cycle check mark]
+        self.iterations = 0
+        self.restarts = 0
+        self.cycles = 0
+
+    def start(self) -> List:
+        while True:
+            c, d = self.rng.randrange(self.n), self.rng.randrange(self.n)
+            point = _as_ints(self.curve.multi_multiply([(self.p, c), (self.q, d)], check=False))
+            if point is not None:
+                return [*self.canonical(point, c, d), 0, -1]
+
+    def restart(self, point: Tuple[int, int, int, int]) -> List:
+        if point[:2] in self.reported:
+            return self.start()
+        self.reported.add(point[:2])
+        x, y, c, d = self.restart_step
+        rv = affine_add(point[:2], (x, y), self.a, self.m)
+        return self.start() if rv is None else [*self.canonical(rv, point[2] + c, point[3] + d), 0, -1]
+
+    def canonical(self, point: Tuple[int, int], c: int, d: int) -> Tuple[int, int, int, int]:
+        x, y = point
+        if self.negation and 2 * y > self.m:
+            return x, self.m - y, -c % self.n, -d % self.n
+        return x, y, c % self.n, d % self.n
+
+    def successor(self, x: int, y: int, c: int, d: int, first: int = 0) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The next point of the walk from (x, y), one step at a time, trying the indices from j + first on.
+        """
+        j = x % self.r
+        rv = None
+        for t in range(first, self.r):
+            k = (j + t) % self.r
+            rx, ry, a_j, b_j = self.steps[k]
+            point = affine_add((x, y), (rx, ry), self.a, self.m)
+            if point is None:
+                return None
+            rv = self.canonical(point, c + a_j, d + b_j)
+            if not self.negation or rv[0] % self.r != k:
+                break
+        return rv
+
+    def escape(self, entry: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Leaves the fruitless cycle through entry by its smallest point, doubled, so that every walk stuck in the
+        same cycle leaves it the same way.
+        """
+        point = smallest = entry
+        while True:
+            point = self.successor(*point)
+            if point is None:
+                return None
+            if point[0] == entry[0]:
+                break
+            smallest = min(smallest, point)
+        x, y, c, d = smallest
+        doubled = affine_add((x, y), (x, y), self.a, self.m)
+        return None if doubled is None else self.canonical(doubled, 2 * c, 2 * d)
+
+    def advance(self, count: int) -> List[Distinguished]:
+        """
+        Advances every lane by count steps, returning the distinguished points met on the way.
+        """
+        m, n, r, steps, lanes, negation = self.m, self.n, self.r, self.steps, self.lanes, self.negation
+        rv = []
+        for _ in range(count):
+            denominators = []
+            for lane in lanes:
+                rx = steps[lane[0] % r][0]
+                denominators.append((rx - lane[0]) % m or 1)  # Equal x coordinates take the single-step path.
+            inverses = self.curve.field.inverse_many(denominators)
+            for i, lane in enumerate(lanes):
+                x, y, c, d = lane[:4]
+                j = x % r
+                rx, ry, a_j, b_j = steps[j]
+                if rx == x:
+                    nxt = self.successor(x, y, c, d)
+                else:
+                    lam = (ry - y) * inverses[i] % m
+                    x3 = (lam * lam - x - rx) % m
+                    y3 = (lam * (x - x3) - y) % m
+                    if not negation:
+                        nxt = x3, y3, c + a_j, d + b_j  # Coefficients are only reduced modulo n when reported.
+                    elif x3 % r == j:
+                        nxt = self.successor(x, y, c, d, 1)
+                    elif 2 * y3 > m:
+                        nxt = x3, m - y3, -c - a_j, -d - b_j
+                    else:
+                        nxt = x3, y3, c + a_j, d + b_j
+                lane[4] += 1
+                if negation and nxt is not None:
+                    if nxt[0] == lane[5]:  # Canonical points with the same x are the same point.
+                        self.cycles += 1
+                        nxt = self.escape(nxt)
+                    elif lane[4] % CYCLE_CHECK == 0:
+                        lane[5] = nxt[0]
+                if nxt is None or lane[4] > self.limit:
+                    self.restarts += 1
+                    lanes[i] = self.start()
+                    continue
+                lane[:4] = nxt
+                if (nxt[0] // r) & self.mask == 0:
+                    nxt = nxt[0], nxt[1], nxt[2] % n, nxt[3] % n
+                    rv.append(nxt)
+                    lanes[i] = self.restart(nxt)
+            self.iterations += len(lanes)
+        return rv
+
+
+def solve_collision(curve: Curve, p: ModularPoint, q: ModularPoint, n: int,
+                    first: Tuple[int, int], second: Tuple[int, int]) -> Optional[int]:
+    """
+    c1 * p + d1 * q = c2 * p + d2 * q gives k * (d2 - d1) = c1 - c2 mod n. When n is not prime, the g = gcd(d2 - d1, n)
+    candidates are tried.
+    """
+    (c1, d1), (c2, d2) = first, second
+    dd, dc = (d2 - d1) % n, (c1 - c2) % n
+    g = gcd(dd, n)
+    if g == n or dc % g:
+        return None
+    base = dc // g * pow(dd // g, -1, n // g) % (n // g)
+    for k in range(base, n, n // g):
+        if curve.multiply(p, k, check=False) == q:
+            return k
+    return None
+
+
+def default_distinguished_bits(n: int, walks: int, negation: bool) -> int:
+    """
+    Each of the walks runs about 1 / theta steps past the collision to reach a distinguished point, so theta is
+    chosen to keep that overhead around an eighth of the expected number of steps.
+    """
+    expected = sqrt(pi * n / (4 if negation else 2))
+    return max(0, int(log2(max(1.0, expected / (8 * walks)))))
+
+
+# The walk of each rho worker process, kept between tasks so that no walk is cut short.
+_worker_walk: Optional[RAddingWalk] = None
+
+
+def _init_rho_worker(a: int, b: int, m: int, p: Tuple[int, int], q: Tuple[int, int], n: int,
+                     steps: List[Tuple[int, int]], distinguished_bits: int, negation: bool, lanes: int, seed: int):
+    global _worker_walk
+    curve = Curve(a, b, m)
+    _worker_walk = RAddingWalk(curve, curve.modulate(p), curve.modulate(q), n, steps, distinguished_bits,
+                               negation, lanes, seed ^ getpid())
+
+
+def _rho_task(count: int) -> Tuple[List[Distinguished], int, int, int]:
+    walk = _worker_walk
+    before = walk.iterations, walk.restarts, walk.cycles
+    rv = walk.advance(count)
+    return rv, walk.iterations - before[0], walk.restarts - before[1], walk.cycles - before[2]
+
+
+def rho(curve: Curve, p: Point, q: Point, n: Optional[int] = None, workers: Optional[int] = None,
+        negation: bool = True, distinguished_bits: Optional[int] = None, lanes: Optional[int] = None,
+        seed: Optional[int] = None) -> Dict:
+    """
+    Parallel Pollard rho with distinguished points (van Oorschot and Wiener): finds k with k * p = q, where n is the
+    order of p (computed when not given). Every worker process (one per core by default) runs lanes r-adding walks
+    (up to WALK_LANES, fewer for small groups) and hands back the distinguished points it meets. This process keeps
+    them all in one table, and the first point reached from two different (c, d) solves the logarithm. workers=1
+    walks in this process instead.
+    Returns {'k', or None when q is not in the group of p, 'n', 'iterations', 'expected_iterations'
+    (sqrt(pi * n / 4) with the negation map, sqrt(pi * n / 2) without), 'ratio' (observed / expected),
+    'distinguished_bits', 'distinguished_points', 'restarts', 'fruitless_cycles', 'workers', 'seconds',
+    'iterations_per_sec'}. A q of order dividing n can still lie outside the group of p when the curve has more
+    than one subgroup of that order, and no collision then ever solves the logarithm: the walks give up after
+    RHO_LIMIT times the expected iterations, which the walks for a q in the group of p practically never reach.
+    """
+    start = perf_counter()
+    p, q, n = _validate(curve, p, q, n)
+    rng = Random(seed)
+    workers = workers or cpu_count() or 1
+    expected = sqrt(pi * n / (4 if negation else 2))
+    lanes = lanes or max(1, min(WALK_LANES, int(expected / (32 * workers))))
+    if distinguished_bits is None:
+        distinguished_bits = default_distinguished_bits(n, workers * lanes, negation)
+    # Tasks are kept short enough for collisions to be noticed within an eighth of the expected steps.
+    count = max(1, min(TASK_STEPS, int(expected / (8 * workers * lanes))))
+    limit = RHO_LIMIT * expected
+    table: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    totals = {'iterations': 0, 'restarts': 0, 'fruitless_cycles': 0}
+    k = 0 if q == O else None
+    steps = []
+    while k is None and len(steps) < WALK_STEPS:
+        a_j, b_j = rng.randrange(n), rng.randrange(n)
+        if curve.multi_multiply([(p, a_j), (q, b_j)], check=False) != O:
+            steps.append((a_j, b_j))
+        elif b_j:  # a_j * p + b_j * q = O already gives the logarithm away.
+            k = solve_collision(curve, p, q, n, (a_j, b_j), (0, 0))
+
+    def collect(points: List[Distinguished]) -> Optional[int]:
+        for x, y, c, d in points:
+            if (x, y) in table and table[x, y] != (c, d):
+                rv = solve_collision(curve, p, q, n, table[x, y], (c, d))
+                if rv is not None:
+                    return rv
+            table[x, y] = c, d
+        return None
+
+    if k is None and workers == 1:
+        walk = RAddingWalk(curve, p, q, n, steps, distinguished_bits, negation, lanes, rng.getrandbits(64))
+        while k is None and walk.iterations < limit:
+            k = collect(walk.advance(count))
+        totals = {'iterations': walk.iterations, 'restarts': walk.restarts, 'fruitless_cycles': walk.cycles}
+    elif k is None:
+        initargs = (curve.A.value, curve.B.value, curve.P, _as_ints(p), _as_ints(q), n, steps, distinguished_bits,
+                    negation, lanes, rng.getrandbits(64))
+        executor = ProcessPoolExecutor(workers, initializer=_init_rho_worker, initargs=initargs)
+        try:
+            pending = deque(executor.submit(_rho_task, count) for _ in range(2 * workers))
+            while k is None and totals['iterations'] < limit:
+                points, iterations, restarts, cycles = pending.popleft().result()
+                totals['iterations'] += iterations
+                totals['restarts'] += restarts
+                totals['fruitless_cycles'] += cycles
+                k = collect(points)
+                pending.append(executor.submit(_rho_task, count))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    seconds = perf_counter() - start
+    return {
+        'k': k,
+        'n': n,
+        'iterations': totals['iterations'],
+        'expected_iterations': round(expected),
+        'ratio': round(totals['iterations'] / expected, 3),
+        'distinguished_bits': distinguished_bits,
+        'distinguished_points': len(table),
+        'restarts': totals['restarts'],
+        'fruitless_cycles': totals['fruitless_cycles'],
+        'workers': workers,
+        'seconds': round(seconds, 6),
+        'iterations_per_sec': round(totals['iterations'] / seconds) if seconds else 0,
+    }
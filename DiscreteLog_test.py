@@ -0,0 +1,26 @@
+from random import Random
+from Curve import Curve
+from DiscreteLog import bsgs, rho
+
+
+def test_not_in_group():
+    """y**2 = x**3 - x over F_11 has three points of order 2: 2 * (1, 0) = O, but (1, 0) is not in <(0, 0)>."""
+    curve = Curve(-1, 0, 11)
+    assert bsgs(curve, (0, 0), (1, 0))['k'] is None
+    for negation in (True, False):
+        assert rho(curve, (0, 0), (1, 0), workers=1, negation=negation, seed=25)['k'] is None
+
+
+def test_small_groups():
+    """Small and composite orders, where the walks used to keep coming back to the same distinguished points."""
+    rng = Random(25)
+    for a, b, prime in ((2, 3, 17), (2, 3, 23), (3, 7, 47), (-1, 0, 53), (1, 1, 97), (3, 7, 1009)):
+        curve = Curve(a, b, prime)
+        for p in rng.sample(curve.list_points(), 3):
+            n = curve.point_order(p)
+            for k in rng.sample(range(n), min(n, 5)):
+                q = curve.multiply(p, k)
+                for negation in (True, False):
+                    found = rho(curve, p, q, n, workers=1, negation=negation, seed=rng.getrandbits(32))['k']
+                    assert curve.multiply(p, found) == q, (a, b, prime, p, k, negation)
+                assert bsgs(curve, p, q, n)['k'] == k
@@ -0,0 +1,39 @@
+from Algorithm import ECDSA, nist256p, secp256k1
+from Curve import O
+from ECDH import ECDH
+
+
+def test_peer_x_zero():
+    """x = 0 is a valid key on P-256 and must not be taken for the point at infinity, which is False."""
+    ecdh = ECDH(ECDSA(nist256p, 'x = 0'))
+    y = ecdh.curve.field.sqrt(nist256p['B'] % nist256p['P'])
+    expected = ecdh.shared_secret((0, y))
+    assert ecdh.shared_secret(0) == expected
+    assert ecdh.shared_secrets([0, (0, y)], vectorize=False) == [expected, expected]
+    for peers in ([O], [0, O]):
+        try:
+            ecdh.shared_secrets(peers)
+        except ValueError as e:
+            assert 'infinity' in str(e)
+        else:
+            raise AssertionError(f"{peers} was accepted.")
+
+
+def test_ladder_matches_multiply():
+    """The default wNAF path and the ladder derive the same secrets, from points and from bare x coordinates."""
+    for paramters in (secp256k1, nist256p):
+        alice, bob = ECDSA(paramters, 'alice'), ECDSA(paramters, 'bob')
+        ecdh, ladder = ECDH(alice), ECDH(alice, ladder=True)
+        expected = ECDH(bob).shared_secret(alice.kpub)
+        assert ecdh.shared_secret(bob.kpub) == expected
+        assert ecdh.shared_secret(bob.kpub[0].value) == expected
+        assert ladder.shared_secret(bob.kpub) == expected
+        peers = [bob.kpub, bob.kpub[0].value, alice.kpub]
+        assert ecdh.shared_secrets(peers, vectorize=False) == ladder.shared_secrets(peers, vectorize=False)
+        for bad in ((bob.kpub[0].value, bob.kpub[1].value + 1), paramters['P']):
+            for derive in (ecdh.shared_secret, ladder.shared_secret):
+                try:
+                    derive(bad)
+                except ValueError:
+                    continue
+                raise AssertionError(f"{bad} was accepted.")
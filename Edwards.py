@@ -0,0 +1,212 @@
+from typing import List, Optional, Tuple
+from Curve import FixedBaseTable, wnaf
+from Mod import Mod, prime_field
+
+EdwardsPoint = Tuple[Mod, Mod]  # Affine (x, y), the neutral element (0, 1) is an ordinary point.
+ExtendedPoint = Tuple[int, int, int, int]  # (X, Y, Z, T) standing for the affine (X / Z, Y / Z), with T = X * Y / Z.
+
+ed25519 = {  # RFC 8032, -x**2 + y**2 = 1 + d * x**2 * y**2 over 2**255 - 19.
+    'P': 2 ** 255 - 19,
+    'A': -1,
+    'D': 0x52036cee2b6ffe738cc740797779e89800700a4d4141d8ab75eb4dca135978a3,  # -121665 / 121666
+    'Gx': 0x216936d3cd6e53fec0a4e231fdd6dc5c692cc7609525a7b2c9562d608f25d51a,
+    'Gy': 0x6666666666666666666666666666666666666666666666666666666666666658,  # 4 / 5
+    'N': 2 ** 252 + 27742317777372353535851937790883648493,  # Order of G, the curve has cofactor 8.
+    'H': 8,
+}
+
+
+class EdwardsCurve:
+    def __init__(self, a: int, d: int, p: int, window: int = 5):
+        """
+        Initializes the twisted Edwards curve a*x**2 + y**2 = 1 + d*x**2*y**2 over the integers modulo p.
+        Points are added in extended coordinates with the unified formulas of Hisil, Wong, Carter and Dawson,
+        which are complete when a is a square and d is not: the same formula adds any two points, doublings,
+        inverses and the neutral element included, so the arithmetic has no special cases to branch on.
+        The window is the default wNAF width for multiplications on this curve.
+        """
+        assert isinstance(p, int) and p > 2, "Only odd integer values of p are allowed."
+        self.P = p
+        self.A = Mod(a, p)
+        self.D = Mod(d, p)
+        self.window = window
+        self.field = prime_field(p)
+        self.reduce = self.field.reduce
+        self.a = a % p - p if 2 * (a % p) > p else a % p  # -1 rather than P - 1, a cheap multiplication.
+        self.d2 = 2 * self.D.value % p
+        self.neutral: EdwardsPoint = (Mod(0, p), Mod(1, p))
+        self.complete = self.field.sqrt(self.A.value) is not None and self.field.sqrt(self.D.value) is None
+        # The additions have a cheaper form for a = -1 (add-2008-hwcd-3), as in Ed25519.
+        self.add_extended = self._add_a1 if self.A == -1 else self._add_generic
+
+    def find(self, p: EdwardsPoint) -> bool:
+        x, y = p
+        return self.A * x * x + y * y == 1 + self.D * x * x * y * y
+
+    def modulate(self, p: EdwardsPoint) -> EdwardsPoint:
+        """
+        Makes sure that the point p is modulo P and lies on the curve.
+        """
+        rv = (Mod(int(p[0]), self.P), Mod(int(p[1]), self.P))
+        if not self.find(rv):
+            raise ValueError(f"The point ({p[0]}, {p[1]}) was not found on the Edwards curve.")
+        return rv
+
+    def to_extended(self, p: EdwardsPoint) -> ExtendedPoint:
+        x, y = int(p[0]) % self.P, int(p[1]) % self.P
+        return x, y, 1, x * y % self.P
+
+    def to_affine(self, p: ExtendedPoint) -> EdwardsPoint:
+        zinv = self.field.inverse(p[2])
+        return Mod.reduced(p[0] * zinv % self.P, self.P), Mod.reduced(p[1] * zinv % self.P, self.P)
+
+    def normalize(self, points: List[ExtendedPoint]) -> List[ExtendedPoint]:
+        """
+        Scales extended points to Z = 1, all of them sharing a single modular inversion.
+        """
+        m = self.P
+        rv = []
+        for (x, y, z, t), zinv in zip(points, self.field.inverse_many([q[2] for q in points])):
+            x, y = x * zinv % m, y * zinv % m
+            rv.append((x, y, 1, x * y % m))
+        return rv
+
+    def negate_extended(self, p: ExtendedPoint) -> ExtendedPoint:
+        """-(x, y) = (-x, y)."""
+        x, y, z, t = p
+        return -x % self.P, y, z, -t % self.P
+
+    def _add_a1(self, p1: ExtendedPoint, p2: ExtendedPoint) -> ExtendedPoint:
+        """
+        Unified addition for a = -1 (add-2008-hwcd-3), 8 multiplications and one by 2d.
+        """
+        x1, y1, z1, t1 = p1
+        x2, y2, z2, t2 = p2
+        red = self.reduce
+        a = red((y1 - x1) * (y2 - x2))
+        b = red((y1 + x1) * (y2 + x2))
+        c = red(red(t1 * self.d2) * t2)
+        d = red(2 * z1 * z2)
+        e, f, g, h = b - a, d - c, d + c, b + a
+        return red(e * f), red(g * h), red(f * g), red(e * h)
+
+    def _add_generic(self, p1: ExtendedPoint, p2: ExtendedPoint) -> ExtendedPoint:
+        """
+        Unified addition for any a (add-2008-hwcd), 9 multiplications and two by constants.
+        """
+        x1, y1, z1, t1 = p1
+        x2, y2, z2, t2 = p2
+        red = self.reduce
+        a = red(x1 * x2)
+        b = red(y1 * y2)
+        c = red(red(t1 * self.D.value) * t2)
+        d = red(z1 * z2)
+        e = red((x1 + y1) * (x2 + y2) - a - b)
+        f, g, h = d - c, d + c, b - self.a * a
+        return red(e * f), red(g * h), red(f * g), red(e * h)
+
+    def double_extended(self, p: ExtendedPoint) -> ExtendedPoint:
+        """
+        Dedicated doubling (dbl-2008-hwcd), 4 multiplications and 4 squarings. It doesn't use T.
+        """
+        x1, y1, z1, _ = p
+        red = self.reduce
+        a = red(x1 * x1)
+        b = red(y1 * y1)
+        c = red(2 * z1 * z1)
+        d = self.a * a
+        e = red((x1 + y1) * (x1 + y1) - a - b)
+        g = d + b
+        f, h = g - c, d - b
+        return red(e * f), red(g * h), red(f * g), red(e * h)
+
+    def add(self, p1: EdwardsPoint, p2: EdwardsPoint, check: bool = True) -> EdwardsPoint:
+        if check:
+            p1, p2 = self.modulate(p1), self.modulate(p2)
+        return self.to_affine(self.add_extended(self.to_extended(p1), self.to_extended(p2)))
+
+    def odd_multiples(self, p: ExtendedPoint, window: int) -> List[ExtendedPoint]:
+        """
+        Returns p, 3p, 5p, ..., (2**(window - 1) - 1)p for wNAF multiplication.
+        """
+        rv = [p]
+        p2 = self.double_extended(p)
+        for _ in range(1, 1 << (window - 2)):
+            rv.append(self.add_extended(rv[-1], p2))
+        return rv
+
+    def multiply(self, p: EdwardsPoint, k: int, check: bool = True, window: Optional[int] = None) -> EdwardsPoint:
+        """
+        Width-w NAF multiplication as in Curve.multiply. Negating a table entry only flips the signs of X and T.
+        """
+        if check:
+            p = self.modulate(p)
+        window = window or self.window
+        if k < 0:
+            p, k = (-p[0], p[1]), -k
+        table = self.odd_multiples(self.to_extended(p), window)
+        q = (0, 1, 1, 0)
+        for d in reversed(wnaf(k, window)):
+            q = self.double_extended(q)
+            if d > 0:
+                q = self.add_extended(q, table[d >> 1])
+            elif d < 0:
+                q = self.add_extended(q, self.negate_extended(table[-d >> 1]))
+        return self.to_affine(q)
+
+    def precompute(self, p: EdwardsPoint, window: int = 4, bits: Optional[int] = None) -> FixedBaseTable:
+        """
+        Builds the table for fixed-base multiplication of p by scalars below 2**bits (P's size by default),
+        laid out as in Curve.precompute with entry 0 of every row being the neutral element.
+        """
+        p = self.modulate(p)
+        bits = bits or self.P.bit_length()
+        points = []
+        row_base = self.to_extended(p)
+        for _ in range((bits + window - 1) // window):
+            points.append((0, 1, 1, 0))
+            points.append(row_base)
+            for _ in range(2, 1 << window):
+                points.append(self.add_extended(points[-1], row_base))
+            for _ in range(window):
+                row_base = self.double_extended(row_base)
+        points = self.normalize(points)
+        size = 1 << window
+        return FixedBaseTable(p, window, bits, [points[i:i + size] for i in range(0, len(points), size)])
+
+    def multiply_fixed(self, table: FixedBaseTable, k: int) -> EdwardsPoint:
+        """
+        Fixed-base multiplication with one unified addition per window of k, zero windows included:
+        thanks to the complete formulas, the sequence of operations is the same for every k below 2**bits.
+        """
+        if k < 0 or k >> table.bits:
+            return self.multiply(table.base, k, check=False)
+        mask = (1 << table.window) - 1
+        q = (0, 1, 1, 0)
+        for row in table.points:
+            q = self.add_extended(q, row[k & mask])
+            k >>= table.window
+        return self.to_affine(q)
+
+    def encode(self, p: EdwardsPoint) -> bytes:
+        """
+        RFC 8032 encoding: y in little-endian with the low bit of x in the top bit.
+        """
+        width = (self.P.bit_length() + 8) // 8
+        return (int(p[1]) | (int(p[0]) & 1) << (8 * width - 1)).to_bytes(width, 'little')
+
+    def decode(self, data: bytes) -> EdwardsPoint:
+        """
+        Inverse of encode, x = sqrt((y**2 - 1) / (d * y**2 - a)) with the encoded sign.
+        """
+        v = int.from_bytes(data, 'little')
+        sign, y = v >> (8 * len(data) - 1), v & ((1 << (8 * len(data) - 1)) - 1)
+        if y >= self.P:
+            raise ValueError("Invalid point encoding.")
+        u = (y * y - 1) * self.field.inverse((self.D.value * y * y - self.A.value) % self.P) % self.P
+        x = self.field.sqrt(u)
+        if x is None or (x == 0 and sign):
+            raise ValueError("Invalid point encoding.")
+        if x & 1 != sign:
+            x = self.P - x
+        return Mod(x, self.P), Mod(y, self.P)
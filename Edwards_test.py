@@ -0,0 +1,87 @@
+from hashlib import sha512
+from random import Random
+from Edwards import EdwardsCurve, ed25519
+from Mod import Mod
+from Montgomery import MontgomeryCurve, curve25519
+
+# RFC 8032 section 7.1, tests 1 and 2: (secret key, public key).
+ED25519_KEYS = [
+    ('9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60',
+     'd75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a'),
+    ('4ccd089b28ff96da9db6c346ec114e0f5b8a319f35aba624da8cf6ed4fb8a6fb',
+     '3d4017c3e843895a92b70aa74d1b7ebc9c982ccf2ec4968cc0cd55f12af4660c'),
+]
+
+
+def ed25519_curve():
+    curve = EdwardsCurve(ed25519['A'], ed25519['D'], ed25519['P'])
+    return curve, curve.modulate((ed25519['Gx'], ed25519['Gy']))
+
+
+def affine_add(curve, p1, p2):
+    """(x1 * y2 + y1 * x2) / (1 + d * x1 * x2 * y1 * y2), (y1 * y2 - a * x1 * x2) / (1 - d * x1 * x2 * y1 * y2)."""
+    (x1, y1), (x2, y2) = p1, p2
+    t = curve.D * x1 * x2 * y1 * y2
+    return (x1 * y2 + y1 * x2) / (1 + t), (y1 * y2 - curve.A * x1 * x2) / (1 - t)
+
+
+def test_base_point():
+    curve, g = ed25519_curve()
+    assert curve.complete
+    assert curve.encode(g).hex() == '58' + '66' * 31
+    assert curve.decode(curve.encode(g)) == g
+    assert curve.multiply(g, ed25519['N']) == curve.neutral
+    assert curve.multiply(g, ed25519['N'] + 1) == g
+
+
+def test_public_keys():
+    curve, g = ed25519_curve()
+    table = curve.precompute(g, 4, ed25519['N'].bit_length())
+    for secret, public in ED25519_KEYS:
+        h = sha512(bytes.fromhex(secret)).digest()
+        a = int.from_bytes(h[:32], 'little') & ((1 << 254) - 8) | 1 << 254
+        assert curve.encode(curve.multiply(g, a)).hex() == public
+        assert curve.encode(curve.multiply_fixed(table, a)).hex() == public
+        assert curve.decode(bytes.fromhex(public)) == curve.multiply(g, a)
+
+
+def test_extended_formulas():
+    """The hwcd additions and doubling against the affine formulas, for a = -1 and for a generic a."""
+    montgomery = MontgomeryCurve(curve25519['A'], curve25519['B'], curve25519['P'])
+    for curve, g in (ed25519_curve(), (montgomery.edwards(), montgomery.to_edwards(
+            montgomery.modulate((curve25519['Gu'], curve25519['Gv']))))):
+        points = [curve.neutral, g]
+        for _ in range(8):
+            points.append(affine_add(curve, points[-1], g))
+        points.append((-g[0], g[1]))
+        for p1 in points:
+            assert curve.to_affine(curve.double_extended(curve.to_extended(p1))) == affine_add(curve, p1, p1)
+            for p2 in points:
+                assert curve.add(p1, p2) == affine_add(curve, p1, p2)
+
+
+def test_multiply_fixed():
+    rng = Random(23)
+    curve, g = ed25519_curve()
+    n = ed25519['N']
+    table = curve.precompute(g, 4, n.bit_length())
+    q = curve.neutral
+    for k in range(20):
+        assert curve.multiply(g, k) == q
+        assert curve.multiply_fixed(table, k) == q
+        assert curve.multiply_fixed(table, -k) == (-q[0], q[1])
+        q = affine_add(curve, q, g)
+    for k in [n - 1, n, n + 1, 1 << 300] + [rng.randrange(n) for _ in range(5)]:
+        for window in (2, 4, 6):
+            assert curve.multiply_fixed(table, k) == curve.multiply(g, k, window=window), (k, window)
+
+
+def test_decode_rejects():
+    curve, _ = ed25519_curve()
+    for data in ((ed25519['P']).to_bytes(32, 'little'), (2).to_bytes(32, 'little')):
+        try:
+            curve.decode(data)
+        except ValueError:
+            continue
+        raise AssertionError(f"{data.hex()} was decoded.")
+    assert curve.decode((1).to_bytes(32, 'little')) == (Mod(0, ed25519['P']), Mod(1, ed25519['P']))
@@ -0,0 +1,128 @@
+from secrets import randbelow
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+from Algorithm import ECDSA
+from Curve import JacobianPoint, Point
+
+KOBLITZ_BITS = 8  # Every message is tried against 2**8 x coordinates, failing with probability about 2**-256.
+BATCH = 128  # Points added per batch, sharing one inversion for their conversion back to affine coordinates.
+BLOCK = 1 << 16  # Bytes read from a file at a time.
+
+
+def rechunk(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """
+    Turns a stream of byte strings of any length into blocks of exactly size bytes, except for the last one.
+    """
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        end = len(buffer) - len(buffer) % size
+        for i in range(0, end, size):
+            yield buffer[i:i + size]
+        buffer = buffer[end:]
+    if buffer:
+        yield buffer
+
+
+def read_blocks(f: BinaryIO, size: int = BLOCK) -> Iterator[bytes]:
+    return iter(lambda: f.read(size), b'')
+
+
+class ElGamal:
+    def __init__(self, alg: ECDSA):
+        """
+        EC ElGamal encryption with the key pair and curve of an ECDSA instance, see docs.txt.
+        Messages are cut into chunks of self.chunk bytes, each mapped to a point Pi with Koblitz's method.
+        Each ciphertext point is Ci = Pi + k * Kpub, and the stream starts with R = k * G.
+        """
+        self.alg = alg
+        self.curve = alg.curve
+        self.P = alg.curve.P
+        self.width = (self.P.bit_length() + 7) // 8  # Bytes per coordinate.
+        # A chunk is prefixed with a 0x01 byte to keep its length, then shifted by KOBLITZ_BITS.
+        self.chunk = (self.P.bit_length() - KOBLITZ_BITS - 2) // 8
+        assert self.chunk > 0, "The curve is too small to carry any message bytes."
+
+    def encode_point(self, p: Point) -> bytes:
+        return int(p[0]).to_bytes(self.width, 'big') + int(p[1]).to_bytes(self.width, 'big')
+
+    def decode_point(self, data: bytes) -> Point:
+        assert len(data) == 2 * self.width, "Truncated point."
+        return self.curve.modulate((int.from_bytes(data[:self.width], 'big'),
+                                    int.from_bytes(data[self.width:], 'big')))
+
+    def map_to_point(self, data: bytes) -> JacobianPoint:
+        """
+        Koblitz's method: the first x = m * 2**KOBLITZ_BITS + j with a square x**3 + a*x + b gives the point.
+        """
+        m = int.from_bytes(b'\x01' + data, 'big') << KOBLITZ_BITS
+        a, b, p = self.curve.A.value, self.curve.B.value, self.P
+        for x in range(m, m + (1 << KOBLITZ_BITS)):
+            y = self.curve.field.sqrt((x * x * x + a * x + b) % p)
+            if y is not None:
+                return x, y, 1
+        raise ValueError("The message chunk could not be mapped to a point.")
+
+    def map_from_point(self, p: JacobianPoint) -> bytes:
+        m = p[0] >> KOBLITZ_BITS
+        return m.to_bytes((m.bit_length() + 7) // 8, 'big')[1:]
+
+    def translate(self, points: List[JacobianPoint], offset: JacobianPoint) -> List[JacobianPoint]:
+        """
+        Adds the affine offset to a batch of affine points, paying for a single inversion.
+        """
+        return self.curve.normalize([self.curve.jacobian_add_affine(p, offset) for p in points])
+
+    def encrypt_stream(self, chunks: Iterable[bytes], kpub: Optional[Point] = None,
+                       k: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Encrypts a stream of byte strings to kpub (this instance's public key by default), yielding R and then
+        one ciphertext point per message chunk. Only BATCH points are held in memory at a time.
+        k * Kpub is computed once for the whole stream.
+        """
+        kpub = self.alg.kpub if kpub is None else self.curve.modulate(kpub)
+        if k is None:
+            k = randbelow(self.alg.N - 1) + 1
+        yield self.encode_point(self.curve.multiply_fixed(self.alg.g_table, k))
+        shared = self.curve.to_jacobian(self.curve.multiply(kpub, k, check=False))
+        batch = []
+        for data in rechunk(chunks, self.chunk):
+            batch.append(self.map_to_point(data))
+            if len(batch) == BATCH:
+                yield b''.join(self.encode_point(c) for c in self.translate(batch, shared))
+                batch = []
+        if batch:
+            yield b''.join(self.encode_point(c) for c in self.translate(batch, shared))
+
+    def decrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Decrypts a stream produced by encrypt_stream with this instance's private key, Pi = Ci - Kpriv * R.
+        The input can be cut into byte strings of any length.
+        """
+        points = rechunk(chunks, 2 * self.width)
+        r = self.decode_point(next(points, b''))
+        shared = self.curve.to_jacobian(self.curve.multiply(r, self.alg.kpriv, check=False))
+        shared = self.curve.jacobian_negate(shared)
+        batch = []
+        for data in points:
+            batch.append(self.curve.to_jacobian(self.decode_point(data)))
+            if len(batch) == BATCH:
+                yield b''.join(self.map_from_point(p) for p in self.translate(batch, shared))
+                batch = []
+        if batch:
+            yield b''.join(self.map_from_point(p) for p in self.translate(batch, shared))
+
+    def encrypt(self, message: bytes, kpub: Optional[Point] = None) -> bytes:
+        return b''.join(self.encrypt_stream([message], kpub))
+
+    def decrypt(self, ciphertext: bytes) -> bytes:
+        return b''.join(self.decrypt_stream([ciphertext]))
+
+    def encrypt_file(self, source: str, destination: str, kpub: Optional[Point] = None):
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            for data in self.encrypt_stream(read_blocks(src), kpub):
+                dst.write(data)
+
+    def decrypt_file(self, source: str, destination: str):
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            for data in self.decrypt_stream(read_blocks(src)):
+                dst.write(data)
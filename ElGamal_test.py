@@ -0,0 +1,67 @@
+from random import Random
+import pytest
+from Algorithm import ECDSA, nist256p, secp256k1
+from ElGamal import BATCH, BLOCK, ElGamal, rechunk
+
+
+def split(data: bytes, rng: Random):
+    """Cuts data into pieces of random lengths, some of them empty."""
+    i = 0
+    while i < len(data):
+        n = rng.randrange(0, 200)
+        yield data[i:i + n]
+        i += n
+
+
+def test_round_trip():
+    """Empty messages, zero bytes and streams of more than one batch, with the ciphertext cut anywhere."""
+    rng = Random(16)
+    for paramters in (secp256k1, nist256p):
+        alice, bob = ElGamal(ECDSA(paramters, 'alice')), ElGamal(ECDSA(paramters, 'bob'))
+        size = alice.chunk
+        messages = [b'', b'\x00', b'\x00' * size, b'\x00' * (size + 1), b'\xff' * size, b'hello',
+                    bytes(rng.getrandbits(8) for _ in range(size * (BATCH + 3) + 7))]
+        for message in messages:
+            ciphertext = alice.encrypt(message, bob.alg.kpub)
+            assert len(ciphertext) == 2 * alice.width * (1 + -(-len(message) // size))
+            assert bob.decrypt(ciphertext) == message
+            assert b''.join(bob.decrypt_stream(split(ciphertext, rng))) == message
+            streamed = b''.join(alice.encrypt_stream(split(message, rng), bob.alg.kpub))
+            assert b''.join(bob.decrypt_stream(split(streamed, rng))) == message
+        assert alice.decrypt(alice.encrypt(b'to myself')) == b'to myself'
+        assert alice.decrypt(alice.encrypt(b'not for alice', bob.alg.kpub)) != b'not for alice'
+
+
+def test_files(tmp_path):
+    alg = ElGamal(ECDSA(secp256k1, 'files'))
+    message = Random(16).randbytes(BLOCK + 1000)
+    (tmp_path / 'plain').write_bytes(message)
+    alg.encrypt_file(tmp_path / 'plain', tmp_path / 'cipher')
+    alg.decrypt_file(tmp_path / 'cipher', tmp_path / 'decrypted')
+    assert (tmp_path / 'decrypted').read_bytes() == message
+
+
+def test_rechunk():
+    data = bytes(range(100))
+    for size in (1, 7, 100, 101):
+        for pieces in ([data], [data[:3], b'', data[3:50], data[50:]], [data[i:i + 1] for i in range(100)]):
+            blocks = list(rechunk(pieces, size))
+            assert b''.join(blocks) == data
+            assert all(len(block) == size for block in blocks[:-1]) and 0 < len(blocks[-1]) <= size
+    assert list(rechunk([b'', b''], 5)) == []
+
+
+def test_mapping_failure(monkeypatch):
+    """With a single candidate x some chunks have no point, which must raise instead of producing garbage."""
+    alg = ElGamal(ECDSA(secp256k1, 'koblitz'))
+    for data in (b'', b'\x00', b'abc'):
+        assert alg.map_from_point(alg.map_to_point(data)) == data
+    monkeypatch.setattr('ElGamal.KOBLITZ_BITS', 0)
+    a, b, p = alg.curve.A.value, alg.curve.B.value, alg.P
+    candidates = (bytes([i]) for i in range(256))
+    unmapped = next(data for data in candidates
+                    if alg.curve.field.sqrt((pow(256 + data[0], 3, p) + a * (256 + data[0]) + b) % p) is None)
+    with pytest.raises(ValueError):
+        alg.map_to_point(unmapped)
+    with pytest.raises(ValueError):
+        alg.encrypt(unmapped)
@@ -0,0 +1,341 @@
+from random import getrandbits
+from timeit import timeit
+from typing import Callable, Dict, List, Tuple
+
+# Bit-spreading tables: a byte with a 0 inserted before every bit is the square of the byte before reduction,
+# and bin(a) with every bit widened to a whole byte lets an integer product add up partial products without
+# carries between the bits.
+SPREAD_SQUARE = [int(bin(v)[2:].replace('1', '#').replace('0', '00').replace('#', '01'), 2).to_bytes(2, 'big')
+                 for v in range(256)]
+SPREAD_BYTES = bytes.maketrans(b'01', b'\x00\x01')
+BYTE_PARITY = bytes.maketrans(bytes(range(256)), bytes(ord('0') + (v & 1) for v in range(256)))
+SPREAD_MAX_BITS = 255  # A product byte counts at most this many bit pairs before it would carry.
+COMB_WINDOW = 4
+MULTISQUARE_MIN = 8  # x**(2**j) goes through a linear map table from this many squarings.
+
+
+def degree(a: int) -> int:
+    return a.bit_length() - 1
+
+
+def clmul_comb(a: int, b: int) -> int:
+    """
+    Carry-less product of the polynomials a and b, left-to-right comb with a window of COMB_WINDOW bits:
+    the 2**COMB_WINDOW multiples of b are tabulated, then a is consumed a window at a time.
+    """
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    table = [0, b]
+    for u in range(2, 1 << COMB_WINDOW):
+        table.append(table[u >> 1] << 1 if u & 1 == 0 else table[u - 1] ^ b)
+    mask = (1 << COMB_WINDOW) - 1
+    rv = 0
+    for shift in range((a.bit_length() - 1) // COMB_WINDOW * COMB_WINDOW, -1, -COMB_WINDOW):
+        rv = (rv << COMB_WINDOW) ^ table[(a >> shift) & mask]
+    return rv
+
+
+def clmul_spread(a: int, b: int) -> int:
+    """
+    Carry-less product through one integer multiplication: with every bit of a and b widened to a byte,
+    the bytes of the integer product count the pairs of bits that meet there, and their parities are the
+    coefficients of the carry-less product. a is cut into pieces of SPREAD_MAX_BITS so counts never carry.
+    """
+    if not a or not b:
+        return 0
+    if a.bit_length() > b.bit_length():
+        a, b = b, a
+    bs = bin(b)[2:]
+    spread_b = int.from_bytes(bs.encode('ascii').translate(SPREAD_BYTES), 'big')
+    rv = 0
+    shift = 0
+    while a:
+        piece = a & ((1 << SPREAD_MAX_BITS) - 1)
+        if piece:
+            pa = bin(piece)[2:]
+            product = int.from_bytes(pa.encode('ascii').translate(SPREAD_BYTES), 'big') * spread_b
+            product = product.to_bytes(len(pa) + len(bs) - 1, 'big').translate(BYTE_PARITY)
+            rv ^= int(product, 2) << shift
+        a >>= SPREAD_MAX_BITS
+        shift += SPREAD_MAX_BITS
+    return rv
+
+
+def clsqr(a: int) -> int:
+    """Carry-less square: the bits of a spread out with zeros in between, a byte at a time."""
+    return int.from_bytes(b''.join([SPREAD_SQUARE[c] for c in a.to_bytes((a.bit_length() + 7) // 8, 'big')]), 'big')
+
+
+CLMULS = {
+    'comb': clmul_comb,
+    'spread': clmul_spread,
+}
+
+
+def calibrate_clmuls(m: int, samples: int = 50, number: int = 5) -> Dict[str, Tuple[Callable, float]]:
+    """
+    Times every carry-less multiplication on random polynomials of degree below m.
+    Returns {name: (function, seconds)}.
+    """
+    values = [(getrandbits(m), getrandbits(m)) for _ in range(samples)]
+    expected = [clmul_comb(a, b) for a, b in values]
+    rv = {}
+    for name, clmul in CLMULS.items():
+        if [clmul(a, b) for a, b in values] == expected:
+            rv[name] = clmul, timeit(lambda: [clmul(a, b) for a, b in values], number=number)
+    return rv
+
+
+class GF2Field:
+    __slots__ = ('poly', 'm', 'terms', 'mask', 'clmul', 'multisquares', 'chain', 'inverse')
+
+    def __init__(self, poly: int):
+        """
+        The field GF(2**m) in polynomial basis, elements being ints whose bits are the coefficients,
+        reduced modulo the irreducible trinomial or pentanomial poly of degree m. The carry-less
+        multiplication and the inversion are the fastest ones on this machine for m, see calibrate_clmuls
+        and calibrate_inverses.
+        """
+        terms = [i for i in range(poly.bit_length() - 1) if (poly >> i) & 1]
+        assert terms and terms[0] == 0 and len(terms) in (2, 4), "Only trinomials and pentanomials are supported."
+        self.poly = poly
+        self.m = degree(poly)
+        self.terms = terms[1:]  # The middle terms, x**m = 1 + sum(x**k for k in terms).
+        assert max(self.terms) <= self.m // 2, "Reduction folds need the middle terms in the lower half."
+        self.mask = (1 << self.m) - 1
+        timings = calibrate_clmuls(self.m)
+        self.clmul = min(timings.values(), key=lambda t: t[1])[0]
+        self.multisquares: Dict[int, List[List[int]]] = {}
+        self.chain = self.itoh_tsujii_chain(self.m - 1)
+        timings = self.calibrate_inverses()
+        self.inverse: Callable[[int], int] = min(timings.values(), key=lambda t: t[1])[0]
+
+    def __call__(self, value: int) -> 'GF2':
+        return GF2(self.reduce(value), self)
+
+    def reduce(self, a: int) -> int:
+        """
+        Folds the bits from x**m up back onto the low bits with x**m = 1 + x**k1 (+ x**k2 + x**k3),
+        twice at most because the middle terms are in the lower half.
+        """
+        m, mask = self.m, self.mask
+        while a >> m:
+            h = a >> m
+            a = (a & mask) ^ h
+            for k in self.terms:
+                a ^= h << k
+        return a
+
+    def mul(self, a: int, b: int) -> int:
+        return self.reduce(self.clmul(a, b))
+
+    def sqr(self, a: int) -> int:
+        return self.reduce(clsqr(a))
+
+    def multisquare(self, a: int, j: int) -> int:
+        """
+        a**(2**j). Squaring is linear over GF(2), so for larger j the map is tabulated once per j, a byte of a
+        at a time, and applying it costs a lookup and a xor per byte instead of j squarings.
+        """
+        if j < MULTISQUARE_MIN:
+            for _ in range(j):
+                a = self.reduce(clsqr(a))
+            return a
+        if j not in self.multisquares:
+            self.multisquares[j] = self.multisquare_table(j)
+        rv = 0
+        for row in self.multisquares[j]:
+            rv ^= row[a & 0xFF]
+            a >>= 8
+        return rv
+
+    def multisquare_table(self, j: int) -> List[List[int]]:
+        """
+        The images of every byte of every position under a -> a**(2**j). Since (x**i)**(2**j) = (x**(2**j))**i,
+        the image of each bit is the image of the previous one times x**(2**j), one multiplication per bit.
+        """
+        step = 2
+        for _ in range(j):
+            step = self.sqr(step)
+        images = [1]
+        for _ in range(1, (self.m + 7) // 8 * 8):
+            images.append(self.mul(images[-1], step) if len(images) < self.m else 0)
+        rows = []
+        for position in range(0, len(images), 8):
+            row = [0] * 256
+            for v in range(1, 256):
+                low = v & -v
+                row[v] = row[v ^ low] ^ images[position + low.bit_length() - 1]
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def itoh_tsujii_chain(e: int) -> List[Tuple[int, int]]:
+        """
+        An addition chain for e as a list of (i, j) steps: a**(2**(i + j) - 1) = (a**(2**i - 1))**(2**j) * a**(2**j - 1),
+        following the binary expansion of e from the top. Both i and j are earlier chain elements.
+        """
+        steps = []
+        k = 1
+        for bit in bin(e)[3:]:
+            steps.append((k, k))
+            k *= 2
+            if bit == '1':
+                steps.append((k, 1))
+                k += 1
+        return steps
+
+    def inverse_itoh_tsujii(self, a: int) -> int:
+        """
+        a**-1 = a**(2**m - 2) = (a**(2**(m - 1) - 1))**2, where a**(2**(m - 1) - 1) comes from the addition
+        chain of m - 1: about log2(m) multiplications and m squarings, most of them done as multisquares.
+        """
+        if a == 0:
+            raise ValueError("Value not invertible.")
+        powers = {1: a}  # k -> a**(2**k - 1)
+        for i, j in self.chain:
+            powers[i + j] = self.mul(self.multisquare(powers[i], j), powers[j])
+        return self.sqr(powers[self.m - 1])
+
+    def inverse_xgcd(self, a: int) -> int:
+        """
+        Extended Euclid on polynomials, kept as the reference for inverse_itoh_tsujii.
+        """
+        if a == 0:
+            raise ValueError("Value not invertible.")
+        u, v, g1, g2 = a, self.poly, 1, 0
+        while u != 1:
+            j = degree(u) - degree(v)
+            if j < 0:
+                u, v, g1, g2 = v, u, g2, g1
+                j = -j
+            u ^= v << j
+            g1 ^= g2 << j
+        return self.reduce(g1)
+
+    def calibrate_inverses(self, samples: int = 20, number: int = 3) -> Dict[str, Tuple[Callable, float]]:
+        """
+        Times Itoh-Tsujii against the polynomial xgcd, the multisquare tables being built beforehand.
+        Returns {name: (function, seconds)}.
+        """
+        values = [getrandbits(self.m) or 1 for _ in range(samples)]
+        expected = [self.inverse_xgcd(v) for v in values]
+        rv = {}
+        for name, inverse in (('itoh_tsujii', self.inverse_itoh_tsujii), ('xgcd', self.inverse_xgcd)):
+            if [inverse(v) for v in values] == expected:
+                rv[name] = inverse, timeit(lambda: [inverse(v) for v in values], number=number)
+        return rv
+
+    def inverse_many(self, values: List[int]) -> List[int]:
+        """Montgomery's trick, a single inversion for all the values."""
+        prefix = []
+        acc = 1
+        for v in values:
+            prefix.append(acc)
+            acc = self.mul(acc, v)
+        inv = self.inverse(acc)
+        rv = [0] * len(values)
+        for i in range(len(values) - 1, -1, -1):
+            rv[i] = self.mul(inv, prefix[i])
+            inv = self.mul(inv, values[i])
+        return rv
+
+    def sqrt(self, a: int) -> int:
+        """Every element has exactly one square root, a**(2**(m - 1))."""
+        return self.multisquare(a, self.m - 1)
+
+    def trace(self, a: int) -> int:
+        t = a
+        for _ in range(self.m - 1):
+            t = self.sqr(t) ^ a
+        return t
+
+    def half_trace(self, a: int) -> int:
+        """For odd m, a solution z of z**2 + z = a when trace(a) = 0."""
+        h = a
+        for _ in range((self.m - 1) // 2):
+            h = self.sqr(self.sqr(h)) ^ a
+        return h
+
+
+_gf2_fields: Dict[int, GF2Field] = {}
+
+
+def gf2_field(poly: int) -> GF2Field:
+    if poly not in _gf2_fields:
+        _gf2_fields[poly] = GF2Field(poly)
+    return _gf2_fields[poly]
+
+
+class GF2:
+    __slots__ = ('value', 'field')
+
+    def __init__(self, value: int, field: GF2Field):
+        """
+        An element of GF(2**m), value's bits being its coefficients in polynomial basis.
+        Like Mod, value is what ECDSA converts to an integer.
+        """
+        self.value = value
+        self.field = field
+
+    def coerce(self, other) -> int:
+        if isinstance(other, GF2):
+            assert other.field is self.field, 'fields do not match'
+            return other.value
+        assert isinstance(other, int), "GF2 elements only operate with GF2 elements and ints."
+        return self.field.reduce(other)
+
+    def __add__(self, other) -> 'GF2':
+        return GF2(self.value ^ self.coerce(other), self.field)
+
+    __radd__ = __sub__ = __rsub__ = __add__  # Characteristic 2: subtraction is addition.
+
+    def __neg__(self) -> 'GF2':
+        return self
+
+    def __mul__(self, other) -> 'GF2':
+        return GF2(self.field.mul(self.value, self.coerce(other)), self.field)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other) -> 'GF2':
+        return GF2(self.field.mul(self.value, self.field.inverse(self.coerce(other))), self.field)
+
+    def __rtruediv__(self, other) -> 'GF2':
+        return GF2(self.field.mul(self.coerce(other), self.field.inverse(self.value)), self.field)
+
+    def __pow__(self, e: int) -> 'GF2':
+        if e < 0:
+            return self.inverse() ** -e
+        rv, base = 1, self.value
+        while e:
+            if e & 1:
+                rv = self.field.mul(rv, base)
+            base = self.field.sqr(base)
+            e >>= 1
+        return GF2(rv, self.field)
+
+    def inverse(self) -> 'GF2':
+        return GF2(self.field.inverse(self.value), self.field)
+
+    def sqrt(self) -> 'GF2':
+        return GF2(self.field.sqrt(self.value), self.field)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, GF2):
+            return self.field is other.field and self.value == other.value
+        if isinstance(other, int):
+            return self.value == self.field.reduce(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.value, self.field.poly))
+
+    def __int__(self):
+        return self.value
+
+    def __bool__(self):
+        return self.value != 0
+
+    def __repr__(self):
+        return f"GF2({hex(self.value)}, {hex(self.field.poly)})"
@@ -0,0 +1,80 @@
+from random import Random
+from GF2 import CLMULS, GF2Field, clsqr, gf2_field
+
+FIELDS = ((1 << 163) | (1 << 7) | (1 << 6) | (1 << 3) | 1, (1 << 233) | (1 << 74) | 1,
+          (1 << 283) | (1 << 12) | (1 << 7) | (1 << 5) | 1, (1 << 409) | (1 << 87) | 1)
+
+
+def naive_clmul(a, b):
+    rv = 0
+    while b:
+        if b & 1:
+            rv ^= a
+        a <<= 1
+        b >>= 1
+    return rv
+
+
+def naive_reduce(a, poly):
+    m = poly.bit_length() - 1
+    while a.bit_length() > m:
+        a ^= poly << (a.bit_length() - 1 - m)
+    return a
+
+
+def test_clmuls():
+    rng = Random(24)
+    for bits in (1, 8, 64, 233, 409, 571):
+        for _ in range(20):
+            a, b = rng.getrandbits(bits), rng.getrandbits(bits)
+            expected = naive_clmul(a, b)
+            for name, clmul in CLMULS.items():
+                assert clmul(a, b) == expected, (name, bits)
+            assert clsqr(a) == naive_clmul(a, a)
+
+
+def test_field_arithmetic():
+    rng = Random(24)
+    for poly in FIELDS:
+        field = gf2_field(poly)
+        values = [0, 1, field.mask] + [rng.getrandbits(field.m) for _ in range(30)]
+        for a in values:
+            assert field.sqr(a) == naive_reduce(naive_clmul(a, a), poly)
+            assert field.mul(field.sqrt(a), field.sqrt(a)) == a
+            assert field.reduce(a << field.m) == naive_reduce(a << field.m, poly)
+            for j in (1, 5, 40):
+                expected = a
+                for _ in range(j):
+                    expected = field.sqr(expected)
+                assert field.multisquare(a, j) == expected
+            b = rng.getrandbits(field.m)
+            assert field.mul(a, b) == naive_reduce(naive_clmul(a, b), poly)
+
+
+def test_inverses():
+    rng = Random(24)
+    for poly in FIELDS:
+        field = GF2Field(poly)
+        values = [1, 2, field.mask] + [rng.getrandbits(field.m) or 1 for _ in range(30)]
+        for a in values:
+            inverse = field.inverse_xgcd(a)
+            assert field.mul(a, inverse) == 1
+            assert field.inverse_itoh_tsujii(a) == inverse
+            assert field.inverse(a) == inverse
+        assert field.inverse_many(values) == [field.inverse_xgcd(a) for a in values]
+        for inverse in (field.inverse_xgcd, field.inverse_itoh_tsujii):
+            try:
+                inverse(0)
+            except ValueError:
+                continue
+            raise AssertionError("0 was inverted.")
+
+
+def test_half_trace():
+    rng = Random(24)
+    field = gf2_field(FIELDS[1])
+    for _ in range(20):
+        a = rng.getrandbits(field.m)
+        if field.trace(a) == 0:
+            z = field.half_trace(a)
+            assert field.sqr(z) ^ z == a
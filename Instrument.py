@@ -0,0 +1,149 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, Iterator
+import Mod as mod_module
+import xgcd as xgcd_module
+from Curve import Curve
+from Mod import Mod, PrimeField
+
+# Field multiplications and squarings performed by each Curve formula, as written in Curve.py.
+# Reductions of sums and differences are not counted. The generic doubling computes a * Z**4 as A * zz * zz,
+# which is two of its five multiplications.
+FORMULA_COSTS = {
+    'Curve._jacobian_double_generic': (5, 5),
+    'Curve._jacobian_double_a0': (3, 4),
+    'Curve._jacobian_double_a3': (4, 4),
+    'Curve.jacobian_add': (12, 4),
+    'Curve.jacobian_add_affine': (8, 3),
+    'Curve.glv_map': (1, 0),
+}
+
+# The methods and functions that get counted, as (owner, attribute, counter name).
+TARGETS = [
+    (Mod, '__add__', 'Mod.add'),
+    (Mod, '__sub__', 'Mod.sub'),
+    (Mod, '__mul__', 'Mod.mul'),
+    (Mod, '__truediv__', 'Mod.div'),
+    (Mod, '__pow__', 'Mod.pow'),
+    (Mod, 'inverse', 'Mod.inverse'),
+    (Mod, 'sqrt', 'Mod.sqrt'),
+    (Mod, 'is_residue', 'Mod.is_residue'),
+    (PrimeField, 'inverse', 'PrimeField.inverse'),
+    (PrimeField, 'inverse_many', 'PrimeField.inverse_many'),
+    (Curve, 'find', 'Curve.find'),
+    (Curve, 'modulate', 'Curve.modulate'),
+    (Curve, 'add', 'Curve.add'),
+    (Curve, 'multiply', 'Curve.multiply'),
+    (Curve, 'multiply_binary', 'Curve.multiply_binary'),
+    (Curve, 'multiply_fixed', 'Curve.multiply_fixed'),
+    (Curve, 'multi_multiply_fixed', 'Curve.multi_multiply_fixed'),
+    (Curve, 'multi_multiply', 'Curve.multi_multiply'),
+    (Curve, 'to_affine', 'Curve.to_affine'),
+    (Curve, 'normalize', 'Curve.normalize'),
+    (Curve, '_jacobian_double_generic', 'Curve._jacobian_double_generic'),
+    (Curve, '_jacobian_double_a0', 'Curve._jacobian_double_a0'),
+    (Curve, '_jacobian_double_a3', 'Curve._jacobian_double_a3'),
+    (Curve, 'jacobian_add', 'Curve.jacobian_add'),
+    (Curve, 'jacobian_add_affine', 'Curve.jacobian_add_affine'),
+    (Curve, 'glv_map', 'Curve.glv_map'),
+]
+
+
+class Counters:
+    def __init__(self):
+        """
+        Call counts and cumulative wall-clock seconds per operation.
+        Timings are inclusive, so Curve.multiply includes the time of the formulas it calls.
+        """
+        self.calls = Counter()
+        self.seconds = Counter()
+
+    def field_operations(self) -> Dict[str, int]:
+        """
+        Returns the field multiplications and squarings done inside the Curve formulas.
+        """
+        multiplications = squarings = 0
+        for name, (m, s) in FORMULA_COSTS.items():
+            multiplications += m * self.calls[name]
+            squarings += s * self.calls[name]
+        return {'multiplications': multiplications, 'squarings': squarings}
+
+    def report(self) -> Dict:
+        return {
+            'operations': {name: {'calls': self.calls[name], 'seconds': self.seconds[name]} for name in self.calls},
+            'field': self.field_operations(),
+        }
+
+    def __repr__(self):
+        return '\n'.join(f"{name}: {self.calls[name]} calls, {self.seconds[name] * 1000:.3f} ms"
+                         for name in sorted(self.calls))
+
+
+def counted(counters: Counters, name: str, func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counters.calls[name] += 1
+            counters.seconds[name] += perf_counter() - start
+    return wrapper
+
+
+_active = False
+
+
+@contextmanager
+def instrument() -> Iterator[Counters]:
+    """
+    Counts and times the calls to Mod, inverter and Curve operations made inside the with block:
+
+        with instrument() as counters:
+            alg.sign('message')
+        print(counters.report())
+
+    The counting wrappers are only installed for the duration of the block,
+    so the arithmetic pays nothing for instrumentation outside of it.
+    """
+    global _active
+    assert not _active, "Instrumentation cannot be nested."
+    _active = True
+    counters = Counters()
+    patches = []
+    for owner, attribute, name in TARGETS:
+        original = vars(owner)[attribute]
+        patches.append((owner, attribute, original))
+        setattr(owner, attribute, counted(counters, name, original))
+    # The inverse function is picked per modulus by xgcd.inverter, and kept by every PrimeField.
+    # Counting it rather than xgcd keeps calibration, which calls the INVERTERS directly, out of the counts.
+    for m, original in list(xgcd_module._inverters.items()):
+        patches.append((xgcd_module._inverters, m, original))
+        xgcd_module._inverters[m] = counted(counters, f"inverter.{xgcd_module.inverter_name(m)}", original)
+    for field in list(mod_module._fields.values()):
+        patches.append((field, 'invert', field.invert))
+        field.invert = xgcd_module._inverters[field.p]
+    # The doubling formula is picked per curve in Curve.__init__ and bound to the instance.
+    for curve in list(Curve.instances):
+        if 'jacobian_double' in vars(curve):
+            original = curve.jacobian_double
+            patches.append((curve, 'jacobian_double', original))
+            curve.jacobian_double = counted(counters, f"Curve.{original.__name__}", original)
+    try:
+        yield counters
+    finally:
+        for owner, attribute, original in reversed(patches):
+            if isinstance(owner, dict):
+                owner[attribute] = original
+            else:
+                setattr(owner, attribute, original)
+        # Fields created inside the block kept the counting wrapper of their inverter.
+        for field in list(mod_module._fields.values()):
+            field.invert = getattr(field.invert, '__wrapped__', field.invert)
+        # Curves created inside the block bound the counting wrapper of their doubling formula.
+        for curve in list(Curve.instances):
+            if 'jacobian_double' in vars(curve):
+                curve.jacobian_double = getattr(curve, curve.jacobian_double.__name__)
+        _active = False
@@ -0,0 +1,74 @@
+from Algorithm import ECDSA, nist256p, secp256k1
+from Curve import Curve
+from Instrument import FORMULA_COSTS, instrument
+from xgcd import _inverters
+
+
+def test_sign_counts_no_calibration():
+    """Calibration happens in ECDSA.__init__, and the chosen inverter is what gets counted."""
+    alg = ECDSA(nist256p, 'instrument')
+    assert alg.N in _inverters and alg.D['P'] in _inverters
+    with instrument() as counters:
+        r, s = alg.sign('message')
+    assert 'xgcd' not in counters.calls
+    assert sum(calls for name, calls in counters.calls.items() if name.startswith('inverter.')) >= 2
+    assert counters.seconds['Mod.inverse'] < 0.01
+    assert alg.verify('message', (r, s))
+    assert all(not hasattr(inverse, '__wrapped__') for inverse in _inverters.values())
+
+
+class Element(int):
+    """
+    A field element that counts the products it takes part in. Products of two elements that are multiples of the
+    same element by small constants, such as 8 * yy * yy, count as squarings.
+    """
+    counts = {'multiplications': 0, 'squarings': 0}
+
+    def __new__(cls, value, root=None):
+        rv = super().__new__(cls, value)
+        rv.root = rv if root is None else root
+        return rv
+
+    def __mul__(self, other):
+        if not isinstance(other, Element) and abs(other) < 16:
+            return Element(int(self) * other, self.root)
+        square = isinstance(other, Element) and other.root is self.root
+        Element.counts['squarings' if square else 'multiplications'] += 1
+        return Element(int(self) * int(other))
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        return Element(int(self) + int(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Element(int(self) - int(other))
+
+    def __rsub__(self, other):
+        return Element(int(other) - int(self))
+
+
+def test_formula_costs():
+    """Counts the products of every Curve formula and compares them with FORMULA_COSTS."""
+    curve = Curve(nist256p['A'], nist256p['B'], nist256p['P'])
+    g = curve.to_jacobian(curve.modulate((nist256p['Gx'], nist256p['Gy'])))
+    p1, p2 = curve.jacobian_double(g), curve.jacobian_double(curve.jacobian_double(g))
+    curve.reduce = lambda value: Element(int(value) % curve.P)
+    k1 = Curve(secp256k1['A'], secp256k1['B'], secp256k1['P'])
+    k1.set_endomorphism(*(secp256k1[key] for key in ('Beta', 'Lambda', 'N', 'Basis')))
+    lift = lambda point: tuple(Element(c) for c in point)
+    calls = {
+        'Curve._jacobian_double_generic': lambda: curve._jacobian_double_generic(lift(p1)),
+        'Curve._jacobian_double_a0': lambda: curve._jacobian_double_a0(lift(p1)),
+        'Curve._jacobian_double_a3': lambda: curve._jacobian_double_a3(lift(p1)),
+        'Curve.jacobian_add': lambda: curve.jacobian_add(lift(p1), lift(p2)),
+        'Curve.jacobian_add_affine': lambda: curve.jacobian_add_affine(lift(p1), lift(g)),
+        'Curve.glv_map': lambda: k1.glv_map(lift(p1)),
+    }
+    assert set(calls) == set(FORMULA_COSTS)
+    for name, call in calls.items():
+        Element.counts = {'multiplications': 0, 'squarings': 0}
+        call()
+        assert (Element.counts['multiplications'], Element.counts['squarings']) == FORMULA_COSTS[name], name
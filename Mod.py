@@ -1,11 +1,13 @@
 # Build on top of code from http://anh.cs.luc.edu/331/code/mod_arith.py
 
-from xgcd import xgcd
+from timeit import timeit
+from random import randrange
+from xgcd import batch_inverse, inverter
 
 
 class AnyMod:  # for backward compatibility
     """common super class for all Mod classes, so there is a named ancestor."""
-    pass
+    __slots__ = ()
 
 
 class Mod(AnyMod):  # AnyMod is for backwards compatibility
@@ -19,6 +21,8 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
     #  self.m is the modulus
     #  self.value is the usual smallest non-negative representative
 
+    __slots__ = ('value', 'm')
+
     def __init__(self, n=0, m=None):
         """
         Construct a Mod object.
@@ -40,6 +44,27 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
         self.m = m
         self.value = n % m
 
+    @staticmethod
+    def reduced(value, m):
+        """
+        Construct a Mod from a value already known to be in range(m), skipping the checks in __init__.
+        """
+        rv = object.__new__(Mod)
+        rv.value = value
+        rv.m = m
+        return rv
+
+    def coerce(self, other):
+        """
+        Return the integer value of other if it can be combined with self, or None.
+        That is any int, or a Mod with the same modulus.
+        """
+        if isinstance(other, Mod):
+            return other.value if other.m == self.m else None
+        if isinstance(other, int):
+            return other
+        return None
+
     def is_residue(self):
         """Return whether the square root of the number exists."""
         if self ** ((self.m - 1) >> 1) == 1:
@@ -49,60 +74,14 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
         return False  # Legendre says -1.
 
     def sqrt(self):
-        """A direct application of Tonelli-Shanks algorithm. Returns a tuple of both roots"""
-        assert self.is_residue(), 'Square roots can only be taken for quadratic residues.'
-        if self.value == 0:
-            sqrt = Mod(0, self.m)
-            return sqrt, -sqrt
-        if self.m == 2:
-            sqrt = Mod(2, self.m)
-            return sqrt, -sqrt
-        if self.m & 0b11 == 3:
-            sqrt = self ** ((self.m + 1) >> 2)
-            return sqrt, -sqrt
-
-        # Reduce all the powers of 2 from p - 1.
-        s = self.m - 1
-        e = 0
-        while s & 1 == 0:
-            s = s >> 1
-            e += 1
-
-        # Find some 'n' with a legendre symbol n|p = -1.
-        temp = self.value
-        self.value = 2
-        while self.is_residue():
-            self.value += 1
-        n = self.value
-        self.value = temp
-
-        # Read the paper "Square roots from 1; 24, 51, 10 to Dan Shanks"
-        # by Ezra Brown for more information.
-
-        # x is a guess of the square root that gets better with each iteration.
-        # b is the "fudge factor" - by how much we're off with the guess.
-        # The invariant x^2 = ab (mod p) is maintained throughout the loop.
-        # g is used for successive powers of n to update both a and b.
-        # r is the exponent - decreases with each update
-        x = pow(self.value, (s + 1) >> 1, self.m)
-        b = pow(self.value, s, self.m)
-        g = pow(n, s, self.m)
-        r = e
-        while True:
-            t = b
-            m = 0
-            for m in range(r):
-                if t == 1:
-                    break
-                t = pow(t, 2, self.m)
-            if m == 0:
-                sqrt = Mod(x, self.m)
-                return sqrt, -sqrt
-            gs = pow(g, 2 ** (r - m - 1), self.m)
-            g = (gs * gs) % self.m
-            x = (x * gs) % self.m
-            b = (b * g) % self.m
-            r = m
+        """
+        Returns a tuple of both square roots, using the square root state cached per modulus,
+        see PrimeField.sqrt.
+        """
+        root = prime_field(self.m).sqrt(self.value)
+        assert root is not None, 'Square roots can only be taken for quadratic residues.'
+        sqrt = Mod.reduced(root, self.m)
+        return sqrt, -sqrt
 
     def __str__(self):  # used by str built-in function, which is used by print
         """Return an informal string representation of object"""
@@ -118,43 +97,43 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
 
     def __add__(self, other):  # used by + infix operand
         """Return self + other, if defined"""
-        other = try_like(other, self)
+        other = self.coerce(other)
         if other is None:
             return NotImplemented
-        return Mod(self.value + other.value, self.m)
+        return Mod.reduced((self.value + other) % self.m, self.m)
 
     def __sub__(self, other):  # used by - infix operand
         """Return self - other, if defined"""
-        other = try_like(other, self)
+        other = self.coerce(other)
         if other is None:
             return NotImplemented
-        return Mod(self.value - other.value, self.m)
+        return Mod.reduced((self.value - other) % self.m, self.m)
 
     def __neg__(self):  # used by - unary operand
         """Return -self"""
-        return Mod(-self.value, self.m)
+        return Mod.reduced(-self.value % self.m, self.m)
 
     def __mul__(self, other):  # used by * infix operand
         """Return self * other, if defined"""
-        other = try_like(other, self)
+        other = self.coerce(other)
         if other is None:
             return NotImplemented
-        return Mod(self.value * other.value, self.m)
+        return Mod.reduced(self.value * other % self.m, self.m)
 
     def __truediv__(self, other):
         """Return self/other if other.inverse() is defined."""
-        other = try_like(other, self)
+        other = self.coerce(other)
         if other is None:
             return NotImplemented
-        return self * other.inverse()
+        return self * Mod.reduced(other % self.m, self.m).inverse()
 
     def __eq__(self, other):  # used by == infix operand
         """Return self == other, if defined
         Allow conversion of int to same Mod type before test.  Good idea?"""
-        other = try_like(other, self)
+        other = self.coerce(other)
         if other is None:
             return NotImplemented
-        return other.value == self.value
+        return other % self.m == self.value
 
     def __ne__(self, other):  # used by != infix operand
         """Return self != other, if defined"""
@@ -186,7 +165,7 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
         if n < 0:
             s = s.inverse()
             n = abs(n)
-        return Mod(pow(s.value, n, s.m), s.m)
+        return Mod.reduced(pow(s.value, n, s.m), s.m)
 
     def __int__(self):
         """Return lowest non-negative integer representative."""
@@ -208,11 +187,296 @@ class Mod(AnyMod):  # AnyMod is for backwards compatibility
         return self.m
 
     def inverse(self):
-        """Return the multiplicative inverse or else raise a ValueError."""
-        (g, x, y) = xgcd(self.value, self.m)
-        if g == 1:
-            return Mod(x, self.m)
-        raise ValueError("Value not invertible.")
+        """
+        Return the multiplicative inverse or else raise a ValueError.
+        Uses the inversion algorithm that calibrated fastest for this modulus, see xgcd.inverter.
+        """
+        return Mod.reduced(inverter(self.m)(self.value, self.m), self.m)
+
+
+class PrimeField:
+    """
+    A prime field context, which owns the modulus and does arithmetic on plain ints in range(p).
+    This skips the allocation and type coercion that every Mod operation pays for,
+    and is what the hot loops should use. Mod stays the friendly interface.
+    """
+
+    __slots__ = ('p', 'reduce', 'invert', 'roots')
+
+    def __init__(self, p):
+        assert isinstance(p, int) and p > 1, 'Need an integer modulus > 1'
+        self.p = p
+        self.reduce = reducer(p)
+        self.invert = inverter(p, prime=True)
+        self.roots = None  # Tonelli-Shanks state, see sqrt_state.
+
+    def __call__(self, n):
+        """Return n as a Mod of this field."""
+        return Mod.reduced(int(n) % self.p, self.p)
+
+    def __repr__(self):
+        return f"PrimeField({self.p})"
+
+    def add(self, a, b):
+        return (a + b) % self.p
+
+    def sub(self, a, b):
+        return (a - b) % self.p
+
+    def neg(self, a):
+        return -a % self.p
+
+    def mul(self, a, b):
+        return self.reduce(a * b)
+
+    def sqr(self, a):
+        return self.reduce(a * a)
+
+    def pow(self, a, n):
+        return pow(a, n, self.p)
+
+    def inverse(self, a):
+        """Return the multiplicative inverse of a or else raise a ValueError."""
+        return self.invert(a, self.p)
+
+    def div(self, a, b):
+        return self.reduce(a * self.inverse(b))
+
+    def inverse_many(self, values):
+        """Return the inverses of all the values, paying for a single inversion."""
+        return batch_inverse(values, self.p)
+
+    def sqrt_state(self):
+        """
+        Returns (s, e, z) with p - 1 = s * 2**e, s odd, and z = n**s for a quadratic non-residue n.
+        This only depends on p, so it is computed on first use and kept.
+        """
+        if self.roots is None:
+            p = self.p
+            s, e = p - 1, 0
+            while s and not s & 1:
+                s >>= 1
+                e += 1
+            n = 2
+            while n < p and pow(n, (p - 1) >> 1, p) != p - 1:  # Euler's criterion says n is a residue.
+                n += 1
+            self.roots = (s, e, pow(n, s, p))
+        return self.roots
+
+    def sqrt(self, a):
+        """
+        Returns a square root of a, or None if a is not a quadratic residue.
+        Primes p = 3 (mod 4) and p = 5 (mod 8) get a single exponentiation, all others Tonelli-Shanks.
+        The root is checked by squaring, which also replaces the separate Legendre symbol computation.
+        """
+        p = self.p
+        a %= p
+        if a == 0 or p == 2:
+            return a
+        if p & 3 == 3:
+            root = pow(a, (p + 1) >> 2, p)
+        elif p & 7 == 5:  # Atkin's algorithm.
+            b = pow(2 * a, (p - 5) >> 3, p)
+            i = 2 * a * b * b % p
+            root = a * b * (i - 1) % p
+        else:
+            root = self.tonelli_shanks(a)
+            if root is None:
+                return None
+        return root if root * root % p == a else None
+
+    def tonelli_shanks(self, a):
+        """
+        Tonelli-Shanks square root of a nonzero a, or None if a is not a quadratic residue.
+        Read the paper "Square roots from 1; 24, 51, 10 to Dan Shanks" by Ezra Brown for more information.
+        """
+        p = self.p
+        s, e, z = self.sqrt_state()
+        # x is a guess of the square root that gets better with each iteration.
+        # b is the "fudge factor" - by how much we're off with the guess.
+        # The invariant x^2 = ab (mod p) is maintained throughout the loop.
+        # g is used for successive powers of n to update both a and b.
+        # r is the exponent - decreases with each update
+        x = pow(a, (s + 1) >> 1, p)
+        b = pow(a, s, p)
+        g = z
+        r = e
+        while b != 1:
+            t = b
+            m = 0
+            while t != 1:
+                t = t * t % p
+                m += 1
+                if m == r:
+                    return None  # b has order 2**r, so a is a non-residue.
+            gs = pow(g, 1 << (r - m - 1), p)
+            g = gs * gs % p
+            x = x * gs % p
+            b = b * g % p
+            r = m
+        return x
+
+    def sqrt_many(self, values):
+        """Returns a square root or None for each of the values, sharing the cached state."""
+        sqrt = self.sqrt
+        return [sqrt(a) for a in values]
+
+
+_fields = {}
+
+
+def prime_field(p):
+    """
+    Returns the PrimeField for p, shared by everything that works modulo p.
+    """
+    if p not in _fields:
+        _fields[p] = PrimeField(p)
+    return _fields[p]
+
+
+def sqrt_many(values):
+    """
+    Return both square roots of each of a list of Mods sharing one modulus, or None for non-residues.
+    """
+    if not values:
+        return []
+    m = values[0].m
+    assert all(v.m == m for v in values), 'moduli do not match'
+    rv = []
+    for root in prime_field(m).sqrt_many([v.value for v in values]):
+        if root is None:
+            rv.append(None)
+        else:
+            rv.append((Mod.reduced(root, m), Mod.reduced(-root % m, m)))
+    return rv
+
+
+# The most signed powers of two in c for which folding by shifts still pays off.
+SPECIAL_FORM_MAX_TERMS = 8
+
+
+def special_form(m):
+    """
+    Returns (k, c) if m = 2**k - c with c at most k // 2 bits long or a sum of at most SPECIAL_FORM_MAX_TERMS
+    signed powers of two, the shape of the Mersenne, pseudo-Mersenne and Solinas primes used by the standard
+    curves, or None otherwise, so that generic moduli such as the Brainpool primes go straight to %.
+    """
+    k = m.bit_length()
+    c = (1 << k) - m
+    if 0 < c < 1 << (k - 1) and (c.bit_length() <= k // 2 or len(signed_bits(c)) <= SPECIAL_FORM_MAX_TERMS):
+        return k, c
+    return None
+
+
+def signed_bits(c):
+    """Returns c as a sum of signed powers of two [(shift, sign), ...] in non-adjacent form."""
+    rv = []
+    e = 0
+    while c:
+        if c & 1:
+            d = 2 - (c & 3)  # 1 if c = 1 mod 4, -1 if c = 3 mod 4.
+            rv.append((e, d))
+            c -= d
+        c >>= 1
+        e += 1
+    return rv
+
+
+def fold_reducers(m):
+    """
+    Returns shift-and-add candidates for x % m when m = 2**k - c, using 2**k = c (mod m) to fold the
+    bits above k back onto the low bits until they run out. Negative x falls back to %.
+    """
+    form = special_form(m)
+    if form is None:
+        return {}
+    k, c = form
+    mask = (1 << k) - 1
+
+    def fold_mul(x):
+        """Folds by multiplying the high part by c, best when c is a single machine word or two."""
+        while x >> k > 0:
+            x = (x & mask) + (x >> k) * c
+        return x if 0 <= x < m else x % m
+
+    terms = signed_bits(c)
+
+    def fold_shift(x):
+        """Folds by adding and subtracting shifted copies of the high part, best when c is sparse."""
+        while x >> k > 0:
+            h = x >> k
+            x &= mask
+            for e, d in terms:
+                if d > 0:
+                    x += h << e
+                else:
+                    x -= h << e
+        return x if 0 <= x < m else x % m
+
+    rv = {'fold_shift': fold_shift} if len(terms) <= SPECIAL_FORM_MAX_TERMS else {}
+    if c == 1:
+        def fold_mersenne(x):
+            """Folding modulo a Mersenne prime needs no multiplication at all."""
+            while x >> k > 0:
+                x = (x & mask) + (x >> k)
+            return x if 0 <= x < m else x % m
+        rv['fold_mersenne'] = fold_mersenne
+    elif c.bit_length() <= k // 2:
+        rv['fold_mul'] = fold_mul
+    return rv
+
+
+def calibrate_reducers(m, samples=100, number=3):
+    """
+    Times the generic % against every shift-and-add candidate for m on random products.
+    Returns {name: (function, seconds)}. Candidates that disagree with % are left out.
+    """
+    values = [randrange(m) * randrange(m) for _ in range(samples)]
+    candidates = {'generic': m.__rmod__}
+    candidates.update(fold_reducers(m))
+    rv = {}
+    for name, reduce in candidates.items():
+        if any(reduce(x) != x % m for x in values):
+            continue
+        rv[name] = reduce, timeit(lambda: [reduce(x) for x in values], number=number)
+    return rv
+
+
+_reducers = {}
+
+
+def reducer(m):
+    """
+    Returns the fastest function computing x % m on this machine, calibrating once per modulus.
+    This is a shift-and-add reduction for special-form moduli when it beats the generic %.
+    """
+    if m not in _reducers:
+        timings = calibrate_reducers(m)
+        _reducers[m] = min(timings.values(), key=lambda t: t[1])[0]
+    return _reducers[m]
+
+
+def reducer_name(m):
+    """Returns 'generic' or the name in fold_reducers of the reduction used for modulus m."""
+    name = reducer(m).__name__
+    return name if name in fold_reducers(m) else 'generic'
+
+
+def use_reducer(m, name):
+    """Skips the calibration for modulus m, using a previous result such as the one of reducer_name."""
+    _reducers[m] = m.__rmod__ if name == 'generic' else fold_reducers(m)[name]
+
+
+def inverse_many(values):
+    """
+    Return the inverses of a list of Mods sharing one modulus, paying for a single inversion.
+    Raises a ValueError if any of them is not invertible.
+    """
+    if not values:
+        return []
+    m = values[0].m
+    assert all(v.m == m for v in values), 'moduli do not match'
+    return [Mod(v, m) for v in batch_inverse([v.value for v in values], m)]
 
 
 def like(val, model):
@@ -0,0 +1,352 @@
+from typing import Iterable, List, Optional, Tuple
+import numpy
+from Curve import JACOBIAN_O, JacobianPoint
+from Mod import Mod
+
+LIMB_BITS = 28  # Products of two limbs summed over 19 limbs (P-521) still fit in an int64.
+LIMB_MASK = (1 << LIMB_BITS) - 1
+JacobianArrays = Tuple['ModArray', 'ModArray', 'ModArray']
+
+
+def to_limbs(values: Iterable[int], count: int) -> numpy.ndarray:
+    """
+    Splits non-negative ints below 2**(LIMB_BITS * count) into a (count, len(values)) array of limbs,
+    least significant limb first, so that every limb position is one contiguous vector.
+    """
+    values = numpy.array(list(values), dtype=object)
+    limbs = numpy.empty((count, len(values)), dtype=numpy.int64)
+    for i in range(count):
+        limbs[i] = (values >> (LIMB_BITS * i)) & LIMB_MASK
+    return limbs
+
+
+def from_limbs(limbs: numpy.ndarray) -> List[int]:
+    values = numpy.zeros(limbs.shape[1], dtype=object)
+    for row in limbs[::-1]:
+        values = (values << LIMB_BITS) | row.astype(object)
+    return [int(v) for v in values]
+
+
+def normalize(t: numpy.ndarray) -> numpy.ndarray:
+    """
+    Propagates the carries of t in place, leaving limbs in [0, 2**LIMB_BITS) except for the last one,
+    which keeps the sign and anything that overflows. Works with negative limbs too.
+    """
+    for i in range(len(t) - 1):
+        t[i + 1] += t[i] >> LIMB_BITS
+        t[i] &= LIMB_MASK
+    return t
+
+
+class LimbField:
+    __slots__ = ('p', 'count', 'p_limbs', 'p_inv', 'r', 'r_inv')
+
+    def __init__(self, p: int):
+        """
+        The multi-limb Montgomery representation of the field of integers modulo the odd p:
+        x is stored as x * R mod p with R = 2**(LIMB_BITS * count), which turns reduction after a
+        multiplication into count rounds of vector multiply-adds instead of a division.
+        """
+        assert p % 2 == 1, "Montgomery reduction needs an odd modulus."
+        self.p = p
+        self.count = (p.bit_length() + LIMB_BITS - 1) // LIMB_BITS
+        self.p_limbs = to_limbs([p], self.count)
+        self.p_inv = -pow(p, -1, 1 << LIMB_BITS) % (1 << LIMB_BITS)
+        self.r = (1 << (LIMB_BITS * self.count)) % p
+        self.r_inv = pow(self.r, -1, p)
+
+    def subtract_p(self, t: numpy.ndarray) -> numpy.ndarray:
+        """Maps normalized limbs of values in [0, 2p) to [0, p)."""
+        d = normalize(t[:self.count] - self.p_limbs)
+        if len(t) > self.count:  # A carry out of the top limb.
+            d[-1] += t[self.count] << LIMB_BITS
+        return numpy.where(d[-1] >= 0, d, t[:self.count])
+
+    def add(self, a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+        return self.subtract_p(normalize(a + b))
+
+    def sub(self, a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+        d = normalize(a - b)
+        return numpy.where(d[-1] >= 0, d, normalize(d + self.p_limbs))
+
+    def mul(self, a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+        """
+        Montgomery multiplication a * b / R mod p: a schoolbook product followed by word-by-word REDC.
+        Columns are only carried once at the end, every limb stays below 2 * count * 2**56 on the way.
+        """
+        count = self.count
+        size = max(a.shape[1], b.shape[1])
+        t = numpy.zeros((2 * count + 1, size), dtype=numpy.int64)
+        row = numpy.empty((count, size), dtype=numpy.int64)  # Reused for every partial product.
+        m = numpy.empty(size, dtype=numpy.int64)
+        for i in range(count):
+            numpy.multiply(a[i], b, out=row)
+            t[i:i + count] += row
+        for i in range(count):
+            numpy.bitwise_and(t[i], LIMB_MASK, out=m)
+            m *= self.p_inv
+            m &= LIMB_MASK
+            numpy.multiply(m, self.p_limbs, out=row)
+            t[i:i + count] += row
+            t[i] >>= LIMB_BITS
+            t[i + 1] += t[i]
+        return self.subtract_p(normalize(t[count:]))
+
+    def encode(self, values: Iterable[int]) -> numpy.ndarray:
+        return to_limbs((v * self.r % self.p for v in values), self.count)
+
+    def decode(self, limbs: numpy.ndarray) -> List[int]:
+        return [v * self.r_inv % self.p for v in from_limbs(limbs)]
+
+
+_limb_fields = {}
+
+
+def limb_field(p: int) -> LimbField:
+    if p not in _limb_fields:
+        _limb_fields[p] = LimbField(p)
+    return _limb_fields[p]
+
+
+class ModArray:
+    __slots__ = ('limbs', 'field')
+
+    def __init__(self, limbs: numpy.ndarray, field: LimbField):
+        """
+        A vector of elements of the same prime field, operated on all at once.
+        Use from_ints or from_mods to build one, limbs are in the Montgomery representation of field.
+        """
+        self.limbs = limbs
+        self.field = field
+
+    @staticmethod
+    def from_ints(values: Iterable[int], p: int) -> 'ModArray':
+        field = limb_field(p)
+        return ModArray(field.encode(v % p for v in values), field)
+
+    @staticmethod
+    def from_mods(values: List[Mod]) -> 'ModArray':
+        assert values, "Can't infer the modulus of an empty list."
+        p = values[0].m
+        assert all(v.m == p for v in values), 'moduli do not match'
+        return ModArray.from_ints((v.value for v in values), p)
+
+    @staticmethod
+    def full(value: int, size: int, p: int) -> 'ModArray':
+        field = limb_field(p)
+        return ModArray(numpy.repeat(field.encode([value % p]), size, axis=1), field)
+
+    def to_ints(self) -> List[int]:
+        return self.field.decode(self.limbs)
+
+    def to_mods(self) -> List[Mod]:
+        return [Mod(v, self.field.p) for v in self.to_ints()]
+
+    def coerce(self, other) -> numpy.ndarray:
+        """
+        Returns the limbs of a ModArray of the same field, or of an int broadcast to every element.
+        """
+        if isinstance(other, ModArray):
+            assert other.field is self.field, 'moduli do not match'
+            return other.limbs
+        assert isinstance(other, int), "A ModArray only operates with ModArrays and ints."
+        return self.field.encode([other % self.field.p])
+
+    def __len__(self):
+        return self.limbs.shape[1]
+
+    def __getitem__(self, i: int) -> Mod:
+        return Mod(self.field.decode(self.limbs[:, i:i + 1])[0], self.field.p)
+
+    def __add__(self, other) -> 'ModArray':
+        return ModArray(self.field.add(self.limbs, self.coerce(other)), self.field)
+
+    def __sub__(self, other) -> 'ModArray':
+        return ModArray(self.field.sub(self.limbs, self.coerce(other)), self.field)
+
+    def __mul__(self, other) -> 'ModArray':
+        return ModArray(self.field.mul(self.limbs, self.coerce(other)), self.field)
+
+    def __neg__(self) -> 'ModArray':
+        return ModArray(self.field.sub(numpy.zeros_like(self.limbs), self.limbs), self.field)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other) -> 'ModArray':
+        return ModArray(self.field.sub(self.coerce(other), self.limbs), self.field)
+
+    def double(self) -> 'ModArray':
+        return self + self
+
+    def is_zero(self) -> numpy.ndarray:
+        """A boolean per element, elements are always fully reduced so zero has all-zero limbs."""
+        return ~self.limbs.any(axis=0)
+
+    def where(self, condition: numpy.ndarray, other: 'ModArray') -> 'ModArray':
+        """Takes self's element where condition is true and other's everywhere else."""
+        return ModArray(numpy.where(condition, self.limbs, self.coerce(other)), self.field)
+
+    def __repr__(self):
+        return f"ModArray({self.to_ints()}, {self.field.p})"
+
+
+def jacobian_double(x: ModArray, y: ModArray, z: ModArray, a: int) -> JacobianArrays:
+    """
+    Doubles every point (x[i], y[i], z[i]) with the same formulas as Curve's scalar doublings, picked by a.
+    Points with y = 0 or z = 0 come out with z = 0 without any branch.
+    """
+    yy = y * y
+    s = (x * yy).double().double()
+    if a == 0:
+        xx = x * x
+        t = xx.double() + xx
+    elif a % x.field.p == x.field.p - 3:
+        zz = z * z
+        t = (x - zz) * (x + zz)
+        t = t.double() + t
+    else:
+        xx = x * x
+        zz = z * z
+        t = xx.double() + xx + zz * zz * a
+    x3 = t * t - s.double()
+    yyyy = (yy * yy).double()
+    y3 = t * (s - x3) - yyyy.double().double()
+    z3 = (y * z).double()
+    return x3, y3, z3
+
+
+def jacobian_add(p1: JacobianArrays, p2: JacobianArrays, a: int, affine: bool = False) -> JacobianArrays:
+    """
+    Adds the points of p1 and p2 pairwise (add-2007-bl, or madd-2007-bl when affine says p2 has z = 1).
+    The special cases of the scalar formulas are handled with masks: lanes where either point is O take the
+    other one, and lanes adding a point to itself take its doubling, which is only computed if there are any.
+    """
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+    z1z1 = z1 * z1
+    u2 = x2 * z1z1
+    s2 = y2 * z1 * z1z1
+    if affine:
+        u1, s1 = x1, y1
+    else:
+        z2z2 = z2 * z2
+        u1 = x1 * z2z2
+        s1 = y1 * z2 * z2z2
+    h = u2 - u1
+    r = s2 - s1
+    hh = h * h
+    hhh = h * hh
+    v = u1 * hh
+    x3 = r * r - hhh - v.double()
+    y3 = r * (v - x3) - s1 * hhh
+    z3 = z1 * h if affine else z1 * z2 * h
+    o1, o2 = z1.is_zero(), z2.is_zero()
+    same = h.is_zero() & r.is_zero() & ~o1 & ~o2
+    if same.any():
+        x3, y3, z3 = (c.where(~same, d) for c, d in zip((x3, y3, z3), jacobian_double(x1, y1, z1, a)))
+    x3, y3, z3 = (c.where(~o1, d) for c, d in zip((x3, y3, z3), p2))
+    x3, y3, z3 = (c.where(~o2 | o1, d) for c, d in zip((x3, y3, z3), p1))
+    return x3, y3, z3
+
+
+def to_arrays(points: List[JacobianPoint], p: int) -> JacobianArrays:
+    return tuple(ModArray.from_ints((q[i] for q in points), p) for i in range(3))
+
+
+def from_arrays(arrays: JacobianArrays, o: Optional[JacobianPoint] = None) -> List[JacobianPoint]:
+    """Turns arrays back into a list of points, replacing every point with z = 0 by o if given."""
+    points = list(zip(*(c.to_ints() for c in arrays)))
+    if o is not None:
+        points = [o if q[2] == 0 else q for q in points]
+    return points
+
+
+class PointArray:
+    def __init__(self, coordinates: JacobianArrays, a: int):
+        """
+        Independent Jacobian points of the curve with coefficient a, processed together one formula at a time.
+        Converting to and from Python ints costs about as much as a point addition, so a PointArray pays off
+        when the points go through many operations before being converted back, as in multiply.
+        """
+        self.coordinates = coordinates
+        self.a = a
+
+    @staticmethod
+    def from_points(points: List[JacobianPoint], a: int, p: int) -> 'PointArray':
+        return PointArray(to_arrays(points, p), a)
+
+    def to_points(self) -> List[JacobianPoint]:
+        return from_arrays(self.coordinates, JACOBIAN_O)
+
+    def __len__(self):
+        return len(self.coordinates[0])
+
+    def double(self) -> 'PointArray':
+        return PointArray(jacobian_double(*self.coordinates, self.a), self.a)
+
+    def __add__(self, other: 'PointArray') -> 'PointArray':
+        return PointArray(jacobian_add(self.coordinates, other.coordinates, self.a), self.a)
+
+    def add_affine(self, other: 'PointArray') -> 'PointArray':
+        """Addition where every point of other is known to have z = 1 or be O."""
+        return PointArray(jacobian_add(self.coordinates, other.coordinates, self.a, affine=True), self.a)
+
+    def select(self, table: numpy.ndarray, digits: numpy.ndarray) -> 'PointArray':
+        """Picks entry digits[i] of lane i from table, an array of shape (entries, 3, limbs, lanes)."""
+        lanes = numpy.arange(len(self))
+        picked = table[digits, :, :, lanes]  # (lanes, 3, limbs)
+        field = self.coordinates[0].field
+        return PointArray(tuple(ModArray(numpy.ascontiguousarray(picked[:, c].T), field) for c in range(3)), self.a)
+
+    def multiply(self, scalars: List[int], window: int = 4) -> 'PointArray':
+        """
+        Multiplies lane i by scalars[i] with a fixed window: a table of 0..2**window - 1 times every point,
+        then window doublings and one addition of a looked up entry per window for all the lanes at once.
+        Every lane goes through the same sequence of formulas whatever its scalar.
+        A negative scalar multiplies the negated point by -k, as Curve.multiply does.
+        """
+        assert len(scalars) == len(self), "One scalar per point is needed."
+        scalars = [int(k) for k in scalars]
+        x, y, z = self.coordinates
+        base = PointArray((x, (-y).where(numpy.array([k < 0 for k in scalars]), y), z), self.a)
+        field = x.field
+        o = PointArray(tuple(ModArray.full(c, len(self), field.p) for c in JACOBIAN_O), self.a)
+        entries = [o, base]
+        for _ in range(2, 1 << window):
+            entries.append(entries[-1] + base)
+        table = numpy.stack([numpy.stack([c.limbs for c in e.coordinates]) for e in entries])
+        scalars = numpy.array([abs(k) for k in scalars], dtype=object)
+        bits = max(1, max(k.bit_length() for k in scalars))
+        q = o
+        for shift in range((bits - 1) // window * window, -1, -window):
+            for _ in range(window):
+                q = q.double()
+            digits = ((scalars >> shift) & ((1 << window) - 1)).astype(numpy.int64)
+            q = q + self.select(table, digits)
+        return q
+
+
+def ladder(xs: ModArray, k: int, bits: int, a: int, b: int) -> Tuple[ModArray, ModArray]:
+    """
+    Curve.ladder for every x in xs at once. All the lanes share the bits of k, so they swap together and
+    need no masks. Returns (X, Z) arrays, Z being 0 in lanes where k * P = O.
+    """
+    p = xs.field.p
+    one, zero = ModArray.full(1, len(xs), p), ModArray.full(0, len(xs), p)
+    b4 = 4 * b % p
+    x0, z0, x1, z1 = one, zero, xs, one
+    for i in range(bits - 1, -1, -1):
+        if (k >> i) & 1:
+            x0, z0, x1, z1 = x1, z1, x0, z0
+        u, v = x0 * z1, x1 * z0
+        zz = z0 * z1
+        d = (u - v) * (u - v)
+        x1n, z1n = (u + v).double() * (x0 * x1 + zz * a) + (zz * zz) * b4 - xs * d, d
+        xx, zz = x0 * x0, z0 * z0
+        t = xx - zz * a
+        x0, z0 = t * t - ((x0 * z0) * zz) * (2 * b4), (x0 * (xx + zz * a) + (z0 * zz) * b).double().double() * z0
+        x1, z1 = x1n, z1n
+        if (k >> i) & 1:
+            x0, z0, x1, z1 = x1, z1, x0, z0
+    return x0, z0
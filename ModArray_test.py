@@ -0,0 +1,38 @@
+from random import Random
+from Algorithm import nist256p, nist521p
+from Curve import Curve, optional_numpy
+from Mod import Mod
+
+PRIMES = (97, 2**127 - 1, nist256p['P'], nist521p['P'])
+
+
+def test_mod_array_matches_mod():
+    if optional_numpy() is None:
+        return
+    from ModArray import ModArray
+    rng = Random(21)
+    for p in PRIMES:
+        xs = [0, 1, p - 1] + [rng.randrange(p) for _ in range(61)]
+        ys = [p - 1, 0, p - 1] + [rng.randrange(p) for _ in range(61)]
+        a, b = ModArray.from_ints(xs, p), ModArray.from_ints(ys, p)
+        mx, my = [Mod(x, p) for x in xs], [Mod(y, p) for y in ys]
+        assert (a + b).to_mods() == [x + y for x, y in zip(mx, my)]
+        assert (a - b).to_mods() == [x - y for x, y in zip(mx, my)]
+        assert (a * b).to_mods() == [x * y for x, y in zip(mx, my)]
+        assert (-a).to_mods() == [-x for x in mx]
+        assert (a * 3 + 5).to_mods() == [x * 3 + 5 for x in mx]
+
+
+def test_point_array_multiply():
+    """Vectorized multiply_many against one multiply per point, negative and oversized scalars included."""
+    if optional_numpy() is None:
+        return
+    rng = Random(22)
+    curve = Curve(nist256p['A'], nist256p['B'], nist256p['P'])
+    g = curve.modulate((nist256p['Gx'], nist256p['Gy']))
+    n = nist256p['N']
+    points = [curve.multiply(g, rng.randrange(1, n)) for _ in range(8)] * 3
+    scalars = [0, 1, -1, 2, -2, n, -n, n + 5, -n - 5, 1 << 300, -(1 << 300)]
+    scalars += [rng.randrange(-n, n) for _ in range(len(points) - len(scalars))]
+    expected = [curve.multiply(p, k, check=False) for p, k in zip(points, scalars)]
+    assert curve.multiply_many(points, scalars, False, True) == expected
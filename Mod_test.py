@@ -0,0 +1,24 @@
+from random import Random
+from Mod import fold_reducers, reducer, special_form
+
+BRAINPOOL_P256 = 0xA9FB57DBA1EEA9BC3E660A909D838D726E3BF623D52620282013481D1F6E5377
+SPECIAL_PRIMES = (2**224 - 2**96 + 1, 2**256 - 2**224 + 2**192 + 2**96 - 1, 2**384 - 2**128 - 2**96 + 2**32 - 1,
+                  2**521 - 1, 2**256 - 2**32 - 977, 2**255 - 19)
+
+
+def test_special_form():
+    """The standard pseudo-Mersenne and Solinas primes fold, generic ones are left to %."""
+    for p in SPECIAL_PRIMES:
+        assert special_form(p) is not None, hex(p)
+    assert special_form(BRAINPOOL_P256) is None
+    assert fold_reducers(BRAINPOOL_P256) == {}
+    assert reducer(BRAINPOOL_P256) == BRAINPOOL_P256.__rmod__
+
+
+def test_fold_reducers():
+    rng = Random(8)
+    for p in SPECIAL_PRIMES:
+        values = [0, 1, p - 1, p, p + 1, (p - 1) ** 2, -1, -p - 5] + [rng.randrange(p * p) for _ in range(50)]
+        for name, reduce in fold_reducers(p).items():
+            for x in values:
+                assert reduce(x) == x % p, (name, hex(p), x)
@@ -0,0 +1,189 @@
+from typing import Optional, Tuple
+from Curve import O, FixedBaseTable
+from Edwards import EdwardsCurve
+from Mod import Mod, prime_field
+
+MontgomeryPoint = Tuple[Mod, Mod]  # Affine (u, v), or O.
+ProjectiveX = Tuple[int, int]  # (X, Z) standing for u = X / Z, Z = 0 being O.
+
+curve25519 = {  # RFC 7748, v**2 = u**3 + 486662 * u**2 + u over 2**255 - 19.
+    'P': 2 ** 255 - 19,
+    'A': 486662,
+    'B': 1,
+    'Gu': 9,
+    'Gv': 0x20ae19a1b8a086b4e01edd2c7748d14c923d4d7e6d7c61b229e9c5a27eced3d9,
+    'N': 2 ** 252 + 27742317777372353535851937790883648493,  # Order of G, the curve has cofactor 8.
+    'H': 8,
+}
+
+
+class MontgomeryCurve:
+    def __init__(self, a: int, b: int, p: int):
+        """
+        Initializes the Montgomery curve b*v**2 = u**3 + a*u**2 + u over the integers modulo p.
+        Multiplication is the u-only Montgomery ladder, one differential addition and one doubling per bit
+        with the same operations for every bit, from which v is recovered at the end when needed.
+        """
+        assert isinstance(p, int) and p > 2, "Only odd integer values of p are allowed."
+        self.P = p
+        self.A = Mod(a, p)
+        self.B = Mod(b, p)
+        self.field = prime_field(p)
+        self.reduce = self.field.reduce
+        self.a24 = (self.A - 2) / 4  # RFC 7748 writes z2 = E * (AA + a24 * E) with a24 = (A - 2) / 4.
+        self._edwards: Optional[EdwardsCurve] = None
+
+    def find(self, p: MontgomeryPoint) -> bool:
+        if p == O:
+            return True
+        u, v = p
+        return self.B * v * v == u * u * u + self.A * u * u + u
+
+    def modulate(self, p: MontgomeryPoint) -> MontgomeryPoint:
+        """
+        Makes sure that the point p is modulo P and lies on the curve.
+        """
+        rv = O if p == O else (Mod(int(p[0]), self.P), Mod(int(p[1]), self.P))
+        if not self.find(rv):
+            raise ValueError(f"The point ({p[0]}, {p[1]}) was not found on the Montgomery curve.")
+        return rv
+
+    def ladder(self, u: int, k: int, bits: Optional[int] = None) -> Tuple[ProjectiveX, ProjectiveX]:
+        """
+        The Montgomery ladder of RFC 7748 over bits bits of k (k's length by default), swapping with masks.
+        Returns the projective u coordinates of k * P and (k + 1) * P, given only u = u(P).
+        """
+        red, a24, p = self.reduce, self.a24.value, self.P
+        u = u % p
+        x2, z2, x3, z3 = 1, 0, u, 1
+        swap = 0
+        for i in range((bits or k.bit_length()) - 1, -1, -1):
+            bit = (k >> i) & 1
+            mask = -(swap ^ bit)
+            t = mask & (x2 ^ x3); x2 ^= t; x3 ^= t
+            t = mask & (z2 ^ z3); z2 ^= t; z3 ^= t
+            swap = bit
+            a, b = x2 + z2, x2 - z2
+            aa, bb = red(a * a), red(b * b)
+            e = aa - bb
+            c, d = x3 + z3, x3 - z3
+            da, cb = red(d * a), red(c * b)
+            x3, z3 = red((da + cb) * (da + cb)), red(u * red((da - cb) * (da - cb)))
+            x2, z2 = red(aa * bb), red(e * (aa + red(a24 * e)))
+        mask = -swap
+        t = mask & (x2 ^ x3); x2 ^= t; x3 ^= t
+        t = mask & (z2 ^ z3); z2 ^= t; z3 ^= t
+        return (x2, z2), (x3, z3)
+
+    def multiply_u(self, u: int, k: int, bits: Optional[int] = None) -> Optional[int]:
+        """
+        Returns u(k * P) from u(P), or None if k * P = O.
+        """
+        (x, z), _ = self.ladder(u, k, bits)
+        return x * self.field.inverse(z) % self.P if z else None
+
+    def multiply(self, p: MontgomeryPoint, k: int, check: bool = True) -> MontgomeryPoint:
+        """
+        Full multiplication: the ladder gives u(k * P) and u((k + 1) * P), and v(k * P) follows from
+        the Okeya-Sakurai formula without any further scalar multiplication.
+        """
+        if check:
+            p = self.modulate(p)
+        if p == O:
+            return O
+        if k < 0:
+            p, k = (p[0], -p[1]), -k
+        u, v = p[0].value, p[1].value
+        (x1, z1), (x2, z2) = self.ladder(u, k)
+        if z1 == 0:
+            return O
+        if z2 == 0:  # (k + 1) * P = O, so k * P = -P.
+            return p[0], -p[1]
+        if v == 0:  # P has order 2, k * P is P or O, and O was handled above.
+            return p
+        m, a, red = self.P, self.A.value, self.reduce
+        z1inv, z2inv, yinv = self.field.inverse_many([z1, z2, 2 * self.B.value * v % m])
+        u1, u2 = red(x1 * z1inv), red(x2 * z2inv)
+        # v1 = ((u1 * u + 1) * (u1 + u + 2a) - 2a - (u1 - u)**2 * u2) / (2 * b * v)
+        v1 = red((red(red(u1 * u + 1) * (u1 + u + 2 * a)) - 2 * a - red(red((u1 - u) * (u1 - u)) * u2)) * yinv)
+        return Mod.reduced(u1, m), Mod.reduced(v1, m)
+
+    def add(self, p1: MontgomeryPoint, p2: MontgomeryPoint, check: bool = True) -> MontgomeryPoint:
+        """
+        Affine addition, the chord-and-tangent rule with b * lambda**2 - a - u1 - u2 as the new u.
+        """
+        if check:
+            p1, p2 = self.modulate(p1), self.modulate(p2)
+        if p1 == O:
+            return p2
+        if p2 == O:
+            return p1
+        (u1, v1), (u2, v2) = p1, p2
+        if u1 == u2:
+            if v1 != v2 or v1 == 0:
+                return O
+            lam = (3 * u1 * u1 + 2 * self.A * u1 + 1) / (2 * self.B * v1)
+        else:
+            lam = (v2 - v1) / (u2 - u1)
+        u3 = self.B * lam * lam - self.A - u1 - u2
+        return u3, lam * (u1 - u3) - v1
+
+    def edwards(self) -> EdwardsCurve:
+        """
+        The birationally equivalent twisted Edwards curve, a = (A + 2) / B and d = (A - 2) / B, on which
+        precompute and multiply_fixed do their work.
+        """
+        if self._edwards is None:
+            a, d = (self.A + 2) / self.B, (self.A - 2) / self.B
+            self._edwards = EdwardsCurve(a.value, d.value, self.P)
+        return self._edwards
+
+    def to_edwards(self, p: MontgomeryPoint) -> Tuple[Mod, Mod]:
+        """(u, v) -> (u / v, (u - 1) / (u + 1)), O and (0, 0) going to (0, 1) and (0, -1)."""
+        if p == O:
+            return self.edwards().neutral
+        u, v = p
+        if u == 0:
+            return Mod(0, self.P), Mod(-1, self.P)
+        return u / v, (u - 1) / (u + 1)
+
+    def from_edwards(self, p: Tuple[Mod, Mod]) -> MontgomeryPoint:
+        """(x, y) -> ((1 + y) / (1 - y), u / x)."""
+        x, y = Mod(int(p[0]), self.P), Mod(int(p[1]), self.P)
+        if x == 0:
+            return O if y == 1 else (Mod(0, self.P), Mod(0, self.P))
+        u = (1 + y) / (1 - y)
+        return u, u / x
+
+    def precompute(self, p: MontgomeryPoint, window: int = 4, bits: Optional[int] = None) -> FixedBaseTable:
+        """
+        A fixed-base table of p on the equivalent Edwards curve, where the complete additions need no special cases.
+        """
+        return self.edwards().precompute(self.to_edwards(self.modulate(p)), window, bits)
+
+    def multiply_fixed(self, table: FixedBaseTable, k: int) -> MontgomeryPoint:
+        return self.from_edwards(self.edwards().multiply_fixed(table, k))
+
+
+def x25519(k: bytes, u: bytes) -> bytes:
+    """
+    The X25519 function of RFC 7748: clamps the scalar k and returns u(k * P) for the u coordinate of P.
+    """
+    assert len(k) == 32 and len(u) == 32, "X25519 takes 32-byte scalars and coordinates."
+    curve = _curve25519()
+    k = int.from_bytes(k, 'little')
+    k &= (1 << 254) - 8
+    k |= 1 << 254
+    u = int.from_bytes(u, 'little') & ((1 << 255) - 1)
+    (x, z), _ = curve.ladder(u, k, 255)
+    return (x * pow(z, curve.P - 2, curve.P) % curve.P).to_bytes(32, 'little')  # Z = 0 maps to 0, as RFC 7748 asks.
+
+
+_x25519_curve: Optional[MontgomeryCurve] = None
+
+
+def _curve25519() -> MontgomeryCurve:
+    global _x25519_curve
+    if _x25519_curve is None:
+        _x25519_curve = MontgomeryCurve(curve25519['A'], curve25519['B'], curve25519['P'])
+    return _x25519_curve
@@ -0,0 +1,60 @@
+from random import Random
+from Curve import O
+from Montgomery import MontgomeryCurve, curve25519, x25519
+
+# RFC 7748, sections 5.2 and 6.1: (scalar, u, X25519(scalar, u)).
+X25519_VECTORS = [
+    ('a546e36bf0527c9d3b16154b82465edd62144c0ac1fc5a18506a2244ba449ac4',
+     'e6db6867583030db3594c1a424b15f7c726624ec26b3353b10a903a6d0ab1c4c',
+     'c3da55379de9c6908e94ea4df28d084f32eccf03491c71f754b4075577a28552'),
+    ('4b66e9d4d1b4673c5ad22691957d6af5c11b6421e0ea01d42ca4169e7918ba0d',
+     'e5210f12786811d3f4b7959d0538ae2c31dbe7106fc03c3efc4cd549c715a493',
+     '95cbde9476e8907d7aade45cb4b873f88b595a68799fa152e6f8f7647aac7957'),
+    ('77076d0a7318a57d3c16c17251b26645df4c2f87ebc0992ab177fba51db92c2a',
+     '0900000000000000000000000000000000000000000000000000000000000000',
+     '8520f0098930a754748b7ddcb43ef75a0dbf3a0d26381af4eba4a98eaa9b4e6a'),
+    ('5dab087e624a8a4b79e17f8b83800ee66f3bb1292618b6fd1c2f8b27ff88e0eb',
+     '0900000000000000000000000000000000000000000000000000000000000000',
+     'de9edb7d7b7dc1b4d35b61c2ece435373f8343c85b78674dadfc7e146f882b4f'),
+    ('77076d0a7318a57d3c16c17251b26645df4c2f87ebc0992ab177fba51db92c2a',
+     'de9edb7d7b7dc1b4d35b61c2ece435373f8343c85b78674dadfc7e146f882b4f',
+     '4a5d9d5ba4ce2de1728e3bf480350f25e07e21c947d19e3376f09b3c1e161742'),
+    ('5dab087e624a8a4b79e17f8b83800ee66f3bb1292618b6fd1c2f8b27ff88e0eb',
+     '8520f0098930a754748b7ddcb43ef75a0dbf3a0d26381af4eba4a98eaa9b4e6a',
+     '4a5d9d5ba4ce2de1728e3bf480350f25e07e21c947d19e3376f09b3c1e161742'),
+]
+
+
+def test_x25519_vectors():
+    for k, u, expected in X25519_VECTORS:
+        assert x25519(bytes.fromhex(k), bytes.fromhex(u)).hex() == expected
+
+
+def test_x25519_iterated():
+    """RFC 7748 section 5.2: k = u = 9, then k, u = X25519(k, u), k for 1 and 1000 iterations."""
+    k = u = (9).to_bytes(32, 'little')
+    for i in range(1, 1001):
+        k, u = x25519(k, u), k
+        if i == 1:
+            assert k.hex() == '422c8e7a6227d7bca1350b3e2bb7279f7897b87bb6854b783c60e80311ae3079'
+    assert k.hex() == '684cf59ba83309552800ef566f2f4d3c1c3887c49360e3875f2eb94d99532c51'
+
+
+def test_multiply():
+    """The ladder with v recovery, the affine additions and the fixed-base table on the Edwards curve agree."""
+    rng = Random(23)
+    curve = MontgomeryCurve(curve25519['A'], curve25519['B'], curve25519['P'])
+    g = curve.modulate((curve25519['Gu'], curve25519['Gv']))
+    assert curve.multiply(g, curve25519['N']) == O
+    table = curve.precompute(g, 4, curve25519['N'].bit_length())
+    q = O
+    for k in range(1, 20):
+        q = curve.add(q, g)
+        assert curve.multiply(g, k) == q, k
+        assert curve.multiply_fixed(table, k) == q, k
+        assert curve.multiply(g, -k) == (q[0], -q[1])
+    for k in [curve25519['N'] - 1, curve25519['N'] + 1] + [rng.randrange(curve25519['N']) for _ in range(5)]:
+        q = curve.multiply(g, k)
+        assert curve.multiply_fixed(table, k) == q, k
+        assert curve.multiply_u(curve25519['Gu'], k) == q[0].value
+        assert curve.from_edwards(curve.to_edwards(q)) == q
@@ -0,0 +1,157 @@
+from hashlib import sha256
+from json import dump, load
+from mmap import ACCESS_READ, mmap
+from os import getpid, makedirs, path, replace
+from struct import Struct
+from typing import Iterable
+from Curve import JACOBIAN_O, Curve, FixedBaseTable, JacobianPoint, Point
+from Mod import fold_reducers, reducer_name, use_reducer
+from xgcd import INVERTERS, inverter_name, use_inverter
+
+# File layout, all big-endian:
+#   header: magic, version, window, bits, rows, width (bytes per coordinate)
+#   digest: sha256 of the curve, base point, window and bits the table was built for
+#   body:   rows * (2**window - 1) points as x then y in width bytes each, entry 0 of every row being O
+MAGIC = b'ECFT'
+VERSION = 1
+HEADER = Struct('>4sBBHHH')
+DIGEST_SIZE = 32
+CALIBRATION = 'calibration.json'  # Inverter and reducer choices per modulus, kept next to the tables.
+
+
+def table_digest(curve: Curve, base: Point, window: int, bits: int) -> bytes:
+    """
+    Identifies a table, so that a file built for other paramters is never used.
+    """
+    fields = (curve.A.value, curve.B.value, curve.P, int(base[0]), int(base[1]), window, bits)
+    return sha256(repr(fields).encode('ascii')).digest()
+
+
+class MappedRow:
+    def __init__(self, buffer: mmap, offset: int, width: int, size: int):
+        """
+        A row of a MappedTable, decoding a point from the file every time it is read.
+        """
+        self.buffer = buffer
+        self.offset = offset
+        self.width = width
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, j: int) -> JacobianPoint:
+        if not 0 <= j < self.size:
+            raise IndexError('Table entry out of range.')
+        if j == 0:
+            return JACOBIAN_O
+        start = self.offset + (j - 1) * 2 * self.width
+        middle = start + self.width
+        return (int.from_bytes(self.buffer[start:middle], 'big'),
+                int.from_bytes(self.buffer[middle:middle + self.width], 'big'), 1)
+
+
+class MappedTable(FixedBaseTable):
+    def __init__(self, base: Point, window: int, bits: int, buffer: mmap, rows: int, width: int):
+        """
+        A FixedBaseTable backed by a read-only memory map of a table file.
+        Nothing is decoded up front and the pages are shared by every process that maps the same file.
+        """
+        row_size = ((1 << window) - 1) * 2 * width
+        offset = HEADER.size + DIGEST_SIZE
+        points = [MappedRow(buffer, offset + i * row_size, width, 1 << window) for i in range(rows)]
+        super().__init__(base, window, bits, points)
+        self.buffer = buffer
+
+    def close(self):
+        self.buffer.close()
+
+
+def save_table(curve: Curve, table: FixedBaseTable, filename: str):
+    """
+    Writes table to filename. The file is written under a temporary name and then renamed,
+    so that processes racing to create the same table never see a partial file.
+    """
+    width = (curve.P.bit_length() + 7) // 8
+    temporary = f"{filename}.{getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, table.window, table.bits, len(table.points), width))
+        f.write(table_digest(curve, table.base, table.window, table.bits))
+        for row in table.points:
+            for x, y, z in row[1:]:
+                assert z == 1, "Only normalized tables can be saved."
+                f.write(x.to_bytes(width, 'big') + y.to_bytes(width, 'big'))
+    replace(temporary, filename)
+
+
+def load_table(curve: Curve, base: Point, window: int, bits: int, filename: str) -> MappedTable:
+    """
+    Maps the table in filename, raising ValueError if it was not built for this curve, base, window and bits.
+    """
+    with open(filename, 'rb') as f:
+        buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+    try:
+        if len(buffer) < HEADER.size + DIGEST_SIZE:
+            raise ValueError(f"{filename} is too short to be a table.")
+        magic, version, window_, bits_, rows, width = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a version {VERSION} table.")
+        if buffer[HEADER.size:HEADER.size + DIGEST_SIZE] != table_digest(curve, base, window, bits) \
+                or (window_, bits_) != (window, bits):
+            raise ValueError(f"{filename} was built for other paramters.")
+        if len(buffer) != HEADER.size + DIGEST_SIZE + rows * ((1 << window) - 1) * 2 * width:
+            raise ValueError(f"{filename} is truncated.")
+    except ValueError:
+        buffer.close()
+        raise
+    return MappedTable(curve.modulate(base), window, bits, buffer, rows, width)
+
+
+def cached_table(curve: Curve, base: Point, window: int, bits: int, directory: str) -> FixedBaseTable:
+    """
+    Returns the table of base from directory, building and saving it first if it is missing or stale.
+    """
+    name = table_digest(curve, base, window, bits).hex()[:16]
+    filename = path.join(directory, f"{name}-w{window}.tbl")
+    try:
+        return load_table(curve, base, window, bits, filename)
+    except (OSError, ValueError):
+        pass
+    table = curve.precompute(base, window, bits)
+    makedirs(directory, exist_ok=True)
+    save_table(curve, table, filename)
+    return table
+
+
+def calibrate(directory: str, moduli: Iterable[int]):
+    """
+    Applies the inverter and reducer calibrations saved in directory for the given prime moduli, measuring and
+    saving the ones that are missing or stale. Calibration takes longer than building a table, so processes
+    that share a table directory also share the results.
+    """
+    filename = path.join(directory, CALIBRATION)
+    try:
+        with open(filename) as f:
+            saved = load(f)
+    except (OSError, ValueError):
+        saved = {}
+    if not isinstance(saved, dict):
+        saved = {}
+    missing = False
+    for m in moduli:
+        try:
+            inverse, reduce = saved[hex(m)]['inverter'], saved[hex(m)]['reducer']
+            if inverse not in INVERTERS or reduce != 'generic' and reduce not in fold_reducers(m):
+                raise KeyError(hex(m))
+        except (KeyError, TypeError):  # Missing, malformed, or naming a function that no longer applies.
+            saved[hex(m)] = {'inverter': inverter_name(m, prime=True), 'reducer': reducer_name(m)}
+            missing = True
+        else:
+            use_inverter(m, inverse, prime=True)
+            use_reducer(m, reduce)
+    if missing:
+        makedirs(directory, exist_ok=True)
+        temporary = f"{filename}.{getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            dump(saved, f, indent=2)
+        replace(temporary, filename)
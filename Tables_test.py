@@ -0,0 +1,31 @@
+from json import dump, load
+from os import path
+from tempfile import TemporaryDirectory
+from Algorithm import ECDSA, nist256p
+from Tables import CALIBRATION, calibrate
+
+STALE = ({'inverter': 'no_such_inverter', 'reducer': 'generic'}, {'inverter': 'builtin', 'reducer': 'fold_nothing'},
+         {'inverter': 'builtin'}, ['builtin', 'generic'], 'builtin')
+
+
+def test_stale_calibration_is_redone():
+    """Unknown names and malformed entries in calibration.json get measured again instead of raising."""
+    p, n = nist256p['P'], nist256p['N']
+    for entry in STALE:
+        with TemporaryDirectory() as directory:
+            filename = path.join(directory, CALIBRATION)
+            with open(filename, 'w') as f:
+                dump({hex(p): entry, hex(n): entry}, f)
+            calibrate(directory, (p, n))
+            with open(filename) as f:
+                saved = load(f)
+            assert saved[hex(p)] != entry and saved[hex(n)] != entry
+            ECDSA(nist256p, 'stale', tables=directory)
+
+
+def test_malformed_calibration_file():
+    with TemporaryDirectory() as directory:
+        with open(path.join(directory, CALIBRATION), 'w') as f:
+            dump([1, 2, 3], f)
+        alg = ECDSA(nist256p, 'malformed', tables=directory)
+        assert alg.verify('message', alg.sign('message'))
@@ -0,0 +1,335 @@
+from argparse import ArgumentParser
+from json import dumps, load
+from os import path
+from platform import python_version
+from random import Random
+from subprocess import run as run_process
+from sys import executable, exit, stderr
+from tempfile import TemporaryDirectory
+from time import perf_counter_ns, strftime
+from typing import Callable, Dict, List
+from Algorithm import ECDSA, secp256k1, nist256p, nist384p, nist521p, sect233k1, sect233r1, sect283k1, sect283r1
+from BinaryCurve import BinaryCurve
+from Curve import Curve, optional_numpy
+from ECDH import ECDH
+from Edwards import EdwardsCurve, ed25519
+from ElGamal import ElGamal
+from GF2 import clmul_comb, clmul_spread
+from Mod import Mod
+from Montgomery import MontgomeryCurve, curve25519
+
+CURVES = {
+    'secp256k1': secp256k1,
+    'nist256p': nist256p,
+    'nist384p': nist384p,
+    'nist521p': nist521p,
+    'sect233k1': sect233k1,
+    'sect233r1': sect233r1,
+    'sect283k1': sect283k1,
+    'sect283r1': sect283r1,
+}
+BINARY_BENCHMARKS = ('gf2', 'ecdsa', 'startup')  # The benchmarks that run on binary curves, gf2 only runs on them.
+
+
+def measure(func: Callable, iterations: int, warmup: int = 3) -> Dict:
+    """
+    Times iterations calls of func one by one.
+    Returns the throughput and the latency percentiles in microseconds.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(iterations):
+        start = perf_counter_ns()
+        func()
+        times.append(perf_counter_ns() - start)
+    return summarize(times)
+
+
+def summarize(times: List[int]) -> Dict:
+    """
+    Returns the throughput and the latency percentiles in microseconds of a list of durations in nanoseconds.
+    """
+    times = sorted(times)
+    iterations = len(times)
+
+    def percentile(q: float) -> float:
+        return round(times[min(len(times) - 1, int(q * len(times)))] / 1000, 3)
+
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations * 1e9 / sum(times), 3),
+        'mean_us': round(sum(times) / len(times) / 1000, 3),
+        'p50_us': percentile(0.5),
+        'p90_us': percentile(0.9),
+        'p99_us': percentile(0.99),
+        'max_us': round(times[-1] / 1000, 3),
+    }
+
+
+def bench_mod(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    p = paramters['P']
+    a = Mod(rng.randrange(1, p), p)
+    b = Mod(rng.randrange(1, p), p)
+    e = rng.randrange(p)
+    square = a * a
+    return {
+        'mul': measure(lambda: a * b, iterations * 100),
+        'inverse': measure(a.inverse, iterations * 10),
+        'pow': measure(lambda: a ** e, iterations),
+        'sqrt': measure(square.sqrt, iterations),
+    }
+
+
+def bench_curve(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    alg = ECDSA(paramters, 'benchmark')  # Sets up the curve the same way ECDSA does, endomorphisms included.
+    curve: Curve = alg.curve
+    g = alg.G
+    q = curve.multiply(g, rng.randrange(1, alg.N), check=False)
+    gj = curve.jacobian_double(curve.to_jacobian(g))  # Jacobian points with Z != 1.
+    qj = curve.jacobian_double(curve.to_jacobian(q))
+    k = rng.randrange(1, alg.N)
+    return {
+        'add': measure(lambda: curve.add(g, q, check=False), iterations * 10),
+        'add_checked': measure(lambda: curve.add(g, q), iterations * 10),
+        'jacobian_double': measure(lambda: curve.jacobian_double(gj), iterations * 100),
+        'jacobian_add': measure(lambda: curve.jacobian_add(gj, qj), iterations * 100),
+        'multiply': measure(lambda: curve.multiply(q, k, check=False), iterations),
+        'multiply_binary': measure(lambda: curve.multiply_binary(q, k, check=False), iterations),
+        'multiply_fixed': measure(lambda: curve.multiply_fixed(alg.g_table, k), iterations),
+    }
+
+
+def bench_ecdsa(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    alg = ECDSA(paramters, 'benchmark')
+    passwords = iter(range(1 << 62))
+    message = 'benchmark message'
+    signature = alg.sign(message, rng.randrange(1, alg.N))
+    cached = ECDSA(paramters, 'benchmark')
+    cached.cache_keys()
+    return {
+        'init': measure(lambda: ECDSA(paramters, str(next(passwords))), iterations),
+        'sign': measure(lambda: alg.sign(message, rng.randrange(1, alg.N)), iterations),
+        'verify': measure(lambda: alg.verify(message, signature), iterations),
+        'verify_cached': measure(lambda: cached.verify(message, signature), iterations),
+    }
+
+
+def bench_vector(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    """
+    NumPy limb vectors against one Python int at a time, reported per element with elements_per_sec.
+    """
+    from ModArray import ModArray  # Only listed in BENCHMARKS when NumPy is installed.
+    alg = ECDSA(paramters, 'benchmark')
+    curve: Curve = alg.curve
+    p, lanes = curve.P, 1024
+    xs = [rng.randrange(p) for _ in range(lanes)]
+    ys = [rng.randrange(p) for _ in range(lanes)]
+    a, b = ModArray.from_ints(xs, p), ModArray.from_ints(ys, p)
+    points = [curve.multiply_fixed(alg.g_table, rng.randrange(1, alg.N)) for _ in range(lanes // 16)] * 16
+    scalars = [rng.randrange(1, alg.N) for _ in range(lanes)]
+    runs = max(1, iterations // 10)
+    rv = {
+        'mul': measure(lambda: [curve.reduce(x * y) for x, y in zip(xs, ys)], iterations),
+        'mul_vector': measure(lambda: a * b, iterations),
+        'multiply_many': measure(lambda: curve.multiply_many(points, scalars, False, False), runs, warmup=0),
+        'multiply_many_vector': measure(lambda: curve.multiply_many(points, scalars, False, True), runs, warmup=0),
+    }
+    for measurement in rv.values():
+        measurement['elements_per_sec'] = round(measurement['ops_per_sec'] * lanes, 3)
+    return rv
+
+
+# Run in a fresh interpreter: prints the nanoseconds from before importing Algorithm to the first signature.
+STARTUP = """
+from time import perf_counter_ns
+start = perf_counter_ns()
+from Algorithm import ECDSA
+ECDSA({paramters!r}, 'startup', tables={tables!r}).sign('startup message')
+print(perf_counter_ns() - start)
+"""
+
+
+def first_signature(paramters: Dict, tables: str = None) -> int:
+    code = STARTUP.format(paramters=paramters, tables=tables)
+    # The modules are imported from the directory of this file, whatever the working directory.
+    process = run_process([executable, '-c', code], capture_output=True, check=True, text=True,
+                          cwd=path.dirname(path.abspath(__file__)))
+    return int(process.stdout)
+
+
+def bench_startup(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    """
+    Cold start to first signature in new processes, building the table of G or mapping it from a table file.
+    """
+    runs = max(1, iterations // 4)
+    with TemporaryDirectory() as tables:
+        first_signature(paramters, tables)  # Writes the table file.
+        return {
+            'first_sign': summarize([first_signature(paramters) for _ in range(runs)]),
+            'first_sign_mapped': summarize([first_signature(paramters, tables) for _ in range(runs)]),
+        }
+
+
+def bench_models(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    """
+    The Weierstrass curve of paramters against Ed25519 (twisted Edwards) and Curve25519 (Montgomery), operation by operation.
+    """
+    alg = ECDSA(paramters, 'benchmark')
+    curve: Curve = alg.curve
+    k = rng.randrange(1, alg.N)
+    q = curve.multiply(alg.G, rng.randrange(1, alg.N), check=False)
+    gj = curve.jacobian_double(curve.to_jacobian(alg.G))
+    qj = curve.jacobian_double(curve.to_jacobian(q))
+    edwards = EdwardsCurve(ed25519['A'], ed25519['D'], ed25519['P'])
+    eg = edwards.modulate((ed25519['Gx'], ed25519['Gy']))
+    eq = edwards.multiply(eg, rng.randrange(1, ed25519['N']), check=False)
+    egx = edwards.double_extended(edwards.to_extended(eg))
+    eqx = edwards.double_extended(edwards.to_extended(eq))
+    e_table = edwards.precompute(eg, 4, ed25519['N'].bit_length())
+    ek = rng.randrange(1, ed25519['N'])  # Below N, so that multiply_fixed uses its table.
+    montgomery = MontgomeryCurve(curve25519['A'], curve25519['B'], curve25519['P'])
+    mk = rng.randrange(1, curve25519['N'])
+    return {
+        'weierstrass_add': measure(lambda: curve.jacobian_add(gj, qj), iterations * 100),
+        'weierstrass_double': measure(lambda: curve.jacobian_double(gj), iterations * 100),
+        'weierstrass_multiply': measure(lambda: curve.multiply(q, k, check=False), iterations),
+        'weierstrass_multiply_fixed': measure(lambda: curve.multiply_fixed(alg.g_table, k), iterations),
+        'weierstrass_ladder': measure(lambda: curve.ladder(q[0].value, k, alg.N.bit_length()), iterations),
+        'edwards_add': measure(lambda: edwards.add_extended(egx, eqx), iterations * 100),
+        'edwards_double': measure(lambda: edwards.double_extended(egx), iterations * 100),
+        'edwards_multiply': measure(lambda: edwards.multiply(eq, ek, check=False), iterations),
+        'edwards_multiply_fixed': measure(lambda: edwards.multiply_fixed(e_table, ek), iterations),
+        'montgomery_ladder': measure(lambda: montgomery.ladder(curve25519['Gu'], mk, 255), iterations),
+    }
+
+
+def bench_ecdh(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    ecdh = ECDH(ECDSA(paramters, 'benchmark'))
+    ladder = ECDH(ecdh.alg, ladder=True)
+    peers = [ECDSA(paramters, str(rng.random())).kpub for _ in range(16)]
+    rv = {
+        'shared_secret': measure(lambda: ecdh.shared_secret(peers[0]), iterations),
+        'shared_secret_ladder': measure(lambda: ladder.shared_secret(peers[0]), iterations),
+        'multiply': measure(lambda: ecdh.curve.multiply(peers[0], ecdh.alg.kpriv, check=False), iterations),
+        'shared_secrets': measure(lambda: ecdh.shared_secrets(peers), max(1, iterations // 10), warmup=1),
+    }
+    rv['shared_secrets']['elements_per_sec'] = round(rv['shared_secrets']['ops_per_sec'] * len(peers), 3)
+    return rv
+
+
+def bench_gf2(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    alg = ECDSA(paramters, 'benchmark')
+    curve: BinaryCurve = alg.curve
+    field = curve.field
+    a, b = rng.getrandbits(curve.m), rng.getrandbits(curve.m)
+    g = curve.to_ld(alg.G)
+    gd = curve.ld_double(g)  # A point with Z != 1.
+    q = curve.multiply(alg.G, rng.randrange(1, alg.N), check=False)
+    k = rng.randrange(1, alg.N)
+    return {
+        'clmul_comb': measure(lambda: clmul_comb(a, b), iterations * 100),
+        'clmul_spread': measure(lambda: clmul_spread(a, b), iterations * 100),
+        'mul': measure(lambda: field.mul(a, b), iterations * 100),
+        'sqr': measure(lambda: field.sqr(a), iterations * 100),
+        'inverse_itoh_tsujii': measure(lambda: field.inverse_itoh_tsujii(a), iterations * 10),
+        'inverse_xgcd': measure(lambda: field.inverse_xgcd(a), iterations * 10),
+        'ld_double': measure(lambda: curve.ld_double(gd), iterations * 10),
+        'ld_add_affine': measure(lambda: curve.ld_add_affine(gd, g), iterations * 10),
+        'multiply': measure(lambda: curve.multiply(q, k, check=False), iterations),
+        'multiply_fixed': measure(lambda: curve.multiply_fixed(alg.g_table, k), iterations),
+    }
+
+
+def bench_elgamal(paramters: Dict, iterations: int, rng: Random) -> Dict:
+    elgamal = ElGamal(ECDSA(paramters, 'benchmark'))
+    message = bytes(rng.randrange(256) for _ in range(elgamal.chunk * 128))
+    ciphertext = elgamal.encrypt(message)
+    rv = {
+        'encrypt': measure(lambda: elgamal.encrypt(message), max(1, iterations // 10), warmup=1),
+        'decrypt': measure(lambda: elgamal.decrypt(ciphertext), max(1, iterations // 10), warmup=1),
+    }
+    for measurement in rv.values():  # Sustained throughput over a message of 128 chunks.
+        measurement['mb_per_sec'] = round(measurement['ops_per_sec'] * len(message) / 1e6, 6)
+    return rv
+
+
+# Each benchmark takes (paramters, iterations, rng) and returns {operation: measurement}.
+BENCHMARKS = {
+    'mod': bench_mod,
+    'curve': bench_curve,
+    'ecdsa': bench_ecdsa,
+    'ecdh': bench_ecdh,
+    'models': bench_models,
+    'elgamal': bench_elgamal,
+    'startup': bench_startup,
+    'gf2': bench_gf2,
+}
+if optional_numpy() is not None:  # ModArray needs NumPy.
+    BENCHMARKS['vector'] = bench_vector
+
+
+def run(curves: List[str], benchmarks: List[str], iterations: int, seed: int) -> Dict:
+    """
+    Runs the selected benchmarks on the selected curves, with inputs drawn from a seeded generator.
+    """
+    results = {}
+    for name in curves:
+        results[name] = {}
+        for benchmark in benchmarks:
+            binary = CURVES[name].get('Field') == 'binary'
+            if benchmark not in BINARY_BENCHMARKS if binary else benchmark == 'gf2':
+                continue  # The other benchmarks need prime fields, gf2 needs a binary one.
+            rng = Random(f"{seed}-{name}-{benchmark}")
+            results[name][benchmark] = BENCHMARKS[benchmark](CURVES[name], iterations, rng)
+    return {
+        'time': strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': python_version(),
+        'iterations': iterations,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict, report: Dict, tolerance: float) -> List[str]:
+    """
+    Lists the operations whose throughput in report fell more than tolerance (a fraction) below baseline.
+    """
+    rv = []
+    for name, benchmarks in report['results'].items():
+        for benchmark, operations in benchmarks.items():
+            for operation, new in operations.items():
+                old = baseline['results'].get(name, {}).get(benchmark, {}).get(operation)
+                if old and new['ops_per_sec'] < old['ops_per_sec'] * (1 - tolerance):
+                    rv.append(f"{name} {benchmark}.{operation}: {old['ops_per_sec']} -> {new['ops_per_sec']} ops/s")
+    return rv
+
+
+def main() -> int:
+    parser = ArgumentParser(description='Benchmarks Mod, Curve, GF(2**m), ECDSA, ECDH, ElGamal and start-up on the bundled curves, printing JSON.')
+    parser.add_argument('--curves', nargs='+', choices=list(CURVES), default=list(CURVES))
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--iterations', type=int, default=20, help='Base iteration count, cheap operations run more.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+    parser.add_argument('--baseline', help='A previous JSON report to check for throughput regressions.')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative slowdown against the baseline.')
+    args = parser.parse_args()
+
+    report = run(args.curves, args.benchmarks, args.iterations, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(dumps(report, indent=2) + '\n')
+    else:
+        print(dumps(report, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
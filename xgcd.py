@@ -2,6 +2,9 @@
 
 # Built on top of code from https://anh.cs.luc.edu/331/code/xgcd.py
 
+from random import randrange
+from timeit import timeit
+
 
 def gcd(a, b):
     """
@@ -28,3 +31,171 @@ def xgcd(a, b):
         y, prevy = prevy - q * y, y
         a, b = b, r
     return a, prevx, prevy
+
+
+def inverse_xgcd(a, m):
+    """Inverse of a modulo m with the extended Euclidean algorithm above."""
+    g, x, _ = xgcd(a % m, m)
+    if g != 1:
+        raise ValueError("Value not invertible.")
+    return x % m
+
+
+def inverse_binary(a, m):
+    """
+    Inverse of a modulo an odd m with Stein's binary extended GCD, which only shifts and subtracts.
+    The invariants are x1 * a = u and x2 * a = v (mod m).
+    """
+    if not m & 1:
+        return inverse_xgcd(a, m)
+    u, v = a % m, m
+    x1, x2 = 1, 0
+    while u != 1 and v != 1:
+        if u == 0 or v == 0:
+            raise ValueError("Value not invertible.")
+        while not u & 1:
+            u >>= 1
+            x1 = x1 >> 1 if not x1 & 1 else (x1 + m) >> 1
+        while not v & 1:
+            v >>= 1
+            x2 = x2 >> 1 if not x2 & 1 else (x2 + m) >> 1
+        if u >= v:
+            u -= v
+            x1 -= x2
+        else:
+            v -= u
+            x2 -= x1
+    return (x1 if u == 1 else x2) % m
+
+
+def inverse_lehmer(a, m, digit=64):
+    """
+    Inverse of a modulo m with Lehmer's extended GCD (Knuth's Algorithm L).
+    Runs of quotients are found from the leading digit bits of the operands using small numbers only,
+    and then applied to the full numbers at once as a 2x2 matrix.
+    The invariants are cx * a = x and cy * a = y (mod m).
+    """
+    x, y = m, a % m
+    cx, cy = 0, 1
+    while y >> digit:
+        shift = x.bit_length() - digit
+        xh, yh = x >> shift, y >> shift
+        a1, b1, c1, d1 = 1, 0, 0, 1
+        while yh + c1 != 0 and yh + d1 != 0:
+            q = (xh + a1) // (yh + c1)
+            if q != (xh + b1) // (yh + d1):
+                break
+            a1, c1 = c1, a1 - q * c1
+            b1, d1 = d1, b1 - q * d1
+            xh, yh = yh, xh - q * yh
+        if b1 == 0:
+            q, r = divmod(x, y)
+            x, y = y, r
+            cx, cy = cy, cx - q * cy
+        else:
+            x, y = a1 * x + b1 * y, c1 * x + d1 * y
+            cx, cy = a1 * cx + b1 * cy, c1 * cx + d1 * cy
+    while y:
+        q, r = divmod(x, y)
+        x, y = y, r
+        cx, cy = cy, cx - q * cy
+    if x != 1:
+        raise ValueError("Value not invertible.")
+    return cx % m
+
+
+def inverse_fermat(a, m):
+    """Inverse of a modulo a prime m by Fermat's little theorem, a**(m - 2)."""
+    a %= m
+    if a == 0:
+        raise ValueError("Value not invertible.")
+    return pow(a, m - 2, m)
+
+
+def inverse_builtin(a, m):
+    """Inverse of a modulo m with the built-in pow(a, -1, m)."""
+    return pow(a, -1, m)  # Raises a ValueError if a is not invertible.
+
+
+INVERTERS = {
+    'xgcd': inverse_xgcd,
+    'binary': inverse_binary,
+    'lehmer': inverse_lehmer,
+    'fermat': inverse_fermat,
+    'builtin': inverse_builtin,
+}
+
+
+def calibrate_inverters(m, samples=20, number=3, prime=False):
+    """
+    Times every inverter on random values modulo m.
+    Returns {name: (function, seconds)}, leaving out the inverters that disagree with xgcd on any sample.
+    fermat only takes part if m is known to be prime: modulo a Carmichael number such as 561 it agrees with
+    xgcd on every invertible sample, but returns garbage instead of raising for the values that are not.
+    """
+    values = [randrange(1, m) for _ in range(samples)]
+    values = [v for v in values if gcd(v, m) == 1] or [1]
+    expected = [inverse_xgcd(v, m) for v in values]
+    rv = {}
+    for name, inverse in INVERTERS.items():
+        if name == 'fermat' and not prime:
+            continue
+        try:
+            if [inverse(v, m) for v in values] != expected:
+                continue
+        except ValueError:
+            continue
+        rv[name] = inverse, timeit(lambda: [inverse(v, m) for v in values], number=number)
+    return rv
+
+
+_inverters = {}
+_primes = set()  # Moduli declared prime, whose calibration included fermat.
+
+
+def inverter(m, prime=False):
+    """
+    Returns the fastest inverse function for modulus m on this machine, calibrating once per modulus.
+    prime=True declares m prime, as PrimeField does, which then holds for every later call with m.
+    """
+    if prime and m not in _primes:
+        _primes.add(m)
+        _inverters.pop(m, None)  # Calibrated without fermat so far.
+    if m not in _inverters:
+        timings = calibrate_inverters(m, prime=m in _primes)
+        _inverters[m] = min(timings.values(), key=lambda t: t[1])[0]
+    return _inverters[m]
+
+
+def inverter_name(m, prime=False):
+    """Returns the name in INVERTERS of the inverse function used for modulus m."""
+    chosen = inverter(m, prime)
+    chosen = getattr(chosen, '__wrapped__', chosen)  # Unwraps the counting of Instrument.py.
+    return next(name for name, inverse in INVERTERS.items() if inverse is chosen)
+
+
+def use_inverter(m, name, prime=False):
+    """Skips the calibration for modulus m, using a previous result such as the one of inverter_name."""
+    assert prime or name != 'fermat', "fermat only inverts modulo primes."
+    if prime:
+        _primes.add(m)
+    _inverters[m] = INVERTERS[name]
+
+
+def batch_inverse(values, m):
+    """
+    Montgomery's simultaneous inversion:
+    Returns the inverses of all the values modulo m using a single inversion and 3(n - 1) multiplications.
+    Raises a ValueError if any of the values is not invertible.
+    """
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % m
+    inv = inverter(m)(acc, m)
+    rv = [0] * len(prefix)
+    for i in range(len(prefix) - 1, -1, -1):
+        rv[i] = inv * prefix[i] % m
+        inv = inv * values[i] % m
+    return rv
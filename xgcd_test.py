@@ -0,0 +1,60 @@
+from random import Random
+import pytest
+from Mod import Mod, prime_field
+from xgcd import INVERTERS, batch_inverse, calibrate_inverters, gcd, inverse_xgcd, inverter, inverter_name
+
+PRIMES = (97, 2**127 - 1, 2**255 - 19, 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141, 2**521 - 1)
+
+
+def test_inverters_agree():
+    """Every inverter against xgcd, and against a * inverse = 1, on prime and composite moduli."""
+    rng = Random(13)
+    for m in PRIMES + (91, 2**64 + 1, 2**128):
+        values = [1, 2, m - 1, m + 3] + [rng.randrange(1, m) for _ in range(30)]
+        for a in values:
+            if gcd(a, m) != 1:
+                continue
+            expected = inverse_xgcd(a, m)
+            assert a * expected % m == 1
+            for name, inverse in INVERTERS.items():
+                if name == 'fermat' and m not in PRIMES:
+                    continue
+                assert inverse(a, m) == expected, (name, m, a)
+
+
+def test_inverters_reject_non_invertible():
+    for m, a in ((97, 0), (97, 97), (91, 7), (2**128, 2**64)):
+        for name, inverse in INVERTERS.items():
+            if name == 'fermat' and a % m:
+                continue  # Fermat's theorem only holds for prime moduli.
+            try:
+                inverse(a, m)
+            except ValueError:
+                continue
+            raise AssertionError(f"{name} inverted {a} modulo {m}.")
+
+
+def test_calibration_and_batch_inverse():
+    rng = Random(14)
+    for m in PRIMES + (91,):
+        timings = calibrate_inverters(m, prime=m in PRIMES)
+        assert 'xgcd' in timings and ('fermat' in timings) == (m in PRIMES)
+        assert 'fermat' not in calibrate_inverters(m)
+        assert inverter(m) in INVERTERS.values()
+        values = [v for v in (rng.randrange(1, m) for _ in range(20)) if gcd(v, m) == 1]
+        assert batch_inverse(values, m) == [inverse_xgcd(v, m) for v in values]
+
+
+def test_fermat_only_for_primes():
+    """Modulo the Carmichael number 561 fermat inverts every unit correctly, so only declaring primes can rule it out."""
+    carmichael = 561
+    assert all(INVERTERS['fermat'](a, carmichael) == inverse_xgcd(a, carmichael)
+               for a in range(1, carmichael) if gcd(a, carmichael) == 1)
+    assert 'fermat' not in calibrate_inverters(carmichael, samples=200)
+    assert inverter_name(carmichael) != 'fermat'
+    with pytest.raises(ValueError):
+        Mod(3, carmichael).inverse()
+    p = 2**255 - 19
+    assert inverter(p) in INVERTERS.values()
+    assert prime_field(p).invert is inverter(p) is inverter(p, prime=True)
+    assert 'fermat' in calibrate_inverters(p, prime=True)